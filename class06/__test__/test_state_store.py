@@ -0,0 +1,151 @@
+import sys
+import os
+import multiprocessing
+import tempfile
+import threading
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from state_store import (
+    LocalStateStore,
+    SharedMemoryStateStore,
+    SQLiteStateStore,
+    StateStore,
+    default_shm_path,
+    open_state_store,
+)
+
+
+@pytest.fixture(params=["memory", "shm", "sqlite"])
+def store(request):
+    with tempfile.TemporaryDirectory() as folder:
+        state = open_state_store("test", backend=request.param, path=os.path.join(folder, "state"))
+        yield state
+        state.close()
+
+
+# ---- Operations (every backend) ----
+
+def test_missing_key_counts_as_zero(store):
+    assert store.get("missing") == 0
+
+
+def test_set_and_get(store):
+    store.set("a", 5)
+    store.set("a", -7)
+    assert store.get("a") == -7
+
+
+def test_setdefault_only_sets_once(store):
+    assert store.setdefault("a", 10) == 10
+    assert store.setdefault("a", 20) == 10
+    assert store.get("a") == 10
+
+
+def test_increment_returns_the_new_value(store):
+    assert store.increment("a") == 1
+    assert store.increment("a", 9) == 10
+    assert store.increment("a", -3) == 7
+
+
+def test_compare_and_set(store):
+    assert store.compare_and_set("a", 0, 5)  # a missing key counts as 0
+    assert not store.compare_and_set("a", 0, 6)
+    assert store.compare_and_set("a", 5, 6)
+    assert store.get("a") == 6
+
+
+def test_update_may_give_up(store):
+    store.set("balance", 100)
+
+    def take_150(balance):
+        if balance < 150:
+            raise ValueError("not enough")
+        return balance - 150
+
+    with pytest.raises(ValueError):
+        store.update("balance", take_150)
+    assert store.get("balance") == 100
+    assert store.update("balance", lambda balance: balance * 2) == 200
+
+
+def test_no_lost_updates_across_threads(store):
+    def work():
+        for _ in range(500):
+            store.increment("hot")
+            store.update("cas", lambda value: value + 1)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get("hot") == 2000
+    assert store.get("cas") == 2000
+
+
+# ---- Several processes ----
+
+def increment_in_process(backend, path, count):
+    state = open_state_store("test", backend=backend, path=path)
+    for _ in range(count):
+        state.increment("hot")
+    state.close()
+
+
+@pytest.mark.parametrize("backend", ["shm", "sqlite"])
+def test_no_lost_updates_across_processes(backend):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "state")
+        open_state_store("test", backend=backend, path=path).close()  # create the file once
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=increment_in_process, args=(backend, path, 300)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        state = open_state_store("test", backend=backend, path=path)
+        assert state.get("hot") == 900
+        state.close()
+
+
+def test_shm_key_too_long():
+    with tempfile.TemporaryDirectory() as folder:
+        state = SharedMemoryStateStore(os.path.join(folder, "state.shm"))
+        with pytest.raises(ValueError):
+            state.increment("k" * 100)
+        state.close()
+
+
+# ---- Choosing a backend ----
+
+def test_default_files_are_named_after_the_app(monkeypatch):
+    monkeypatch.delenv("STATE_PATH", raising=False)
+    assert os.path.basename(default_shm_path("class06")) == "class06.state.shm"
+    assert default_shm_path("class06") != default_shm_path("other_app")
+
+    with tempfile.TemporaryDirectory() as folder:
+        monkeypatch.chdir(folder)
+        state = open_state_store("class06", backend="sqlite")
+        assert isinstance(state, SQLiteStateStore) and state.path == "class06.state.db"
+        state.close()
+
+
+def test_backend_from_environment(monkeypatch):
+    monkeypatch.delenv("STATE_BACKEND", raising=False)
+    assert isinstance(open_state_store("test"), LocalStateStore)
+    monkeypatch.setenv("STATE_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        open_state_store("test")
+
+
+def test_state_store_is_abstract():
+    with pytest.raises(TypeError):
+        StateStore()
+
+    class OnlyGet(StateStore):
+        def get(self, key):
+            return 0
+
+    with pytest.raises(TypeError):
+        OnlyGet()
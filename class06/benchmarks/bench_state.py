@@ -0,0 +1,150 @@
+"""
+Benchmark: state store operations/sec under contention, and a check
+that no update is lost.
+
+Workloads (each worker runs for DURATION seconds):
+  hot     every worker increments the same key
+  spread  increments over 64 keys
+  cas     update(key, v + 1) on one key — compare-and-set, retried on conflict
+
+"global" is the old way — read a module variable, work out the new
+value (a function call), write it back — in threads only; it is there
+to show lost updates. Python switches threads every 5 ms by default,
+which hides the race in a short run, so for that row the switch
+interval is made tiny. shm and sqlite run in separate processes, like
+`uvicorn --workers N`.
+
+Run from the class06 folder:
+    uv run python benchmarks/bench_state.py
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from state_store import LocalStateStore, SharedMemoryStateStore, SQLiteStateStore
+
+DURATION = 1.0
+SPREAD_KEYS = 64
+WORKLOADS = ("hot", "spread", "cas")
+
+counter = 0  # for the "global" baseline
+
+
+def work(store, workload: str, worker: int, deadline: float) -> int:
+    done = 0
+    keys = [f"key-{i}" for i in range(SPREAD_KEYS)]
+    while True:
+        for i in range(100):
+            if workload == "hot":
+                store.increment("hot")
+            elif workload == "spread":
+                store.increment(keys[(worker * 7 + done + i) % SPREAD_KEYS])
+            else:
+                store.update("cas", lambda value: value + 1)
+        done += 100
+        if time.perf_counter() >= deadline:
+            return done
+
+
+def new_balance(value: int) -> int:
+    return value + 1
+
+
+def work_global(deadline: float) -> int:
+    global counter
+    done = 0
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            value = counter
+            counter = new_balance(value)
+        done += 100
+    return done
+
+
+def total(store, workload: str) -> int:
+    if workload == "spread":
+        return sum(store.get(f"key-{i}") for i in range(SPREAD_KEYS))
+    return store.get(workload)
+
+
+def run_threads(make_store, workload: str, threads: int) -> tuple[int, int]:
+    """(operations done, value in the store) with `threads` threads in this process."""
+    global counter
+    store = make_store() if make_store else None
+    counter = 0
+    counts = [0] * threads
+    deadline = time.perf_counter() + DURATION
+
+    def run(worker: int):
+        counts[worker] = work_global(deadline) if store is None else work(store, workload, worker, deadline)
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    value = counter if store is None else total(store, workload)
+    return sum(counts), value
+
+
+def process_worker(backend: str, path: str, workload: str, worker: int, barrier, results) -> None:
+    store = SharedMemoryStateStore(path) if backend == "shm" else SQLiteStateStore(path)
+    barrier.wait()
+    results.put(work(store, workload, worker, time.perf_counter() + DURATION))
+    store.close()
+
+
+def run_processes(backend: str, workload: str, processes: int) -> tuple[int, int]:
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "state.shm" if backend == "shm" else "state.db")
+    store = SharedMemoryStateStore(path) if backend == "shm" else SQLiteStateStore(path)
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(processes)
+    results = context.Queue()
+    workers = [
+        context.Process(target=process_worker, args=(backend, path, workload, i, barrier, results))
+        for i in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    done = sum(results.get() for _ in workers)
+    for process in workers:
+        process.join()
+    value = total(store, workload)
+    store.close()
+    return done, value
+
+
+def report(label: str, workers: str, workload: str, done: int, value: int) -> None:
+    lost = done - value
+    print(f"{label:>8} {workers:>12} {workload:>7} {done / DURATION:>12,.0f} {'lost ' + str(lost) if lost else 'ok':>12}")
+
+
+def main():
+    print(f"{os.cpu_count()} CPU(s), {DURATION:.0f} s per run")
+    print(f"{'backend':>8} {'workers':>12} {'load':>7} {'ops/sec':>12} {'updates':>12}")
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    for threads in (1, 8):
+        done, value = run_threads(None, "hot", threads)
+        report("global", f"{threads} threads", "hot", done, value)
+    sys.setswitchinterval(interval)
+    for workload in WORKLOADS:
+        for threads in (1, 8):
+            done, value = run_threads(LocalStateStore, workload, threads)
+            report("memory", f"{threads} threads", workload, done, value)
+    for backend in ("shm", "sqlite"):
+        for workload in WORKLOADS:
+            for processes in (1, 2, 4, 8):
+                done, value = run_processes(backend, workload, processes)
+                report(backend, f"{processes} procs", workload, done, value)
+
+
+if __name__ == "__main__":
+    main()
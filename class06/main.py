@@ -1,8 +1,39 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
+from state_store import open_state_store
 
 app = FastAPI()
 
-bank_balance = 10000
+# The balance lives in a state store instead of a global variable, so
+# every thread (and with STATE_BACKEND=shm or sqlite, every worker
+# process) reads and changes the same value, one change at a time.
+state = open_state_store("class06")
+state.setdefault("bank_balance", 10000)
+
+
+class NotEnoughMoney(Exception):
+    pass
+
+
+# A plain def: with STATE_BACKEND=sqlite, state.get reads the database,
+# so FastAPI runs it in a worker thread instead of blocking the event loop
 @app.get("/authenticate")
-async def root():
-    return f"I am learning FASTAPI!!!{bank_balance}"
+def root():
+    return f"I am learning FASTAPI!!!{state.get('bank_balance')}"
+
+@app.post("/deposit")
+def deposit(amount: int = Query(gt=0)):
+    return {"bank_balance": state.increment("bank_balance", amount)}
+
+@app.post("/withdraw")
+def withdraw(amount: int = Query(gt=0)):
+    def take(balance: int) -> int:
+        if balance < amount:
+            raise NotEnoughMoney
+        return balance - amount
+
+    try:
+        # Check and subtract as one step: two withdrawals can't both spend the same money
+        balance = state.update("bank_balance", take)
+    except NotEnoughMoney:
+        raise HTTPException(status_code=400, detail="Not enough money")
+    return {"bank_balance": balance}
@@ -0,0 +1,359 @@
+"""
+A small state service: named integer values (counters, balances, the
+next id...) with atomic updates.
+
+A module-level `counter += 1` is two steps (read, then write). Two
+threads can both read 5 and both write 6, and one update is lost. And
+with `uvicorn --workers 4` every worker process has its own copy of the
+variable, so the workers don't even agree on the value.
+
+Every operation here is atomic — nobody can change the value between
+the read and the write:
+
+    state = open_state_store("class06")              # see STATE_BACKEND below
+    state.setdefault("bank_balance", 10000)          # only if not set yet
+    state.increment("bank_balance", 50)              # -> 10050
+    state.compare_and_set("bank_balance", 10050, 0)  # True: it was still 10050
+    state.update("bank_balance", lambda v: v * 2)    # any change, retried until it wins
+
+A key that was never set counts as 0.
+
+Backends (all with the same methods):
+  LocalStateStore         one process. The map is split into "stripes",
+                          each with its own lock, so threads working on
+                          different keys rarely wait for each other.
+  SharedMemoryStateStore  several processes on one machine. A fixed-size
+                          table in a memory-mapped file (in /dev/shm, so
+                          it lives in RAM), with a file lock per stripe.
+  SQLiteStateStore        several processes, and the values survive a
+                          restart. One SQLite database in WAL mode.
+
+STATE_BACKEND = memory (default) | shm | sqlite, STATE_PATH = file to use.
+Without STATE_PATH the file is named after the app ("class06.state.shm"
+in /dev/shm, "class06.state.db" in the current folder), so two apps on
+one machine never share their values by accident.
+"""
+
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from hashlib import blake2b
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def _key_hash(key: str) -> int:
+    # Python's hash() differs between processes, this one doesn't
+    return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+class StateStore(ABC):
+    @abstractmethod
+    def get(self, key: str) -> int: ...
+
+    @abstractmethod
+    def set(self, key: str, value: int) -> None: ...
+
+    @abstractmethod
+    def setdefault(self, key: str, value: int) -> int:
+        """Set the key only if it has never been set. Returns its value."""
+
+    @abstractmethod
+    def increment(self, key: str, amount: int = 1) -> int:
+        """Add amount (may be negative) and return the new value."""
+
+    @abstractmethod
+    def compare_and_set(self, key: str, expected: int, value: int) -> bool:
+        """Set the key to value only if it is still `expected`. True if it was set."""
+
+    def update(self, key: str, function: Callable[[int], int]) -> int:
+        """
+        Replace the value with function(value) and return the new value.
+        If someone else changed it meanwhile, try again with the new value
+        (so `function` may run more than once, and may raise to give up).
+        """
+        while True:
+            current = self.get(key)
+            new = function(current)
+            if self.compare_and_set(key, current, new):
+                return new
+
+    def close(self) -> None:
+        pass
+
+
+# ---------- One process ----------
+
+class LocalStateStore(StateStore):
+    def __init__(self, stripes: int = 64):
+        self._stripes = [(threading.Lock(), {}) for _ in range(stripes)]
+
+    def _stripe(self, key: str) -> tuple[threading.Lock, dict]:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def get(self, key: str) -> int:
+        lock, values = self._stripe(key)
+        with lock:
+            return values.get(key, 0)
+
+    def set(self, key: str, value: int) -> None:
+        lock, values = self._stripe(key)
+        with lock:
+            values[key] = value
+
+    def setdefault(self, key: str, value: int) -> int:
+        lock, values = self._stripe(key)
+        with lock:
+            return values.setdefault(key, value)
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        lock, values = self._stripe(key)
+        with lock:
+            value = values[key] = values.get(key, 0) + amount
+            return value
+
+    def compare_and_set(self, key: str, expected: int, value: int) -> bool:
+        lock, values = self._stripe(key)
+        with lock:
+            if values.get(key, 0) != expected:
+                return False
+            values[key] = value
+            return True
+
+
+# ---------- Several processes, shared memory ----------
+#
+# File layout:
+#   header: b"STATESHM" | capacity (4 bytes) | padding to 64 bytes
+#   slots:  capacity x 64 bytes, each:
+#           used (1 byte) | key length (1) | key (54 bytes, UTF-8) | value (8, signed)
+# A key goes to slot hash % capacity, or the next free one after it
+# (linear probing). Keys are never removed, so a slot never moves.
+# File locks: byte i for stripe i, byte `stripes` for adding a new key.
+
+SHM_MAGIC = b"STATESHM"
+SHM_HEADER = 64
+SLOT_SIZE = 64
+MAX_KEY_BYTES = 54
+VALUE = struct.Struct("<q")
+
+
+class _StripeLock:
+    """A thread lock (for this process) plus a file lock (for the others)."""
+
+    def __init__(self, fd: int, byte: int):
+        self.fd = fd
+        self.byte = byte
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        self.lock.acquire()
+        fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, self.byte)
+
+    def __exit__(self, *exc):
+        fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, self.byte)
+        self.lock.release()
+
+
+def default_shm_path(app: str) -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"{app}.state.shm")
+
+
+class SharedMemoryStateStore(StateStore):
+    def __init__(self, path: str, capacity: int = 4096, stripes: int = 64):
+        if fcntl is None:
+            raise RuntimeError("SharedMemoryStateStore needs fcntl (Linux/macOS)")
+        self.path = path
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._stripes = [_StripeLock(self._fd, i) for i in range(stripes)]
+        self._insert_lock = _StripeLock(self._fd, stripes)
+        with self._insert_lock:
+            # The first process to get here creates the table, the others use it
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, SHM_HEADER + capacity * SLOT_SIZE)
+                os.pwrite(self._fd, SHM_MAGIC + capacity.to_bytes(4, "little"), 0)
+            header = os.pread(self._fd, 12, 0)
+        if header[:8] != SHM_MAGIC:
+            raise ValueError(f"{self.path} is not a state file")
+        self.capacity = int.from_bytes(header[8:12], "little")
+        self._map = mmap.mmap(self._fd, SHM_HEADER + self.capacity * SLOT_SIZE)
+        self._slots: dict[str, tuple[int, _StripeLock]] = {}  # key -> (value offset, lock), found once per process
+
+    def _locate(self, key: str, create: bool) -> tuple[int | None, _StripeLock | None]:
+        """(offset of the key's value, the key's stripe lock), or (None, None) if it doesn't exist."""
+        found = self._slots.get(key)
+        if found is not None:
+            return found
+        encoded = key.encode()
+        if len(encoded) > MAX_KEY_BYTES:
+            raise ValueError(f"Key longer than {MAX_KEY_BYTES} bytes: {key!r}")
+        key_hash = _key_hash(key)
+        offset = self._probe(encoded, key_hash)
+        if offset is None:
+            if not create:
+                return None, None
+            with self._insert_lock:
+                offset = self._probe(encoded, key_hash, claim=True)
+        found = self._slots[key] = (offset, self._stripes[key_hash % len(self._stripes)])
+        return found
+
+    def _probe(self, encoded: bytes, key_hash: int, claim: bool = False, initial: int = 0) -> int | None:
+        data = self._map
+        index = key_hash % self.capacity
+        for _ in range(self.capacity):
+            slot = SHM_HEADER + index * SLOT_SIZE
+            if data[slot] == 0:
+                if not claim:
+                    return None
+                # Key and value first, the "used" flag last: nobody sees a half-written slot
+                data[slot + 1] = len(encoded)
+                data[slot + 2:slot + 2 + len(encoded)] = encoded
+                VALUE.pack_into(data, slot + 56, initial)
+                data[slot] = 1
+                return slot + 56
+            if data[slot + 1] == len(encoded) and data[slot + 2:slot + 2 + len(encoded)] == encoded:
+                return slot + 56
+            index = (index + 1) % self.capacity
+        if claim:
+            raise RuntimeError(f"State table {self.path} is full ({self.capacity} keys)")
+        return None
+
+    def get(self, key: str) -> int:
+        offset, lock = self._locate(key, create=False)
+        if offset is None:
+            return 0
+        with lock:
+            return VALUE.unpack_from(self._map, offset)[0]
+
+    def set(self, key: str, value: int) -> None:
+        offset, lock = self._locate(key, create=True)
+        with lock:
+            VALUE.pack_into(self._map, offset, value)
+
+    def setdefault(self, key: str, value: int) -> int:
+        offset, _ = self._locate(key, create=False)
+        if offset is None:
+            encoded = key.encode()
+            with self._insert_lock:
+                self._probe(encoded, _key_hash(key), claim=True, initial=value)
+        return self.get(key)
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        offset, lock = self._locate(key, create=True)
+        with lock:
+            value = VALUE.unpack_from(self._map, offset)[0] + amount
+            VALUE.pack_into(self._map, offset, value)
+            return value
+
+    def compare_and_set(self, key: str, expected: int, value: int) -> bool:
+        offset, lock = self._locate(key, create=True)
+        with lock:
+            if VALUE.unpack_from(self._map, offset)[0] != expected:
+                return False
+            VALUE.pack_into(self._map, offset, value)
+            return True
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+# ---------- Several processes, on disk ----------
+
+class SQLiteStateStore(StateStore):
+    """
+    WAL mode lets readers and a writer work at the same time; writers
+    take turns (busy_timeout makes them wait instead of failing).
+    synchronous=NORMAL: safe if the app crashes, but a power cut may
+    lose the last few updates.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 30.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()  # one connection per thread
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # isolation_level=None: every statement is its own transaction
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def get(self, key: str) -> int:
+        row = self._connection().execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def set(self, key: str, value: int) -> None:
+        self._connection().execute(
+            "INSERT INTO state (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def setdefault(self, key: str, value: int) -> int:
+        row = self._connection().execute(
+            "INSERT INTO state (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = value RETURNING value",
+            (key, value),
+        ).fetchone()
+        return row[0]
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        row = self._connection().execute(
+            "INSERT INTO state (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value RETURNING value",
+            (key, amount),
+        ).fetchone()
+        return row[0]
+
+    def compare_and_set(self, key: str, expected: int, value: int) -> bool:
+        connection = self._connection()
+        if expected == 0:  # a missing key counts as 0, so it may have to be inserted
+            cursor = connection.execute(
+                "INSERT INTO state (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value WHERE value = 0 RETURNING 1",
+                (key, value),
+            )
+            return cursor.fetchone() is not None
+        cursor = connection.execute("UPDATE state SET value = ? WHERE key = ? AND value = ?", (value, key, expected))
+        return cursor.rowcount == 1
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def open_state_store(app: str, backend: str | None = None, path: str | None = None) -> StateStore:
+    """
+    The backend named by STATE_BACKEND (memory, shm or sqlite), at
+    STATE_PATH or else a file named after `app`.
+    """
+    backend = backend or os.getenv("STATE_BACKEND", "memory")
+    path = path or os.getenv("STATE_PATH")
+    if backend == "memory":
+        return LocalStateStore()
+    if backend == "shm":
+        return SharedMemoryStateStore(path or default_shm_path(app))
+    if backend == "sqlite":
+        return SQLiteStateStore(path or f"{app}.state.db")
+    raise ValueError(f"Unknown STATE_BACKEND {backend!r} (use memory, shm or sqlite)")
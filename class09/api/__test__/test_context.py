@@ -0,0 +1,139 @@
+import sys
+import os
+import json
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from api.utils.context import MESSAGE_OVERHEAD_TOKENS, ContextCompactor, Tokenizer
+from api.utils.prompt import ClientMessage
+
+
+class EstimatingTokenizer(Tokenizer):
+    """4 characters per token, whether or not tiktoken is installed."""
+
+    def _load(self):
+        return None
+
+
+def compactor(**kwargs):
+    return ContextCompactor(tokenizer=EstimatingTokenizer(), **kwargs)
+
+
+def user(text):
+    return ClientMessage(role="user", parts=[{"type": "text", "text": text}])
+
+
+def assistant(text, tool_output=None, call_id="call_1"):
+    parts = [{"type": "step-start"}]
+    if tool_output is not None:
+        parts.append({
+            "type": "tool-get_current_weather", "toolCallId": call_id, "state": "output-available",
+            "input": {"latitude": 1, "longitude": 2}, "output": tool_output,
+        })
+        parts.append({"type": "step-start"})
+    parts.append({"type": "text", "text": text})
+    return ClientMessage(role="assistant", parts=parts)
+
+
+SYSTEM = ClientMessage(role="system", content="You are a helpful assistant.")
+BIG_OUTPUT = {"hourly": "x" * 40_000}  # ~10k tokens
+
+
+def tool_contents(messages):
+    return [message["content"] for message in messages if message["role"] == "tool"]
+
+
+# ---- Tokens ----
+
+def test_estimate_is_four_characters_per_token():
+    tokenizer = EstimatingTokenizer()
+    assert tokenizer.count("") == 0
+    assert tokenizer.count("abcd") == 1
+    assert tokenizer.count("abcde") == 2
+    assert tokenizer.truncate("abcdefghij", 2) == "abcdefgh"
+    assert not tokenizer.exact
+
+
+def test_message_tokens_include_overhead_and_tool_calls():
+    c = compactor()
+    assert c.message_tokens({"role": "user", "content": "abcd"}) == MESSAGE_OVERHEAD_TOKENS + 1
+    call = {"function": {"name": "abcd", "arguments": "{}"}}
+    assert c.message_tokens({"role": "assistant", "content": None, "tool_calls": [call]}) == MESSAGE_OVERHEAD_TOKENS + 2
+
+
+# ---- Compaction ----
+
+def test_short_chat_is_sent_unchanged():
+    messages = [SYSTEM, user("Hi"), assistant("Hello!")]
+    openai_messages, report = compactor().compact(messages)
+    assert openai_messages == [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": [{"type": "text", "text": "Hi"}]},
+        {"role": "assistant", "content": "Hello!"},
+    ]
+    assert report["tokens_saved"] == 0 and report["tokens_before"] == report["tokens_after"]
+
+
+def test_old_tool_outputs_are_shortened_recent_ones_are_not():
+    messages = [
+        user("Weather in Berlin?"), assistant("Cold.", BIG_OUTPUT, "call_old"),
+        user("And Paris?"), assistant("Mild.", BIG_OUTPUT, "call_mid"),
+        user("And Rome?"), assistant("Warm.", BIG_OUTPUT, "call_new"),
+    ]
+    openai_messages, report = compactor(budget=10**6, tool_output_max_tokens=100).compact(messages)
+    old, mid, new = tool_contents(openai_messages)
+    assert old.startswith(json.dumps(BIG_OUTPUT)[:400]) and "[tool output truncated," in old
+    assert mid == new == json.dumps(BIG_OUTPUT)  # the last two turns stay whole
+    assert report["truncated_tool_outputs"] == 1
+    assert report["tokens_saved"] > 9_000
+    assert report["dropped_messages"] == 0
+
+
+def test_budget_drops_the_oldest_messages_but_not_system_or_recent_turns():
+    messages = [SYSTEM]
+    for turn in range(10):
+        messages += [user(f"Question {turn} " + "q" * 400), assistant(f"Answer {turn} " + "a" * 400)]
+    openai_messages, report = compactor(budget=600).compact(messages)
+
+    assert openai_messages[0]["role"] == "system"
+    texts = [m["content"][0]["text"] if m["role"] == "user" else m["content"] for m in openai_messages[1:]]
+    assert texts[-4:] == [m.parts[-1].text for m in messages[-4:]]  # the last two turns
+    assert not any(text.startswith("Question 0 ") for text in texts)
+    assert report["tokens_after"] <= 600
+    assert report["dropped_messages"] == len(messages) - len(openai_messages)
+
+
+def test_an_assistant_step_is_dropped_with_its_tool_results():
+    messages = [user("Weather?"), assistant("Cold.", {"t": 1}), user("Thanks " + "x" * 400), user("More " + "x" * 400)]
+    openai_messages, _ = compactor(budget=215).compact(messages)
+    assert not any(m["role"] == "tool" or m.get("tool_calls") for m in openai_messages)
+    assert [m["role"] for m in openai_messages] == ["user", "user"]
+
+
+def test_recent_turns_are_kept_even_over_budget():
+    messages = [user("x" * 4000), assistant("y" * 4000)]
+    openai_messages, report = compactor(budget=10).compact(messages)
+    assert len(openai_messages) == 2
+    assert report["dropped_messages"] == 0
+
+
+# ---- Prefix cache ----
+
+def test_next_turn_reuses_the_converted_history():
+    c = compactor()
+    messages = [SYSTEM, user("Hi"), assistant("Hello!")]
+    assert c.compact(messages)[1]["cached_messages"] == 0
+    assert c.compact(messages + [user("How are you?")])[1]["cached_messages"] == 3
+
+
+def test_an_edited_message_invalidates_everything_after_it():
+    c = compactor()
+    c.compact([SYSTEM, user("Hi"), assistant("Hello!")])
+    openai_messages, report = c.compact([SYSTEM, user("Hey"), assistant("Hello!")])
+    assert report["cached_messages"] == 1  # only the system message
+    assert openai_messages[1]["content"][0]["text"] == "Hey"
+
+
+def test_cache_is_bounded():
+    c = compactor(max_cached=3)
+    c.compact([user(f"Message {i}") for i in range(10)])
+    assert len(c._cache) == 3
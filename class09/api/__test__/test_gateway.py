@@ -0,0 +1,117 @@
+import sys
+import os
+import asyncio
+import base64
+import json
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from api import gateway
+from api.gateway import Gateway, TokenCache, token_expiry
+
+NOW = 1_000_000.0
+
+
+def jwt(exp=None):
+    claims = {"sub": "test"} if exp is None else {"sub": "test", "exp": exp}
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+    return f"header.{payload}.signature"
+
+
+class Source:
+    """A token source that hands out the given tokens in turn and counts its calls."""
+
+    def __init__(self, *tokens, delay=0.0):
+        self.tokens = list(tokens)
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        time.sleep(self.delay)
+        self.calls += 1
+        return self.tokens[min(self.calls, len(self.tokens)) - 1]
+
+
+def at(monkeypatch, now):
+    monkeypatch.setattr(gateway.time, "time", lambda: now)
+
+
+# ---- Token expiry ----
+
+def test_expiry_is_read_from_the_exp_claim():
+    assert token_expiry(jwt(NOW + 3600)) == NOW + 3600
+    assert token_expiry(jwt()) is None
+    assert token_expiry("not-a-jwt") is None
+    assert token_expiry("a.!!!.c") is None
+
+
+# ---- Caching ----
+
+def test_token_is_kept_until_shortly_before_exp(monkeypatch):
+    source = Source(jwt(NOW + 3600), jwt(NOW + 7200))
+    cache = TokenCache(source, refresh_before=60)
+
+    at(monkeypatch, NOW)
+    first = asyncio.run(cache.get())
+    at(monkeypatch, NOW + 3600 - 61)
+    assert asyncio.run(cache.get()) == first
+    assert source.calls == 1
+
+    # Refreshed before the token actually expires
+    at(monkeypatch, NOW + 3600 - 60)
+    assert asyncio.run(cache.get()) == jwt(NOW + 7200)
+    assert source.calls == 2
+
+
+def test_token_without_exp_is_kept_for_default_ttl(monkeypatch):
+    source = Source("opaque-1", "opaque-2")
+    cache = TokenCache(source, default_ttl=30)
+
+    at(monkeypatch, NOW)
+    assert asyncio.run(cache.get()) == "opaque-1"
+    at(monkeypatch, NOW + 29)
+    assert asyncio.run(cache.get()) == "opaque-1"
+    at(monkeypatch, NOW + 30)
+    assert asyncio.run(cache.get()) == "opaque-2"
+
+
+def test_clear_fetches_a_new_token():
+    source = Source(jwt(time.time() + 3600))
+    cache = TokenCache(source)
+    asyncio.run(cache.get())
+    cache.clear()
+    asyncio.run(cache.get())
+    assert source.calls == 2
+
+
+def test_many_requests_at_once_fetch_the_token_once():
+    source = Source(jwt(time.time() + 3600), delay=0.1)
+    cache = TokenCache(source)
+
+    async def many():
+        return await asyncio.gather(*(cache.get() for _ in range(50)))
+
+    tokens = asyncio.run(many())
+    assert set(tokens) == {source.tokens[0]}
+    assert source.calls == cache.fetches == 1
+
+
+# ---- Gateway ----
+
+def test_client_is_reused_until_the_token_changes():
+    source = Source(jwt(time.time() + 3600), jwt(time.time() + 7200))
+
+    async def run():
+        gw = Gateway(token_source=source)
+        first = await gw.client()
+        again = await gw.client()
+        gw.tokens.clear()
+        refreshed = await gw.client()
+        await gw.aclose()
+        return first, again, refreshed
+
+    first, again, refreshed = asyncio.run(run())
+    assert first is again
+    assert first.api_key == source.tokens[0]
+    assert refreshed.api_key == source.tokens[1]
+    assert refreshed._client is first._client  # one connection pool for every token
@@ -0,0 +1,127 @@
+import sys
+import os
+import logging
+import time
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, exc, text
+import query_profiler
+from query_profiler import QueryProfiler, fingerprint, normalize
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE user (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO user (id, name) VALUES (1, 'a'), (2, 'b'), (3, 'c')"))
+    yield engine
+    engine.dispose()
+
+
+def attached(engine, **kwargs):
+    profiler = QueryProfiler(**kwargs)
+    profiler.attach(engine)
+    return profiler
+
+
+# ---- Normalizing ----
+
+def test_values_are_replaced():
+    assert normalize("SELECT * FROM user WHERE id = 5 AND name = 'x''y'") == "SELECT * FROM user WHERE id = ? AND name = ?"
+    assert normalize("SELECT *  FROM user\n WHERE id = :id_1") == "SELECT * FROM user WHERE id = ?"
+    assert normalize("SELECT * FROM user WHERE id IN (1, 2, 3)") == "SELECT * FROM user WHERE id IN (...)"
+
+
+def test_same_query_with_other_values_has_the_same_fingerprint():
+    assert fingerprint(normalize("SELECT 1 FROM t WHERE x = 1")) == fingerprint(normalize("SELECT 1 FROM t WHERE x = 42"))
+
+
+# ---- Recording ----
+
+def test_queries_are_grouped_by_fingerprint(engine):
+    profiler = attached(engine)
+    with engine.connect() as conn:
+        for user_id in (1, 2, 3):
+            conn.execute(text(f"SELECT name FROM user WHERE id = {user_id}")).all()
+        conn.execute(text("SELECT count(*) FROM user")).all()
+
+    top = profiler.top(order="count")
+    assert [(q["statement"], q["count"]) for q in top] == [
+        ("SELECT name FROM user WHERE id = ?", 3),
+        ("SELECT count(*) FROM user", 1),
+    ]
+    profiler.reset()
+    assert profiler.top() == []
+
+
+def test_sample_rate_zero_records_nothing(engine):
+    profiler = attached(engine, sample_rate=0.0)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1")).all()
+    assert profiler.top() == []
+
+
+def test_estimated_count_is_scaled_by_the_sample_rate():
+    profiler = QueryProfiler(sample_rate=0.25)
+    profiler.record("SELECT 1", 0.001)
+    assert profiler.top()[0]["estimated_count"] == 4
+
+
+def test_unusual_statements_share_one_bucket():
+    profiler = QueryProfiler(max_statements=2)
+    for table in ("a", "b", "c", "d"):
+        profiler.record(f"SELECT * FROM {table}", 0.001)
+    assert sorted(q["statement"] for q in profiler.top()) == ["(other statements)", "SELECT * FROM a", "SELECT * FROM b"]
+
+
+def test_detach_stops_recording(engine):
+    profiler = attached(engine)
+    profiler.detach(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1")).all()
+    assert profiler.top() == []
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        QueryProfiler(sample_rate=2)
+    with pytest.raises(ValueError):
+        QueryProfiler().top(order="fastest")
+
+
+# ---- Failed queries ----
+
+def test_failed_query_does_not_time_the_next_one(engine, monkeypatch, caplog):
+    profiler = attached(engine, sample_rate=0.5, slow_ms=500)
+    draws = iter([0.0, 0.99])  # first query sampled, second one not
+    monkeypatch.setattr(query_profiler.random, "random", lambda: next(draws))
+
+    with engine.connect() as conn:
+        with pytest.raises(exc.OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        time.sleep(0.6)
+        with caplog.at_level(logging.WARNING, logger="sql.slow"):
+            conn.execute(text("SELECT 1")).all()
+        assert "query_start" not in conn.info
+
+    assert profiler.top() == []
+    assert caplog.records == []
+
+
+def test_failed_query_start_is_dropped_even_when_everything_is_sampled(engine):
+    profiler = attached(engine)
+    with engine.connect() as conn:
+        with pytest.raises(exc.OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        assert "query_start" not in conn.info
+    assert profiler.top() == []
+
+
+def test_slow_queries_are_logged(engine, caplog):
+    attached(engine, slow_ms=0)
+    with caplog.at_level(logging.WARNING, logger="sql.slow"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT name FROM user WHERE id = 2")).all()
+    assert "SELECT name FROM user WHERE id = ?" in caplog.text
@@ -0,0 +1,178 @@
+import sys
+import os
+import asyncio
+import json
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import httpx
+from openai import AsyncOpenAI
+
+from api.utils.stream import coalesce, format_sse, stream_parts, stream_text
+
+
+def delta(text):
+    return {"type": "text-delta", "id": "text-1", "delta": text}
+
+
+async def collect(writes):
+    return [text async for text in writes]
+
+
+def chunk(delta, finish_reason=None):
+    return format_sse({
+        "id": "chatcmpl-test",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "test",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }).encode()
+
+
+def fake_model(chunks):
+    """An OpenAI client whose chat stream sends `chunks`, then [DONE]."""
+    async def events():
+        for body in chunks:
+            yield body
+        yield b"data: [DONE]\n\n"
+
+    async def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=events())
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncOpenAI(api_key="test", base_url="http://fake/v1", http_client=http_client)
+
+
+def events(writes):
+    return [json.loads(event[6:]) for text in writes for event in text.split("\n\n") if event.startswith("data: {")]
+
+
+# ---- Coalescing ----
+
+def test_deltas_within_the_window_are_written_together():
+    async def parts():
+        yield {"type": "text-start", "id": "text-1"}
+        yield delta("a")
+        yield delta("b")
+        yield delta("c")
+        await asyncio.sleep(0.2)  # the window runs out while the next part is awaited
+        yield {"type": "text-end", "id": "text-1"}
+
+    writes = asyncio.run(collect(coalesce(parts(), window=0.05)))
+    assert writes == [
+        format_sse({"type": "text-start", "id": "text-1"}),
+        format_sse(delta("a")),
+        format_sse(delta("bc")),
+        format_sse({"type": "text-end", "id": "text-1"}),
+    ]
+
+
+def test_deltas_are_written_once_max_bytes_is_reached():
+    async def parts():
+        for text in ("a", "bb", "cc", "d"):
+            yield delta(text)
+
+    writes = asyncio.run(collect(coalesce(parts(), window=10, max_bytes=4)))
+    assert writes == [format_sse(delta("a")), format_sse(delta("bbcc")), format_sse(delta("d"))]
+
+
+def test_window_zero_writes_every_part():
+    async def parts():
+        for text in ("a", "b", "c"):
+            yield delta(text)
+
+    writes = asyncio.run(collect(coalesce(parts(), window=0)))
+    assert writes == [format_sse(delta(text)) for text in ("a", "b", "c")]
+
+
+def test_first_delta_is_written_right_away():
+    first_written = None
+
+    async def parts():
+        yield delta("a")
+        # Only goes on once the browser has the first token
+        await asyncio.wait_for(first_written.wait(), timeout=2)
+        yield delta("b")
+
+    async def run():
+        nonlocal first_written
+        first_written = asyncio.Event()
+        writes = []
+        async for text in coalesce(parts(), window=10):
+            writes.append(text)
+            first_written.set()
+        return writes
+
+    assert asyncio.run(run()) == [format_sse(delta("a")), format_sse(delta("b"))]
+
+
+def test_closing_cancels_the_part_being_read():
+    cancelled = False
+
+    async def parts():
+        nonlocal cancelled
+        yield delta("a")
+        yield delta("b")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        yield delta("c")
+
+    async def run():
+        writes = coalesce(parts(), window=0.01)
+        assert await anext(writes) == format_sse(delta("a"))
+        assert await anext(writes) == format_sse(delta("b"))  # written by the window, "c" still pending
+        await writes.aclose()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert cancelled
+
+
+# ---- Answers from the model ----
+
+def test_text_answer_ends_with_finish_and_done():
+    client = fake_model([chunk({"content": "Hel"}), chunk({"content": "lo"}), chunk({}, "stop")])
+    writes = asyncio.run(collect(stream_text(client, [], [], {})))
+
+    parts = events(writes)
+    assert [part["type"] for part in parts][:2] == ["start", "text-start"]
+    assert "".join(part["delta"] for part in parts if part["type"] == "text-delta") == "Hello"
+    assert parts[-1] == {"type": "finish", "messageMetadata": {"finishReason": "stop"}}
+    assert writes[-1] == "data: [DONE]\n\n"
+
+
+def test_tool_calls_run_at_the_same_time():
+    calls = [
+        chunk({"tool_calls": [{"index": i, "id": f"call_{i}", "type": "function", "function": {"name": "slow_lookup", "arguments": json.dumps({"n": i})}}]})
+        for i in range(3)
+    ]
+    client = fake_model(calls + [chunk({}, "tool_calls")])
+
+    async def slow_lookup(n):
+        await asyncio.sleep(0.3)
+        return {"n": n}
+
+    start = time.perf_counter()
+    parts = asyncio.run(collect(stream_parts(client, [], [], {"slow_lookup": slow_lookup})))
+    elapsed = time.perf_counter() - start
+
+    outputs = [part for part in parts if part["type"] == "tool-output-available"]
+    assert sorted(part["output"]["n"] for part in outputs) == [0, 1, 2]
+    assert elapsed < 0.6  # one after the other would take 0.9 s
+    assert parts[-1]["messageMetadata"]["finishReason"] == "tool-calls"
+
+
+def test_unknown_tool_and_bad_input_are_reported():
+    calls = [
+        chunk({"tool_calls": [{"index": 0, "id": "call_0", "type": "function", "function": {"name": "missing", "arguments": "{}"}}]}),
+        chunk({"tool_calls": [{"index": 1, "id": "call_1", "type": "function", "function": {"name": "slow_lookup", "arguments": "{not json"}}]}),
+    ]
+    client = fake_model(calls + [chunk({}, "tool_calls")])
+    parts = asyncio.run(collect(stream_parts(client, [], [], {})))
+
+    errors = {part["toolCallId"]: part["errorText"] for part in parts if part["type"] == "tool-output-error"}
+    assert errors["call_0"] == "Unknown tool 'missing'"
+    assert errors["call_1"].startswith("Invalid tool input")
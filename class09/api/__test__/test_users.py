@@ -0,0 +1,97 @@
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# Use a throwaway SQLite database instead of the one in .env.local
+os.environ["POSTGRES_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_users.db"
+
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+import main
+from main import User, app, engine
+
+USERS = 7
+
+client = TestClient(app)
+
+
+def setup_module():
+    # One event loop for the whole module: the async engine's pooled connections belong to it
+    client.__enter__()
+
+
+def teardown_module():
+    client.__exit__(None, None, None)
+
+
+def setup_function():
+    """Start every test with USERS users"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"name": f"user{i}", "email": f"user{i}@example.com"} for i in range(USERS)
+        ])
+
+
+def expected_users():
+    return [{"id": i + 1, "name": f"user{i}", "email": f"user{i}@example.com"} for i in range(USERS)]
+
+
+def all_pages(**params):
+    users, cursors, cursor = [], [], None
+    while True:
+        response = client.get("/users/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        users += response.json()
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return users, cursors
+        cursors.append(cursor)
+
+
+# ---- Pages ----
+
+def test_pages_cover_every_user_once():
+    users, cursors = all_pages(limit=3)
+    assert users == expected_users()
+    assert cursors == ["3", "6"]
+
+
+def test_raw_rows_match_user_objects():
+    assert all_pages(limit=3, raw="true") == all_pages(limit=3)
+
+
+def test_cursor_returns_the_users_after_it():
+    response = client.get("/users/", params={"cursor": 5, "raw": "true"})
+    assert response.json() == expected_users()[5:]
+    assert "x-next-cursor" not in response.headers
+
+
+def test_last_full_page_has_no_next_cursor():
+    response = client.get("/users/", params={"limit": USERS})
+    assert len(response.json()) == USERS
+    assert "x-next-cursor" not in response.headers
+
+
+def test_limit_out_of_range_returns_422():
+    assert client.get("/users/", params={"limit": 0}).status_code == 422
+    assert client.get("/users/", params={"limit": 1001}).status_code == 422
+
+
+# ---- Stream ----
+
+def test_stream_sends_every_user_as_one_line(monkeypatch):
+    monkeypatch.setattr(main, "STREAM_BATCH_SIZE", 2)  # several batches
+    response = client.get("/users/stream")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == expected_users()
+
+
+def test_stream_of_no_users_is_empty():
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    assert client.get("/users/stream").text == ""
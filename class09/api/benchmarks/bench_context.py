@@ -0,0 +1,110 @@
+"""
+Benchmark: a long chat, turn by turn — tokens sent to the model and the
+time spent preparing the messages.
+
+Every 3rd turn the assistant calls a tool that returns ~6 KB of JSON.
+Each turn the whole history is sent again (like useChat does) and is
+prepared three ways:
+  - "before":   convert_to_openai_messages, everything sent in full
+  - "cold":     a new ContextCompactor every turn (nothing cached)
+  - "compacted": one ContextCompactor for the whole chat (prefix cache warm)
+
+Run from the api folder:
+    uv run python benchmarks/bench_context.py
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from api.utils.context import ContextCompactor
+from api.utils.prompt import ClientMessage, convert_to_openai_messages
+
+TURNS = 60
+BUDGET = 16_000
+WORDS = "the quick brown fox jumps over the lazy dog while the chat keeps going".split()
+
+
+def text(words: int, seed: int) -> str:
+    return " ".join(WORDS[(seed + i) % len(WORDS)] for i in range(words))
+
+
+def forecast(seed: int) -> dict:
+    hours = [f"2025-01-{1 + (seed % 28):02d}T{h:02d}:00" for h in range(24)]
+    return {
+        "latitude": 52.52,
+        "longitude": 13.41,
+        "hourly": {
+            "time": hours * 10,
+            "temperature_2m": [round((seed * 7 + i) % 300 / 10, 1) for i in range(240)],
+        },
+    }
+
+
+def conversation() -> list[dict]:
+    messages = [{"role": "system", "content": "You are a helpful assistant."}]
+    for turn in range(TURNS):
+        messages.append({"role": "user", "parts": [{"type": "text", "text": text(40, turn)}]})
+        parts = [{"type": "step-start"}]
+        if turn % 3 == 0:
+            parts.append({
+                "type": "tool-get_current_weather",
+                "toolCallId": f"call_{turn}",
+                "state": "output-available",
+                "input": {"latitude": 52.52, "longitude": 13.41},
+                "output": forecast(turn),
+            })
+            parts.append({"type": "step-start"})
+        parts.append({"type": "text", "text": text(150, turn + 1)})
+        messages.append({"role": "assistant", "parts": parts})
+    return messages
+
+
+def main():
+    history = [ClientMessage(**message) for message in conversation()]
+    compactor = ContextCompactor(budget=BUDGET)
+    print(f"{TURNS} turns, budget {BUDGET} tokens, tokenizer: {'tiktoken' if compactor.tokenizer.exact else 'estimate'}")
+    print(f"{'turn':>5} {'tokens before':>14} {'after':>7} {'saved':>7} {'before':>9} {'cold':>9} {'compacted':>10}")
+
+    totals = {"before": 0.0, "cold": 0.0, "compacted": 0.0, "tokens_before": 0, "tokens_after": 0}
+    for turn in range(1, TURNS + 1):
+        messages = history[:1 + 2 * turn - 1]  # up to this turn's user message
+
+        start = time.perf_counter()
+        json.dumps(convert_to_openai_messages(messages))  # the request body is built either way
+        before = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ContextCompactor(budget=BUDGET, tokenizer=compactor.tokenizer).compact(messages)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compacted, report = compactor.compact(messages)
+        json.dumps(compacted)
+        warm = time.perf_counter() - start
+
+        totals["before"] += before
+        totals["cold"] += cold
+        totals["compacted"] += warm
+        totals["tokens_before"] += report["tokens_before"]
+        totals["tokens_after"] += report["tokens_after"]
+        if turn % 10 == 0 or turn == 1:
+            print(
+                f"{turn:>5} {report['tokens_before']:>14} {report['tokens_after']:>7} {report['tokens_saved']:>7}"
+                f" {before * 1000:>7.2f}ms {cold * 1000:>7.2f}ms {warm * 1000:>8.2f}ms"
+            )
+
+    saved = totals["tokens_before"] - totals["tokens_after"]
+    print(
+        f"\nwhole chat: {totals['tokens_before']} -> {totals['tokens_after']} tokens sent"
+        f" ({saved / totals['tokens_before']:.0%} saved);"
+        f" preparation {totals['before'] * 1000:.0f} ms before, {totals['cold'] * 1000:.0f} ms cold,"
+        f" {totals['compacted'] * 1000:.0f} ms compacted"
+    )
+
+
+if __name__ == "__main__":
+    main()
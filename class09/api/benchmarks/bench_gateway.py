@@ -0,0 +1,199 @@
+"""
+Benchmark: /api/chat streaming through a fake AI Gateway — time to first
+token (TTFT) and how many chats one worker can stream at the same time.
+
+Three processes:
+  - a fake gateway that streams OpenAI-style chat chunks
+    (first token after FIRST_TOKEN_MS, then one token every TOKEN_MS);
+  - the app under test (one uvicorn worker) with two routes:
+      "before": a new sync OpenAI client and a fresh token per request,
+                streamed from a sync generator (one thread-pool slot per chat);
+      "after":  the shared Gateway client and async stream_text;
+  - this script, which opens N chats at once and times them.
+
+A new connection to the real gateway costs a TLS handshake, and fetching
+the OIDC token can cost a round trip; both are simulated here
+(HANDSHAKE_MS per new connection, TOKEN_FETCH_MS per token fetch).
+
+Run from the api folder:
+    uv run python benchmarks/bench_gateway.py
+"""
+
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from openai import OpenAI
+
+from api.gateway import Gateway
+from api.utils.stream import format_sse, patch_response_with_headers, stream_text
+
+FIRST_TOKEN_MS = 100
+TOKEN_MS = 20
+TOKENS = 20
+HANDSHAKE_MS = 50
+TOKEN_FETCH_MS = 20
+CONCURRENCY = [1, 10, 50, 100, 200]
+GATEWAY_PORT = 8101
+APP_PORT = 8102
+
+MESSAGES = [{"role": "user", "content": "Tell me a story"}]
+
+
+# ---------- Fake gateway ----------
+
+fake_gateway = FastAPI()
+seen_connections: set = set()
+
+
+def chunk(delta: dict, finish_reason=None) -> str:
+    return format_sse({
+        "id": "chatcmpl-bench",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "bench",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    })
+
+
+@fake_gateway.post("/v1/chat/completions")
+async def fake_completions(request: Request):
+    await request.body()
+    connection = request.scope["client"]
+    new_connection = connection not in seen_connections
+    seen_connections.add(connection)
+
+    async def events():
+        await asyncio.sleep((FIRST_TOKEN_MS + (HANDSHAKE_MS if new_connection else 0)) / 1000)
+        yield chunk({"role": "assistant", "content": ""})
+        for i in range(TOKENS):
+            if i:
+                await asyncio.sleep(TOKEN_MS / 1000)
+            yield chunk({"content": f"token{i} "})
+        yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# ---------- App under test ----------
+
+GATEWAY_URL = f"http://127.0.0.1:{GATEWAY_PORT}/v1"
+
+
+def get_token() -> str:
+    time.sleep(TOKEN_FETCH_MS / 1000)
+    return "header.eyJleHAiOjQxMDI0NDQ4MDB9.signature"  # exp in the year 2100
+
+
+def old_stream_text(client: OpenAI, messages: list[dict]):
+    """The original sync generator: every next() waits for the gateway in a worker thread."""
+    yield format_sse({"type": "start", "messageId": "msg-bench"})
+    yield format_sse({"type": "text-start", "id": "text-1"})
+    for part in client.chat.completions.create(model="bench", messages=messages, stream=True):
+        for choice in part.choices:
+            if choice.delta.content:
+                yield format_sse({"type": "text-delta", "id": "text-1", "delta": choice.delta.content})
+    yield format_sse({"type": "text-end", "id": "text-1"})
+    yield format_sse({"type": "finish"})
+    yield "data: [DONE]\n\n"
+
+
+app = FastAPI()
+gateway = Gateway(token_source=get_token, base_url=GATEWAY_URL, max_connections=1000, max_keepalive_connections=1000)
+
+
+@app.post("/before")
+async def chat_before():
+    client = OpenAI(api_key=get_token(), base_url=GATEWAY_URL)
+    response = StreamingResponse(old_stream_text(client, MESSAGES), media_type="text/event-stream")
+    return patch_response_with_headers(response)
+
+
+@app.post("/after")
+async def chat_after():
+    client = await gateway.client()
+    response = StreamingResponse(stream_text(client, MESSAGES, [], {}, model="bench"), media_type="text/event-stream")
+    return patch_response_with_headers(response)
+
+
+# ---------- Load ----------
+
+def serve(asgi_app, port: int) -> None:
+    uvicorn.run(asgi_app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def wait_for_port(port: int) -> None:
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def one_chat(client: httpx.AsyncClient, path: str) -> tuple[float, float]:
+    start = time.perf_counter()
+    first_token = None
+    async with client.stream("POST", path, json={}) as response:
+        async for line in response.aiter_lines():
+            if first_token is None and '"text-delta"' in line:
+                first_token = time.perf_counter() - start
+    return first_token, time.perf_counter() - start
+
+
+async def run(path: str, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", limits=limits, timeout=300) as client:
+        await one_chat(client, path)  # warm up
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one_chat(client, path) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    ttft = sorted(r[0] * 1000 for r in results)
+    return {
+        "ttft_p50": statistics.median(ttft),
+        "ttft_p99": ttft[min(len(ttft) - 1, int(len(ttft) * 0.99))],
+        "seconds": elapsed,
+        "streams_per_sec": concurrency / elapsed,
+    }
+
+
+def main():
+    context = multiprocessing.get_context("fork")
+    servers = [
+        context.Process(target=serve, args=(fake_gateway, GATEWAY_PORT), daemon=True),
+        context.Process(target=serve, args=(app, APP_PORT), daemon=True),
+    ]
+    for server in servers:
+        server.start()
+    try:
+        wait_for_port(GATEWAY_PORT)
+        wait_for_port(APP_PORT)
+        ideal = FIRST_TOKEN_MS + (TOKENS - 1) * TOKEN_MS
+        print(f"one chat: first token after {FIRST_TOKEN_MS} ms, complete after ~{ideal} ms")
+        print(f"{'route':>8} {'streams':>8} {'TTFT p50':>10} {'TTFT p99':>10} {'total':>9} {'streams/s':>10}")
+        for concurrency in CONCURRENCY:
+            for path in ("/before", "/after"):
+                result = asyncio.run(run(path, concurrency))
+                print(
+                    f"{path[1:]:>8} {concurrency:>8} {result['ttft_p50']:>8.0f}ms {result['ttft_p99']:>8.0f}ms"
+                    f" {result['seconds']:>8.2f}s {result['streams_per_sec']:>10.1f}"
+                )
+    finally:
+        for server in servers:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
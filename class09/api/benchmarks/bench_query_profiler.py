@@ -0,0 +1,78 @@
+"""
+Benchmark: cost per query of echo=True vs. the query profiler.
+
+Runs small primary-key SELECTs against a temporary SQLite database (the
+fastest queries are where logging overhead shows the most). echo output
+goes to a file, not the terminal, so only the formatting cost is counted.
+
+Run from the api folder:
+    uv run python benchmarks/bench_query_profiler.py
+"""
+
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, text
+from sqlmodel import Session, SQLModel, select
+
+from query_profiler import QueryProfiler
+
+QUERIES = 20_000
+USERS = 1_000
+
+folder = tempfile.mkdtemp()
+os.environ.setdefault("POSTGRES_URL", f"sqlite:///{folder}/unused.db")  # main.py requires it
+from main import User  # noqa: E402
+
+
+def run(engine) -> float:
+    with Session(engine) as session:
+        start = time.perf_counter()
+        for i in range(QUERIES):
+            session.exec(select(User).where(User.id == i % USERS + 1)).first()
+        return (time.perf_counter() - start) / QUERIES * 1e6
+
+
+def main():
+    url = f"sqlite:///{folder}/bench.db"
+    setup = create_engine(url)
+    SQLModel.metadata.create_all(setup)
+    with setup.begin() as conn:
+        conn.execute(text("DELETE FROM user"))
+        conn.execute(User.__table__.insert(), [{"name": f"user{i}", "email": f"user{i}@example.com"} for i in range(USERS)])
+
+    print(f"{'setup':<28} {'us/query':>9} {'overhead':>9}")
+    baseline = None
+    for label, echo, sample_rate in [
+        ("no logging", False, None),
+        ("echo=True", True, None),
+        ("profiler, every query", False, 1.0),
+        ("profiler, 10% sampled", False, 0.1),
+    ]:
+        engine = create_engine(url, echo=echo)
+        profiler = None
+        if sample_rate is not None:
+            profiler = QueryProfiler(sample_rate=sample_rate)
+            profiler.attach(engine)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if echo:
+                # echo's handler is bound to sys.stdout when the engine logs first
+                for handler in logging.getLogger("sqlalchemy.engine.Engine").handlers:
+                    handler.setStream(devnull)
+            micros = min(run(engine) for _ in range(3))  # best of 3, the machine is noisy
+        baseline = baseline or micros
+        print(f"{label:<28} {micros:>9.1f} {micros - baseline:>+8.1f}")
+        if profiler:
+            top = profiler.top(1)[0]
+            print(f"{'':<28} top: {top['estimated_count']} x {top['statement'][:60]}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark: stream_text against a fake model stream — writes per answer,
+browser-side parse time, time to first token, and tool calls.
+
+The fake model is an httpx MockTransport that streams OpenAI-style chat
+chunks with a given delay between tokens, so no network is involved.
+
+  - "each part": window=0, every part is written on its own (as before)
+  - "coalesced": the default 20 ms window
+  - tools: the model asks for 3 tools that take 200 ms each; run one
+    after the other they would need 600 ms
+
+Run from the api folder:
+    uv run python benchmarks/bench_stream.py
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import httpx
+from openai import AsyncOpenAI
+
+from api.utils.stream import COALESCE_WINDOW, format_sse, stream_text
+
+TOKENS = 500
+FIRST_TOKEN_MS = 100
+TOOL_SECONDS = 0.2
+TOOL_CALLS = 3
+RUNS = 5
+
+MESSAGES = [{"role": "user", "content": "Tell me a story"}]
+TOOL_DEFINITIONS = [{"type": "function", "function": {"name": "slow_lookup", "parameters": {"type": "object", "properties": {}}}}]
+
+
+def chunk(delta: dict, finish_reason=None) -> bytes:
+    return format_sse({
+        "id": "chatcmpl-bench",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "bench",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }).encode()
+
+
+def fake_model(token_ms: float, tools: bool = False) -> AsyncOpenAI:
+    async def events():
+        await asyncio.sleep(FIRST_TOKEN_MS / 1000)
+        if tools:
+            for i in range(TOOL_CALLS):
+                call = {"index": i, "id": f"call_{i}", "type": "function", "function": {"name": "slow_lookup", "arguments": "{}"}}
+                yield chunk({"tool_calls": [call]})
+            yield chunk({}, "tool_calls")
+        else:
+            for i in range(TOKENS):
+                if i and token_ms:
+                    await asyncio.sleep(token_ms / 1000)
+                yield chunk({"content": f"tok{i} "})
+            yield chunk({}, "stop")
+        yield b"data: [DONE]\n\n"
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=events())
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncOpenAI(api_key="bench", base_url="http://fake/v1", http_client=http_client)
+
+
+def slow_lookup() -> dict:
+    time.sleep(TOOL_SECONDS)
+    return {"ok": True}
+
+
+def parse_events(text: str) -> int:
+    """What the browser does with every chunk: split into events, parse the JSON."""
+    count = 0
+    for event in text.split("\n\n"):
+        if event.startswith("data: {"):
+            json.loads(event[6:])
+            count += 1
+    return count
+
+
+async def one_answer(token_ms: float, window: float, tools: bool = False) -> dict:
+    client = fake_model(token_ms, tools)
+    start = time.perf_counter()
+    first_token = tools_done = None
+    writes = events = 0
+    parse_seconds = 0.0
+    available_tools = {"slow_lookup": slow_lookup} if tools else {}
+    async for text in stream_text(client, MESSAGES, TOOL_DEFINITIONS if tools else [], available_tools, window=window):
+        writes += 1
+        if first_token is None and '"text-delta"' in text:
+            first_token = time.perf_counter() - start
+        if '"tool-output-available"' in text:
+            tools_done = time.perf_counter() - start
+        parse_start = time.perf_counter()
+        events += parse_events(text)
+        parse_seconds += time.perf_counter() - parse_start
+    await client.close()
+    return {
+        "writes": writes,
+        "events": events,
+        "parse_ms": parse_seconds * 1000,
+        "ttft_ms": (first_token or 0) * 1000,
+        "tools_ms": ((tools_done or 0) - FIRST_TOKEN_MS / 1000) * 1000,
+        "total_ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def median_of_runs(token_ms: float, window: float, tools: bool = False) -> dict:
+    runs = [asyncio.run(one_answer(token_ms, window, tools)) for _ in range(RUNS)]
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def main():
+    print(f"{TOKENS} tokens, first token after {FIRST_TOKEN_MS} ms, median of {RUNS} runs")
+    print(f"{'model speed':>14} {'mode':>10} {'writes':>7} {'events':>7} {'parse':>8} {'TTFT':>8} {'total':>9}")
+    for token_ms, label in ((20, "50 tok/s"), (5, "200 tok/s"), (1, "1000 tok/s"), (0, "burst")):
+        for window, mode in ((0, "each part"), (COALESCE_WINDOW, "coalesced")):
+            r = median_of_runs(token_ms, window)
+            print(
+                f"{label:>14} {mode:>10} {r['writes']:>7.0f} {r['events']:>7.0f} {r['parse_ms']:>6.2f}ms"
+                f" {r['ttft_ms']:>6.1f}ms {r['total_ms']:>7.0f}ms"
+            )
+
+    r = median_of_runs(0, COALESCE_WINDOW, tools=True)
+    print(f"\n{TOOL_CALLS} tools x {TOOL_SECONDS * 1000:.0f} ms: all results after {r['tools_ms']:.0f} ms"
+          f" (one after the other: {TOOL_CALLS * TOOL_SECONDS * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark: GET /users/ with 1M users — latency, peak memory, and how
+long a small request has to wait while a big listing is running.
+
+"before" is the original handler: an async def that runs the sync
+Session and loads the whole table into User objects.
+
+Uses a temporary SQLite database. For Postgres set:
+    BENCH_POSTGRES_URL=postgresql://postgres:pw@localhost:5432/postgres
+
+Run from the api folder:
+    uv run python benchmarks/bench_users.py
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["POSTGRES_URL"] = os.getenv("BENCH_POSTGRES_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from sqlmodel import Session, SQLModel, select
+
+import main
+from main import User, engine
+
+USERS = 1_000_000
+PAGE_RUNS = 200
+
+
+@main.app.get("/bench/before", response_model=List[User])
+async def get_users_before():
+    with Session(engine) as session:
+        return session.exec(select(User)).all()
+
+
+def load_users() -> None:
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    batch = 50_000
+    with engine.begin() as conn:
+        for start in range(0, USERS, batch):
+            conn.execute(User.__table__.insert(), [
+                {"name": f"user{i}", "email": f"user{i}@example.com"} for i in range(start, start + batch)
+            ])
+
+
+async def fetch(client: httpx.AsyncClient, url: str) -> int:
+    response = await client.get(url)
+    response.raise_for_status()
+    return len(response.content)
+
+
+async def call_app(path: str) -> int:
+    """Run one GET through the app, dropping the body as it streams out
+    (an HTTP client would buffer it and blur the server's memory use)."""
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": [],
+             "http_version": "1.1", "scheme": "http", "server": ("bench", 80), "client": ("bench", 1)}
+    sent = 0
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            await finished.wait()  # the client stays connected until the response ends
+            return {"type": "http.disconnect"}
+        requested = True
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        nonlocal sent
+        sent += len(message.get("body", b""))
+
+    await main.app(scope, receive, send)
+    finished.set()
+    return sent
+
+
+async def timed(path: str) -> tuple[float, float, int]:
+    """(seconds, peak MB, bytes) — time and memory in separate runs, tracemalloc slows code down."""
+    start = time.perf_counter()
+    size = await call_app(path)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    await call_app(path)
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return seconds, peak, size
+
+
+async def page_latency(client, url: str) -> tuple[float, float]:
+    timings = []
+    for _ in range(PAGE_RUNS):
+        start = time.perf_counter()
+        await fetch(client, url)
+        timings.append((time.perf_counter() - start) * 1000)
+    quantiles = statistics.quantiles(timings, n=100)
+    return quantiles[49], quantiles[98]
+
+
+async def wait_while_busy(client, big_path: str) -> float:
+    """How long GET /users/?limit=1, sent 50 ms after big_path, waits for its answer."""
+    start = time.perf_counter()
+    big = asyncio.create_task(call_app(big_path))
+    await asyncio.sleep(0.05)  # a blocked event loop delays this too — that's the point
+    await fetch(client, "/users/?limit=1")
+    waited = time.perf_counter() - start - 0.05
+    await big
+    return waited * 1000
+
+
+async def run():
+    start = time.perf_counter()
+    load_users()
+    print(f"{engine.dialect.name}: {USERS:,} users loaded in {time.perf_counter() - start:.1f}s")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"\n{'whole table':<36} {'seconds':>8} {'peak MB':>8} {'MB sent':>8}")
+        for name, url in (("before: sync Session, all()", "/bench/before"), ("after: /users/stream (NDJSON)", "/users/stream")):
+            seconds, peak, size = await timed(url)
+            print(f"{name:<36} {seconds:>8.2f} {peak:>8.0f} {size / 1024 / 1024:>8.0f}")
+
+        print(f"\n{'page':<36} {'p50 ms':>8} {'p99 ms':>8}")
+        deep = USERS - 5_000
+        for name, url in (
+            ("limit=100", "/users/?limit=100"),
+            ("limit=100, raw", "/users/?limit=100&raw=true"),
+            ("limit=1000", "/users/?limit=1000"),
+            ("limit=1000, raw", "/users/?limit=1000&raw=true"),
+            (f"limit=1000, raw, cursor={deep:,}", f"/users/?limit=1000&raw=true&cursor={deep}"),
+        ):
+            p50, p99 = await page_latency(client, url)
+            print(f"{name:<36} {p50:>8.2f} {p99:>8.2f}")
+
+        print(f"\n{'small request while a big one runs':<36} {'wait ms':>8}")
+        for name, url in (("during before (blocks the loop)", "/bench/before"), ("during /users/stream", "/users/stream")):
+            print(f"{name:<36} {await wait_while_busy(client, url):>8.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,131 @@
+"""
+One long-lived, pooled client for the Vercel AI Gateway.
+
+Creating an OpenAI client on every request throws away its connections:
+each chat pays for a new TCP + TLS handshake with the gateway before the
+first token can arrive, and the OIDC token is fetched again every time.
+
+Here one AsyncOpenAI client is shared by all requests. Its connection
+pool keeps connections to the gateway open ("keep-alive") and reuses
+them, and because it is async, a streaming chat only needs the event
+loop — not a thread — while it waits for the next token.
+
+The OIDC token is a JWT that is valid for a while (its "exp" claim).
+TokenCache keeps it and only asks for a new one shortly before it
+expires. When many requests find an expired token at the same moment,
+only one of them fetches the new token; the others wait for it.
+
+    gateway = Gateway(token_source=oidc.get_vercel_oidc_token)
+    client = await gateway.client()     # AsyncOpenAI with a fresh token
+    ...
+    await gateway.aclose()              # on shutdown
+"""
+
+import asyncio
+import base64
+import json
+import time
+from typing import Callable
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from starlette.concurrency import run_in_threadpool
+
+GATEWAY_URL = "https://ai-gateway.vercel.sh/v1"
+
+
+def token_expiry(token: str) -> float | None:
+    """The "exp" claim of a JWT (seconds since 1970), or None if it has none."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+class TokenCache:
+    """
+    Remembers a token until `refresh_before` seconds before it expires.
+    Tokens without a readable expiry are kept for `default_ttl` seconds.
+    """
+
+    def __init__(self, token_source: Callable[[], str], refresh_before: float = 60.0, default_ttl: float = 60.0):
+        self.token_source = token_source
+        self.refresh_before = refresh_before
+        self.default_ttl = default_ttl
+        self._token: str | None = None
+        self._refresh_at = 0.0
+        self._lock: asyncio.Lock | None = None
+        self.fetches = 0
+
+    async def get(self) -> str:
+        if self._token is not None and time.time() < self._refresh_at:
+            return self._token
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Someone else may have refreshed it while we were waiting
+            if self._token is not None and time.time() < self._refresh_at:
+                return self._token
+            # The token source is a plain (sync) function that may do network I/O
+            token = await run_in_threadpool(self.token_source)
+            self.fetches += 1
+            expires_at = token_expiry(token)
+            if expires_at is None:
+                self._refresh_at = time.time() + self.default_ttl
+            else:
+                self._refresh_at = expires_at - self.refresh_before
+            self._token = token
+            return token
+
+    def clear(self) -> None:
+        self._token = None
+        self._refresh_at = 0.0
+
+
+class Gateway:
+    def __init__(
+        self,
+        token_source: Callable[[], str],
+        base_url: str = GATEWAY_URL,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 60.0,
+    ):
+        self.tokens = TokenCache(token_source)
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=5.0)
+        self._client: AsyncOpenAI | None = None
+        self._token_client: tuple[str, AsyncOpenAI] | None = None  # (token, client using it)
+
+    def _base_client(self) -> AsyncOpenAI:
+        # Created on first use, inside the running event loop
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key="(set per request)",
+                base_url=self.base_url,
+                timeout=self.timeout,
+                http_client=DefaultAsyncHttpxClient(limits=self.limits),
+            )
+        return self._client
+
+    async def client(self) -> AsyncOpenAI:
+        """The shared client with the current token. All copies share one connection pool."""
+        token = await self.tokens.get()
+        if self._token_client is None or self._token_client[0] != token:
+            self._token_client = (token, self._base_client().with_options(api_key=token))
+        return self._token_client[1]
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+        self._client = None
+        self._token_client = None
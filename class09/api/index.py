@@ -3,8 +3,9 @@ from pydantic import BaseModel
 from dotenv import load_dotenv
 from fastapi import FastAPI, Query, Request as FastAPIRequest
 from fastapi.responses import StreamingResponse
-from openai import OpenAI
-from .utils.prompt import ClientMessage, convert_to_openai_messages
+from .gateway import Gateway
+from .utils.context import ContextCompactor
+from .utils.prompt import ClientMessage
 from .utils.stream import patch_response_with_headers, stream_text
 from .utils.tools import AVAILABLE_TOOLS, TOOL_DEFINITIONS
 from vercel import oidc
@@ -15,6 +16,17 @@ load_dotenv(".env.local")
 
 app = FastAPI()
 
+# One pooled client for the whole process, instead of one per request
+gateway = Gateway(token_source=oidc.get_vercel_oidc_token)
+
+# Shortens long histories to CONTEXT_TOKEN_BUDGET tokens before they go to the model
+compactor = ContextCompactor()
+
+
+@app.on_event("shutdown")
+async def close_gateway():
+    await gateway.aclose()
+
 
 @app.middleware("http")
 async def _vercel_set_headers(request: FastAPIRequest, call_next):
@@ -29,11 +41,13 @@ class Request(BaseModel):
 @app.post("/api/chat")
 async def handle_chat_data(request: Request, protocol: str = Query('data')):
     messages = request.messages
-    openai_messages = convert_to_openai_messages(messages)
+    openai_messages, context = compactor.compact(messages)
 
-    client = OpenAI(api_key=oidc.get_vercel_oidc_token(), base_url="https://ai-gateway.vercel.sh/v1")
+    client = await gateway.client()
     response = StreamingResponse(
         stream_text(client, openai_messages, TOOL_DEFINITIONS, AVAILABLE_TOOLS, protocol),
         media_type="text/event-stream",
     )
+    response.headers["X-Context-Tokens"] = str(context["tokens_after"])
+    response.headers["X-Context-Tokens-Saved"] = str(context["tokens_saved"])
     return patch_response_with_headers(response, protocol)
@@ -2,10 +2,17 @@ import os
 from typing import List, Optional
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from fastapi import FastAPI, Query, Request as FastAPIRequest, HTTPException
+from fastapi import FastAPI, Query, Request as FastAPIRequest, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Field, SQLModel, create_engine, Session, select
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Field, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pathlib import Path
+import json
+import secrets
+from query_profiler import QueryProfiler, TOP_ORDERS
 
 # Load .env.local from the project root directory
 env_path = Path(__file__).parent.parent / ".env.local"
@@ -25,6 +32,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Define the User Model
@@ -40,7 +48,69 @@ class User(SQLModel, table=True):
 # It's a object that manages connections to a database,
 # providing connection pooling and other services.
 # Create the Engine
-engine = create_engine(postgres_url, echo=True)
+# echo=True prints every query — handy while learning, but slow. Turn it on
+# with SQL_ECHO=1; normally the query profiler below is used instead.
+engine = create_engine(postgres_url, echo=os.getenv("SQL_ECHO") == "1")
+
+# The async engine is used by the routes: while one request waits for the
+# database, the event loop keeps serving the others. Same database, async
+# driver: postgresql -> asyncpg (sqlite -> aiosqlite for local testing).
+def to_async_url(url: str):
+    parsed = make_url(url)
+    query = dict(parsed.query)
+    connect_args = {}
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite"), connect_args
+    # asyncpg doesn't know libpq's sslmode / channel_binding options
+    sslmode = query.pop("sslmode", None)
+    query.pop("channel_binding", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    return parsed.set(drivername="postgresql+asyncpg", query=query), connect_args
+
+async_url, async_connect_args = to_async_url(postgres_url)
+async_engine = create_async_engine(async_url, connect_args=async_connect_args, pool_pre_ping=True)
+
+# Query profiler: times every query (or a sample of them) and keeps a
+# summary per kind of query. See /admin/queries.
+#   SQL_PROFILE_SAMPLE_RATE  share of queries to measure, 0..1 (default 1)
+#   SQL_SLOW_MS              log queries slower than this (default 500)
+#   ADMIN_TOKEN              required in the X-Admin-Token header for /admin/*
+query_profiler = QueryProfiler(
+    sample_rate=float(os.getenv("SQL_PROFILE_SAMPLE_RATE", "1")),
+    slow_ms=float(os.getenv("SQL_SLOW_MS", "500")),
+)
+query_profiler.attach(engine)
+query_profiler.attach(async_engine.sync_engine)
+
+def check_admin(token: Optional[str]):
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Set ADMIN_TOKEN to enable admin endpoints")
+    # compare_digest takes as long for a near miss as for a wrong first
+    # character, so the response time doesn't leak the token
+    if token is None or not secrets.compare_digest(token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+# GET /admin/queries?limit=10&order=total — the most expensive queries
+@app.get("/admin/queries")
+def slow_queries(
+    limit: int = Query(10, ge=1, le=100),
+    order: str = Query("total", pattern="^(" + "|".join(TOP_ORDERS) + ")$"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    check_admin(x_admin_token)
+    return {
+        "sample_rate": query_profiler.sample_rate,
+        "since": query_profiler.started_at,
+        "queries": query_profiler.top(limit, order),
+    }
+
+@app.delete("/admin/queries")
+def reset_query_stats(x_admin_token: Optional[str] = Header(None)):
+    check_admin(x_admin_token)
+    query_profiler.reset()
+    return {"message": "Query statistics cleared"}
 
 # Startup event to create tables
 # The on_startup function is called when the application starts.
@@ -49,25 +119,65 @@ engine = create_engine(postgres_url, echo=True)
 def on_startup():
     create_db_and_tables()
 
-# GET endpoint - Retrieve all users
-@app.get("/users/", response_model=List[User])
-async def get_users():
-    with Session(engine) as session:
-        statement = select(User)
-        users = session.exec(statement).all()
-        return users
-
 # Create tables on startup
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
-# GET endpoint - Retrieve all users
+@app.on_event("shutdown")
+async def on_shutdown():
+    await async_engine.dispose()
+
+# ---------- Listing users ----------
+# Only the columns we send back — read as plain rows, so SQLAlchemy doesn't
+# build (and track) a User object for each one.
+USER_COLUMNS = (User.id, User.name, User.email)
+STREAM_BATCH_SIZE = 1000
+json_encoder = json.JSONEncoder(separators=(",", ":"))
+
+# GET endpoint - Retrieve users, one page at a time
+# Keyset pagination: ?cursor=<last id you got> returns the users after it
+# (WHERE id > cursor ORDER BY id), so every page costs the same — no OFFSET.
+# The next cursor comes back in the X-Next-Cursor header.
+# ?raw=true skips building User objects — faster for read-only listings.
 @app.get("/users/", response_model=List[User])
-async def get_users():
-    with Session(engine) as session:
-        statement = select(User)
-        users = session.exec(statement).all()
-        return users
+async def get_users(
+    response: Response,
+    cursor: Optional[int] = Query(None, description="Return users after this id"),
+    limit: int = Query(100, ge=1, le=1000),
+    raw: bool = Query(False, description="Plain rows instead of User objects"),
+):
+    statement = select(*USER_COLUMNS) if raw else select(User)
+    if cursor is not None:
+        statement = statement.where(User.id > cursor)
+    statement = statement.order_by(User.id).limit(limit + 1)  # +1: is there a next page?
+
+    if raw:
+        async with async_engine.connect() as conn:
+            rows = (await conn.execute(statement)).mappings().all()
+        users = [dict(row) for row in rows[:limit]]
+        headers = {"X-Next-Cursor": str(users[-1]["id"])} if len(rows) > limit else {}
+        return Response(content=json_encoder.encode(users), media_type="application/json", headers=headers)
+
+    async with AsyncSession(async_engine) as session:
+        users = (await session.exec(statement)).all()
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers["X-Next-Cursor"] = str(users[-1].id)
+    return users
+
+# GET endpoint - Every user as NDJSON (one JSON object per line)
+# The rows come through a server-side cursor, STREAM_BATCH_SIZE at a time
+# (yield_per), so memory stays flat even for millions of users.
+@app.get("/users/stream")
+async def stream_users():
+    async def generate():
+        async with async_engine.connect() as conn:
+            statement = select(*USER_COLUMNS).order_by(User.id).execution_options(yield_per=STREAM_BATCH_SIZE)
+            result = await conn.stream(statement)
+            async for rows in result.mappings().partitions():
+                yield "".join(json_encoder.encode(dict(row)) + "\n" for row in rows)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 
 if __name__ == "__main__":
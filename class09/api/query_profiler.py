@@ -0,0 +1,168 @@
+"""
+A lightweight SQL query profiler (a quieter replacement for echo=True).
+
+echo=True formats and prints every single query, which is slow and
+floods the logs. Instead we listen to two SQLAlchemy engine events —
+"a query is about to run" and "a query finished" — and keep a running
+summary per kind of query in memory:
+
+    SELECT ... WHERE user.id = 5
+    SELECT ... WHERE user.id = 7      ->  SELECT ... WHERE user.id = ?
+                                          count=2, total=3.1 ms, max=1.9 ms
+
+Queries that only differ in their values get the same "fingerprint", so
+the summary stays small no matter how many queries run.
+
+Sampling: with sample_rate=0.1 only one query in ten is measured, which
+makes the cost almost zero on busy servers. Counts in the report are
+scaled back up (estimated_count).
+
+    profiler = QueryProfiler(sample_rate=0.1, slow_ms=200)
+    profiler.attach(engine)
+    profiler.top(10)   # the 10 queries that took the most time in total
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from hashlib import blake2b
+
+from sqlalchemy import event
+
+slow_query_log = logging.getLogger("sql.slow")
+
+# Values inside queries: 'strings', numbers, $1 / %(name)s / :name / ? parameters
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\$\d+|%\(\w+\)s|%s|(?<!:):\w+|\?")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")  # IN (?, ?, ?) -> IN (...)
+_SPACES = re.compile(r"\s+")
+
+TOP_ORDERS = ("total", "mean", "max", "count")
+
+
+def normalize(statement: str) -> str:
+    """Replace values with ? and collapse whitespace, so similar queries match."""
+    text = _LITERALS.sub("?", statement)
+    text = _IN_LISTS.sub("(...)", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+class _Stats:
+    __slots__ = ("statement", "count", "total", "max", "rows")
+
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+
+class QueryProfiler:
+    def __init__(self, sample_rate: float = 1.0, slow_ms: float | None = None, max_statements: int = 1000):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.max_statements = max_statements
+        self._stats: dict[str, _Stats] = {}
+        self._normalized: dict[str, tuple[str, str]] = {}  # raw statement -> (normalized, fingerprint)
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def attach(self, engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._error)
+
+    def detach(self, engine) -> None:
+        event.remove(engine, "before_cursor_execute", self._before)
+        event.remove(engine, "after_cursor_execute", self._after)
+        event.remove(engine, "handle_error", self._error)
+
+    # ---------- Event handlers (run on every query, keep them cheap) ----------
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            conn.info["query_start"] = time.perf_counter()
+        else:
+            # Never let a start time left on this connection be taken for this query
+            conn.info.pop("query_start", None)
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("query_start", None)
+        if start is None:
+            return  # not sampled
+        elapsed = time.perf_counter() - start
+        self.record(statement, elapsed, max(cursor.rowcount, 0))
+        if self.slow_ms is not None and elapsed * 1000 >= self.slow_ms:
+            slow_query_log.warning("slow query (%.1f ms): %s", elapsed * 1000, self._normalize(statement)[0])
+
+    def _error(self, exception_context):
+        # A failed query never reaches _after: drop its start time here
+        if exception_context.connection is not None:
+            exception_context.connection.info.pop("query_start", None)
+
+    def _normalize(self, statement: str) -> tuple[str, str]:
+        # The same raw SQL text comes back again and again, so remember the result
+        known = self._normalized.get(statement)
+        if known is None:
+            normalized = normalize(statement)
+            known = (normalized, fingerprint(normalized))
+            if len(self._normalized) < self.max_statements * 10:
+                self._normalized[statement] = known
+        return known
+
+    # ---------- Recording / reporting ----------
+
+    def record(self, statement: str, seconds: float, rows: int = 0) -> None:
+        normalized, key = self._normalize(statement)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_statements:
+                    key = "other"  # keep memory bounded with unusual workloads
+                    stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = _Stats(normalized if key != "other" else "(other statements)")
+            stats.count += 1
+            stats.total += seconds
+            stats.rows += rows
+            if seconds > stats.max:
+                stats.max = seconds
+
+    def top(self, limit: int = 10, order: str = "total") -> list[dict]:
+        """The `limit` most expensive statements, by total, mean or max time, or count."""
+        if order not in TOP_ORDERS:
+            raise ValueError(f"order must be one of {TOP_ORDERS}")
+        sort_keys = {
+            "total": lambda s: s.total,
+            "mean": lambda s: s.total / s.count,
+            "max": lambda s: s.max,
+            "count": lambda s: s.count,
+        }
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: sort_keys[order](item[1]), reverse=True)[:limit]
+            return [
+                {
+                    "fingerprint": key,
+                    "statement": stats.statement,
+                    "count": stats.count,
+                    "estimated_count": round(stats.count / self.sample_rate) if self.sample_rate else 0,
+                    "total_ms": round(stats.total * 1000, 3),
+                    "mean_ms": round(stats.total / stats.count * 1000, 3),
+                    "max_ms": round(stats.max * 1000, 3),
+                    "rows": stats.rows,
+                }
+                for key, stats in items
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.time()
@@ -0,0 +1,211 @@
+"""
+Context compaction: keep long chats from getting more expensive every turn.
+
+useChat sends the whole conversation with every request, and all of it
+is sent on to the model. Each turn costs more tokens (money) and more
+time than the one before. Before calling the model we:
+
+  1. Convert each message once. A message's result is cached under a
+     hash of the message AND everything before it (a "prefix" hash),
+     so on the next turn only the new messages are converted and counted.
+  2. Shorten old tool outputs. A 20 KB weather forecast from ten turns
+     ago doesn't need to be sent in full again; the start is kept with
+     a note saying how much was cut. The last `keep_recent_turns` turns
+     are never touched.
+  3. Enforce a token budget: while the conversation is over `budget`
+     tokens, the oldest messages are dropped (never system messages or
+     the recent turns).
+
+Tokens are counted locally with tiktoken (the GPT-4o tokenizer) when its
+data can be loaded (it is downloaded on first use); otherwise they are
+estimated as 4 characters per token.
+
+    compactor = ContextCompactor()      # budget: CONTEXT_TOKEN_BUDGET, default 32000
+    openai_messages, report = compactor.compact(request.messages)
+    report["tokens_saved"]
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+
+from .prompt import ClientMessage, convert_message
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+log = logging.getLogger("chat.context")
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators
+IMAGE_TOKENS = 85  # a low-detail image
+
+
+class Tokenizer:
+    def __init__(self, encoding_name: str = "o200k_base"):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        self._loaded = False
+
+    def _load(self):
+        # Loaded on first use: tiktoken may download its data file the first time
+        if not self._loaded:
+            self._loaded = True
+            if tiktoken is not None:
+                try:
+                    self._encoding = tiktoken.get_encoding(self.encoding_name)
+                except Exception as e:
+                    log.warning("tiktoken %s unavailable, estimating tokens instead: %s", self.encoding_name, e)
+        return self._encoding
+
+    @property
+    def exact(self) -> bool:
+        return self._load() is not None
+
+    def count(self, text: str) -> int:
+        encoding = self._load()
+        if encoding is None:
+            return (len(text) + 3) // 4
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        encoding = self._load()
+        if encoding is None:
+            return text[:max_tokens * 4]
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+class _Entry:
+    """One client message, converted; the shortened version is made when first needed."""
+
+    __slots__ = ("messages", "tokens", "compacted", "compacted_tokens", "truncated")
+
+    def __init__(self, messages: list[dict], tokens: int):
+        self.messages = messages
+        self.tokens = tokens
+        self.compacted: list[dict] | None = None
+        self.compacted_tokens = 0
+        self.truncated = 0  # tool outputs shortened
+
+
+class ContextCompactor:
+    def __init__(
+        self,
+        budget: int | None = None,
+        keep_recent_turns: int = 2,
+        tool_output_max_tokens: int = 1000,
+        tokenizer: Tokenizer | None = None,
+        max_cached: int = 4096,
+    ):
+        self.budget = budget if budget is not None else int(os.getenv("CONTEXT_TOKEN_BUDGET", "32000"))
+        self.keep_recent_turns = keep_recent_turns
+        self.tool_output_max_tokens = tool_output_max_tokens
+        self.tokenizer = tokenizer or Tokenizer()
+        self.max_cached = max_cached
+        self._cache: OrderedDict[bytes, _Entry] = OrderedDict()  # prefix hash -> entry, oldest first
+        self._lock = threading.Lock()
+
+    # ---------- Counting / shortening ----------
+
+    def message_tokens(self, message: dict) -> int:
+        tokens = MESSAGE_OVERHEAD_TOKENS
+        content = message.get("content")
+        if isinstance(content, str):
+            tokens += self.tokenizer.count(content)
+        elif content:
+            for item in content:
+                tokens += self.tokenizer.count(item["text"]) if item["type"] == "text" else IMAGE_TOKENS
+        for call in message.get("tool_calls", ()):
+            tokens += self.tokenizer.count(call["function"]["name"]) + self.tokenizer.count(call["function"]["arguments"])
+        return tokens
+
+    def _compact_entry(self, entry: _Entry) -> None:
+        compacted = []
+        for message in entry.messages:
+            if message["role"] == "tool":
+                tokens = self.tokenizer.count(message["content"])
+                if tokens > self.tool_output_max_tokens:
+                    head = self.tokenizer.truncate(message["content"], self.tool_output_max_tokens)
+                    omitted = tokens - self.tool_output_max_tokens
+                    message = {**message, "content": f"{head}\n...[tool output truncated, {omitted} more tokens]"}
+                    entry.truncated += 1
+            compacted.append(message)
+        entry.compacted = compacted
+        entry.compacted_tokens = sum(self.message_tokens(message) for message in compacted)
+
+    # ---------- Cache ----------
+
+    def _entries(self, messages: list[ClientMessage]) -> tuple[list[_Entry], int]:
+        entries = []
+        hits = 0
+        prefix = b""
+        for message in messages:
+            prefix = blake2b(prefix + message.model_dump_json().encode(), digest_size=16).digest()
+            with self._lock:
+                entry = self._cache.get(prefix)
+                if entry is not None:
+                    self._cache.move_to_end(prefix)
+            if entry is None:
+                converted = convert_message(message)
+                entry = _Entry(converted, sum(self.message_tokens(m) for m in converted))
+                with self._lock:
+                    self._cache[prefix] = entry
+                    if len(self._cache) > self.max_cached:
+                        self._cache.popitem(last=False)
+            else:
+                hits += 1
+            entries.append(entry)
+        return entries, hits
+
+    # ---------- Compaction ----------
+
+    def compact(self, messages: list[ClientMessage]) -> tuple[list[dict], dict]:
+        """OpenAI messages that fit the budget, and a report of what was saved."""
+        entries, hits = self._entries(messages)
+
+        # Messages before the last `keep_recent_turns` user messages are "old"
+        recent_start = len(messages)
+        turns = 0
+        while recent_start > 0 and turns < self.keep_recent_turns:
+            recent_start -= 1
+            if messages[recent_start].role == "user":
+                turns += 1
+
+        groups = []  # [messages, tokens, droppable] per client message
+        truncated = 0
+        for position, (message, entry) in enumerate(zip(messages, entries)):
+            if position < recent_start:
+                if entry.compacted is None:
+                    self._compact_entry(entry)
+                truncated += entry.truncated
+                groups.append([entry.compacted, entry.compacted_tokens, message.role != "system"])
+            else:
+                groups.append([entry.messages, entry.tokens, False])
+
+        tokens_before = sum(entry.tokens for entry in entries)
+        total = sum(group[1] for group in groups)
+        dropped = 0
+        for group in groups:  # oldest first
+            if total <= self.budget:
+                break
+            if group[2]:
+                total -= group[1]
+                dropped += len(group[0])
+                group[0] = []
+
+        openai_messages = [message for group in groups for message in group[0]]
+        report = {
+            "tokens_before": tokens_before,
+            "tokens_after": total,
+            "tokens_saved": tokens_before - total,
+            "truncated_tool_outputs": truncated,
+            "dropped_messages": dropped,
+            "cached_messages": hits,
+            "exact_tokens": self.tokenizer.exact,
+        }
+        if report["tokens_saved"]:
+            log.info("context compacted: %(tokens_before)d -> %(tokens_after)d tokens (%(tokens_saved)d saved)", report)
+        return openai_messages, report
@@ -0,0 +1,110 @@
+"""
+Convert the messages sent by the AI SDK's useChat (UI messages, made of
+"parts") into OpenAI chat messages.
+
+    {"role": "assistant", "parts": [
+        {"type": "text", "text": "Let me check."},
+        {"type": "tool-get_current_weather", "toolCallId": "call_1",
+         "state": "output-available", "input": {...}, "output": {...}}]}
+->
+    {"role": "assistant", "content": "Let me check.", "tool_calls": [...]}
+    {"role": "tool", "tool_call_id": "call_1", "content": "{...}"}
+
+Each UI message converts on its own (convert_message), which lets
+utils/context.py cache the result per message.
+"""
+
+import json
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+# OpenAI needs a result for every tool call, so calls without one are left out
+FINISHED_TOOL_STATES = ("output-available", "output-error")
+
+
+class ClientMessagePart(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    type: str
+    text: Optional[str] = None
+    mediaType: Optional[str] = None
+    url: Optional[str] = None
+    toolCallId: Optional[str] = None
+    toolName: Optional[str] = None
+    state: Optional[str] = None
+    input: Optional[Any] = None
+    output: Optional[Any] = None
+    errorText: Optional[str] = None
+
+
+class ClientMessage(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    role: str
+    content: Optional[str] = None
+    parts: Optional[List[ClientMessagePart]] = None
+
+
+def _tool_result(part: ClientMessagePart) -> dict:
+    if part.state == "output-error":
+        content = part.errorText or "Tool call failed"
+    else:
+        content = part.output if isinstance(part.output, str) else json.dumps(part.output)
+    return {"role": "tool", "tool_call_id": part.toolCallId, "content": content}
+
+
+def convert_message(message: ClientMessage) -> list[dict]:
+    """One UI message -> one or more OpenAI messages (an assistant step, then its tool results)."""
+    if message.parts is None:
+        return [{"role": message.role, "content": message.content or ""}]
+
+    converted = []
+    content: list[dict] = []
+    tool_calls: list[dict] = []
+    tool_results: list[dict] = []
+
+    def end_step():
+        if not (content or tool_calls):
+            return
+        if message.role == "user":
+            converted.append({"role": "user", "content": list(content)})
+        else:
+            text = "".join(item["text"] for item in content if item["type"] == "text")
+            step = {"role": message.role, "content": text or None}
+            if tool_calls:
+                step["tool_calls"] = list(tool_calls)
+            converted.append(step)
+        converted.extend(tool_results)
+        content.clear()
+        tool_calls.clear()
+        tool_results.clear()
+
+    for part in message.parts:
+        if part.type == "step-start":
+            end_step()  # an assistant answer can have several steps: text, tools, more text...
+        elif part.type == "text":
+            if tool_calls:
+                end_step()
+            content.append({"type": "text", "text": part.text or ""})
+        elif part.type == "file" and part.url and (part.mediaType or "").startswith("image/"):
+            content.append({"type": "image_url", "image_url": {"url": part.url}})
+        elif (part.type.startswith("tool-") or part.type == "dynamic-tool") and part.toolCallId:
+            if part.state not in FINISHED_TOOL_STATES:
+                continue
+            name = part.toolName or part.type.removeprefix("tool-")
+            tool_calls.append({
+                "id": part.toolCallId,
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(part.input or {})},
+            })
+            tool_results.append(_tool_result(part))
+    end_step()
+    return converted
+
+
+def convert_to_openai_messages(messages: List[ClientMessage]) -> list[dict]:
+    openai_messages = []
+    for message in messages:
+        openai_messages.extend(convert_message(message))
+    return openai_messages
@@ -0,0 +1,250 @@
+"""
+Stream a chat completion to the browser in the AI SDK "UI message
+stream" format: Server-Sent Events, one JSON part per event.
+
+    data: {"type":"start","messageId":"msg-..."}
+    data: {"type":"text-start","id":"text-1"}
+    data: {"type":"text-delta","id":"text-1","delta":"Hel"}
+    data: {"type":"text-end","id":"text-1"}
+    data: {"type":"tool-input-start","toolCallId":"call_1","toolName":"get_current_weather"}
+    data: {"type":"tool-input-available","toolCallId":"call_1","toolName":"...","input":{...}}
+    data: {"type":"tool-output-available","toolCallId":"call_1","output":{...}}
+    data: {"type":"finish"}
+    data: [DONE]
+
+stream_text is an async generator. StreamingResponse sends one chunk and
+only then asks for the next one, so the next piece is read from the
+gateway only after the browser has taken the previous one
+(backpressure): a slow client slows the upstream read down instead of
+piling up chunks in memory. If the browser goes away, the generator is
+cancelled and `async with` closes the upstream connection.
+
+Two things keep long answers and tool calls cheap:
+  - Coalescing: a model can send hundreds of tiny deltas per second.
+    Deltas that arrive within `window` seconds of the last write are
+    merged ("Hel" + "lo" -> "Hello") and written together, so the
+    server makes fewer writes and the browser parses fewer events.
+    The first delta and every non-delta part are written right away,
+    so time-to-first-token is unchanged; a delta waits at most `window`.
+  - Tool calls from one answer are independent, so they run at the
+    same time, and each result is sent as soon as it is ready.
+"""
+
+import asyncio
+import inspect
+import json
+import time
+import traceback
+import uuid
+from typing import Any, AsyncIterator, Callable
+
+from fastapi.responses import StreamingResponse
+from openai import AsyncOpenAI
+from starlette.concurrency import run_in_threadpool
+
+MODEL = "openai/gpt-4o"
+COALESCE_WINDOW = 0.02  # seconds
+COALESCE_MAX_BYTES = 8192
+
+# Delta part type -> (field that identifies its stream, field with the text)
+DELTA_FIELDS = {
+    "text-delta": ("id", "delta"),
+    "tool-input-delta": ("toolCallId", "inputTextDelta"),
+}
+
+
+def format_sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+async def run_tool(function: Callable, arguments: dict) -> Any:
+    """Await async tools; run plain functions (which may block) in the thread pool."""
+    if inspect.iscoroutinefunction(function):
+        return await function(**arguments)
+    return await run_in_threadpool(function, **arguments)
+
+
+async def call_tool(call: dict, available_tools: dict[str, Callable]) -> dict:
+    """Run one tool call and return its output part (or an error part)."""
+    function = available_tools.get(call["name"])
+    if function is None:
+        return {"type": "tool-output-error", "toolCallId": call["id"], "errorText": f"Unknown tool {call['name']!r}"}
+    try:
+        output = await run_tool(function, call["input"])
+    except Exception as e:
+        return {"type": "tool-output-error", "toolCallId": call["id"], "errorText": str(e)}
+    return {"type": "tool-output-available", "toolCallId": call["id"], "output": output}
+
+
+async def stream_parts(
+    client: AsyncOpenAI,
+    messages: list[dict],
+    tool_definitions: list[dict],
+    available_tools: dict[str, Callable],
+    model: str = MODEL,
+) -> AsyncIterator[dict]:
+    """The UI message parts of one answer, as dicts."""
+    text_id = "text-1"
+    text_started = False
+    tool_calls: dict[int, dict] = {}  # index in the response -> {"id", "name", "arguments"}
+    finish_reason = None
+    usage = None
+
+    yield {"type": "start", "messageId": f"msg-{uuid.uuid4().hex}"}
+    try:
+        options = {"tools": tool_definitions} if tool_definitions else {}
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **options,
+        )
+        async with stream:
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                for choice in chunk.choices:
+                    delta = choice.delta
+                    if delta.content:
+                        if not text_started:
+                            text_started = True
+                            yield {"type": "text-start", "id": text_id}
+                        yield {"type": "text-delta", "id": text_id, "delta": delta.content}
+
+                    # Tool calls arrive in pieces: the name first, then the JSON arguments bit by bit
+                    for call in delta.tool_calls or ():
+                        state = tool_calls.get(call.index)
+                        if state is None:
+                            state = tool_calls[call.index] = {"id": call.id, "name": call.function.name, "arguments": ""}
+                            yield {"type": "tool-input-start", "toolCallId": call.id, "toolName": call.function.name}
+                        if call.function.arguments:
+                            state["arguments"] += call.function.arguments
+                            yield {"type": "tool-input-delta", "toolCallId": state["id"], "inputTextDelta": call.function.arguments}
+
+                    if choice.finish_reason:
+                        finish_reason = choice.finish_reason
+
+        if text_started:
+            yield {"type": "text-end", "id": text_id}
+
+        runnable = []
+        for state in tool_calls.values():
+            try:
+                state["input"] = json.loads(state["arguments"] or "{}")
+            except ValueError as e:
+                yield {"type": "tool-output-error", "toolCallId": state["id"], "errorText": f"Invalid tool input: {e}"}
+                continue
+            yield {"type": "tool-input-available", "toolCallId": state["id"], "toolName": state["name"], "input": state["input"]}
+            runnable.append(state)
+
+        # All tool calls at once; results go out in the order they finish
+        tasks = [asyncio.ensure_future(call_tool(state, available_tools)) for state in runnable]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        finish = {"type": "finish"}
+        if finish_reason is not None:
+            metadata = {"finishReason": finish_reason.replace("_", "-")}
+            if usage is not None:
+                metadata["usage"] = {"promptTokens": usage.prompt_tokens, "completionTokens": usage.completion_tokens}
+            finish["messageMetadata"] = metadata
+        yield finish
+    except Exception as e:
+        traceback.print_exc()
+        yield {"type": "error", "errorText": str(e)}
+
+
+async def coalesce(
+    parts: AsyncIterator[dict],
+    window: float = COALESCE_WINDOW,
+    max_bytes: int = COALESCE_MAX_BYTES,
+) -> AsyncIterator[str]:
+    """
+    Turn parts into SSE text, merging deltas that arrive within `window`
+    seconds of the last write. window=0 writes every part on its own.
+    """
+    iterator = aiter(parts)
+    buffer: list[dict] = []
+    size = 0
+    last_write = float("-inf")
+    seen_streams: set = set()
+    pending = None  # the next part being read, kept across write deadlines
+
+    def take() -> str:
+        nonlocal size, last_write
+        text = "".join(format_sse(part) for part in buffer)
+        buffer.clear()
+        size = 0
+        last_write = time.monotonic()
+        return text
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(iterator))
+            timeout = max(0.0, last_write + window - time.monotonic()) if buffer else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield take()  # the window is over: write what we have, keep waiting for the part
+                continue
+            try:
+                part = pending.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+
+            fields = DELTA_FIELDS.get(part["type"])
+            if fields is None:
+                # start, text-end, tool results, finish...: write right away
+                buffer.append(part)
+                yield take()
+                continue
+
+            key, text = fields
+            previous = buffer[-1] if buffer else None
+            if previous is not None and previous["type"] == part["type"] and previous[key] == part[key]:
+                previous[text] += part[text]
+            else:
+                buffer.append(dict(part))
+            size += len(part[text])
+            first_of_stream = part[key] not in seen_streams
+            seen_streams.add(part[key])
+            if first_of_stream or size >= max_bytes or time.monotonic() - last_write >= window:
+                yield take()
+
+        if buffer:
+            yield take()
+    finally:
+        if pending is not None:
+            pending.cancel()  # delivered inside stream_parts, which closes the upstream stream
+
+
+async def stream_text(
+    client: AsyncOpenAI,
+    messages: list[dict],
+    tool_definitions: list[dict],
+    available_tools: dict[str, Callable],
+    protocol: str = "data",
+    model: str = MODEL,
+    window: float = COALESCE_WINDOW,
+) -> AsyncIterator[str]:
+    async for text in coalesce(stream_parts(client, messages, tool_definitions, available_tools, model), window):
+        yield text
+    yield "data: [DONE]\n\n"
+
+
+def patch_response_with_headers(response: StreamingResponse, protocol: str = "data") -> StreamingResponse:
+    """Headers the AI SDK (useChat) expects, and no buffering by proxies."""
+    response.headers["x-vercel-ai-ui-message-stream"] = "v1"
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Connection"] = "keep-alive"
+    response.headers["X-Accel-Buffering"] = "no"
+    if protocol:
+        response.headers.setdefault("x-vercel-ai-protocol", protocol)
+    return response
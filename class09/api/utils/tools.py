@@ -0,0 +1,52 @@
+"""
+Tools the model may call during a chat.
+
+TOOL_DEFINITIONS is sent to the model with every request (OpenAI
+"function" format); AVAILABLE_TOOLS maps each tool name to the function
+that stream_text runs when the model asks for it. Tools are async, so a
+slow upstream API doesn't tie up a thread while it answers.
+"""
+
+import httpx
+
+WEATHER_URL = "https://api.open-meteo.com/v1/forecast"
+TOOL_TIMEOUT = 10.0  # seconds
+
+
+async def get_current_weather(latitude: float, longitude: float) -> dict:
+    """Current temperature, the hourly forecast and today's sunrise/sunset (Open-Meteo, no API key)."""
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current": "temperature_2m",
+        "hourly": "temperature_2m",
+        "daily": "sunrise,sunset",
+        "timezone": "auto",
+    }
+    async with httpx.AsyncClient(timeout=TOOL_TIMEOUT) as client:
+        response = await client.get(WEATHER_URL, params=params)
+        response.raise_for_status()
+        return response.json()
+
+
+TOOL_DEFINITIONS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_current_weather",
+            "description": "Get the current weather at a location",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "latitude": {"type": "number", "description": "The latitude of the location"},
+                    "longitude": {"type": "number", "description": "The longitude of the location"},
+                },
+                "required": ["latitude", "longitude"],
+            },
+        },
+    },
+]
+
+AVAILABLE_TOOLS = {
+    "get_current_weather": get_current_weather,
+}
@@ -0,0 +1,236 @@
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# Use a throwaway SQLite database instead of the one in .env
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test_products.db"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+from sqlmodel import SQLModel
+from database import make_engine
+from main import app, product_cache
+
+
+client = TestClient(app)
+engine = make_engine()  # sync, for creating and inspecting the tables
+
+
+def setup_function():
+    """Start every test with empty tables"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    product_cache.invalidate()
+
+
+def create(name="Laptop", price=999.99, in_stock=True):
+    response = client.post("/products", json={"name": name, "price": price, "in_stock": in_stock})
+    assert response.status_code == 200
+    return response.json()["product"]
+
+
+def list_products(**params):
+    response = client.get("/products", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def all_pages(**params):
+    products, cursor = [], None
+    while True:
+        response = client.get("/products", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        products += response.json()
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return products
+
+
+# ---- Reads see writes ----
+
+def test_created_product_is_listed():
+    product = create()
+    assert list_products() == [product]
+
+
+def test_update_is_listed():
+    product = create()
+    response = client.put(f"/products/{product['id']}", json={"name": "Gaming Laptop", "price": 1299.0, "in_stock": False})
+    assert response.status_code == 200
+    assert response.json()["product"] == {"id": product["id"], "name": "Gaming Laptop", "price": 1299.0, "in_stock": False}
+    assert list_products() == [response.json()["product"]]
+
+
+def test_delete_is_listed():
+    first = create("Laptop")
+    second = create("Smartphone")
+    response = client.delete(f"/products/{first['id']}")
+    assert response.status_code == 200
+    assert list_products() == [second]
+
+
+def test_full_crud_cycle_keeps_other_rows():
+    products = [create(f"Product {i}", i * 10.0, i % 2 == 0) for i in range(5)]
+    client.put(f"/products/{products[1]['id']}", json={"name": "Changed", "price": 1.0, "in_stock": True})
+    client.delete(f"/products/{products[3]['id']}")
+
+    products[1].update(name="Changed", price=1.0, in_stock=True)
+    expected = [p for p in products if p["id"] != products[3]["id"]]
+    assert list_products() == expected
+
+
+def test_update_ignores_id_in_body():
+    product = create()
+    client.put(f"/products/{product['id']}", json={"id": 999, "name": "Laptop", "price": 1.0, "in_stock": True})
+    assert [p["id"] for p in list_products()] == [product["id"]]
+
+
+def test_list_is_not_stale_after_writes():
+    product = create()
+    assert list_products() == [product]  # now cached
+    client.put(f"/products/{product['id']}", json={"name": "New", "price": 2.0, "in_stock": True})
+    assert list_products()[0]["name"] == "New"
+    client.delete(f"/products/{product['id']}")
+    assert list_products() == []
+
+
+# ---- Pagination, filters, sorting ----
+
+def make_catalog():
+    return [create(f"Product {i:02d}", float(i % 7), i % 3 == 0) for i in range(25)]
+
+
+def test_pages_cover_every_product_once():
+    products = make_catalog()
+    assert all_pages(limit=4) == products
+
+
+def test_sorted_pages_with_ties_on_price():
+    products = make_catalog()
+    expected = sorted(products, key=lambda p: (p["price"], p["id"]))
+    assert all_pages(limit=4, sort="price") == expected
+    assert all_pages(limit=4, sort="-price") == expected[::-1]
+
+
+def test_filters():
+    products = make_catalog()
+    expected = [p for p in products if p["in_stock"] and 2 <= p["price"] <= 5]
+    assert all_pages(limit=2, in_stock="true", min_price=2, max_price=5) == expected
+
+
+def test_invalid_cursor_returns_400():
+    assert client.get("/products", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_cache_metrics():
+    create()
+    list_products(limit=7)
+    list_products(limit=7)
+    body = client.get("/metrics").text
+    assert 'product_cache_requests_total{result="hit"}' in body
+
+
+# ---- Missing products ----
+
+def test_update_missing_product_returns_404():
+    response = client.put("/products/999", json={"name": "Ghost", "price": 1.0, "in_stock": True})
+    assert response.status_code == 404
+    assert list_products() == []
+
+
+def test_create_with_bad_body_returns_422():
+    assert client.post("/products", json={"name": "Laptop", "price": "abc", "in_stock": True}).status_code == 422
+    assert client.post("/products", json={"name": "Laptop"}).status_code == 422
+    assert list_products() == []
+
+
+def test_update_with_bad_body_returns_422():
+    product = create()
+    assert client.put(f"/products/{product['id']}", json={"name": "b"}).status_code == 422
+    assert client.put(f"/products/{product['id']}", json={"name": "b", "price": "abc", "in_stock": True}).status_code == 422
+    assert list_products() == [product]
+
+
+def test_delete_missing_product_returns_404():
+    response = client.delete("/products/999")
+    assert response.status_code == 404
+
+
+def test_delete_twice_returns_404():
+    product = create()
+    assert client.delete(f"/products/{product['id']}").status_code == 200
+    assert client.delete(f"/products/{product['id']}").status_code == 404
+
+
+# ---- Indexes ----
+
+def test_name_and_in_stock_are_indexed():
+    indexed = {tuple(index["column_names"]) for index in inspect(engine).get_indexes("product")}
+    assert ("name",) in indexed
+    assert ("in_stock",) in indexed
+
+
+# ---- Bulk ingestion ----
+
+def bulk(body, content_type):
+    response = client.post("/products/bulk", content=body.encode(), headers={"content-type": content_type})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_bulk_csv_inserts_rows_and_returns_their_ids():
+    result = bulk("name,price,in_stock\nLaptop,999.99,true\nMouse,19.5,false\n", "text/csv")
+    assert result["inserted"] == 2 and result["failed"] == 0
+    products = list_products()
+    assert result["ids"] == [p["id"] for p in products]
+    assert [(p["name"], p["price"], p["in_stock"]) for p in products] == [("Laptop", 999.99, True), ("Mouse", 19.5, False)]
+
+
+def test_bulk_ndjson_inserts_rows_and_returns_their_ids():
+    lines = [{"name": f"Product {i}", "price": i + 0.5, "in_stock": i % 2 == 0} for i in range(3)]
+    result = bulk("\n".join(json.dumps(line) for line in lines), "application/x-ndjson")
+    assert result["inserted"] == 3
+    assert result["ids"] == [p["id"] for p in list_products()]
+    assert [p["name"] for p in list_products()] == ["Product 0", "Product 1", "Product 2"]
+
+
+def test_bulk_csv_value_may_span_lines():
+    body = 'name,price,in_stock\n"Desk\nlamp, white",25,true\nChair,40,false\n'
+    result = bulk(body, "text/csv")
+    assert result["inserted"] == 2 and result["errors"] == []
+    assert [p["name"] for p in list_products()] == ["Desk\nlamp, white", "Chair"]
+
+
+def test_bulk_reports_bad_rows_by_line_and_keeps_the_good_ones():
+    body = "\n".join([
+        "name,price,in_stock",
+        "Laptop,999.99,true",
+        "Broken,1",                # wrong column count
+        "",                        # blank lines are skipped but still counted
+        "Mouse,not-a-price,true",  # fails validation
+        '"Desk',                   # a quoted value over two lines...
+        'lamp",25,true',
+        "Chair,40,false",          # ...so this is line 8
+    ])
+    result = bulk(body, "text/csv")
+    assert result["inserted"] == 3 and result["failed"] == 2
+    assert [error["line"] for error in result["errors"]] == [3, 5]
+    assert result["errors"][0]["error"] == "expected 3 columns, got 2"
+    assert result["errors"][1]["error"].startswith("price")
+    assert [p["name"] for p in list_products()] == ["Laptop", "Desk\nlamp", "Chair"]
+
+
+def test_bulk_ndjson_reports_bad_lines():
+    body = "\n".join(['{"name": "A", "price": 1, "in_stock": true}', "{not json", "[1, 2]", '{"name": "B", "price": 2, "in_stock": false}'])
+    result = bulk(body, "application/x-ndjson")
+    assert result["inserted"] == 2
+    assert [(error["line"], error["error"].split(":")[0]) for error in result["errors"]] == [(2, "invalid JSON"), (3, "expected a JSON object")]
+    assert result["ids"] == [p["id"] for p in list_products()]
+
+
+def test_bulk_unclosed_quote_is_reported():
+    result = bulk('name,price,in_stock\nLaptop,1,true\n"Desk,2,true\nChair,3,true\n', "text/csv")
+    assert result["inserted"] == 1
+    assert result["errors"] == [{"line": 3, "error": "quoted value is never closed"}]
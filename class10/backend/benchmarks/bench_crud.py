@@ -0,0 +1,106 @@
+"""
+Benchmark: the full product CRUD cycle, and update done two ways:
+  - "load + save": session.get() the row, change it in Python, commit
+    (two round trips)
+  - "UPDATE ... RETURNING": the single statement PUT /products/{id} uses
+
+Runs against a local SQLite file. To include Postgres set:
+    BENCH_POSTGRES_URL=postgresql://postgres:pw@localhost:5432/postgres
+
+Run from the backend folder:
+    uv run python benchmarks/bench_crud.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import SQLModel, delete, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import make_async_engine
+from main import Product, create_missing_indexes
+
+ROWS = 2_000
+
+
+async def timed(label: str, count: int, work) -> None:
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {count / elapsed:>10,.0f} ops/sec  {elapsed / count * 1e6:>8.0f} us/op")
+
+
+async def bench_database(name: str, url: str) -> None:
+    engine = make_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    ids: list[int] = []
+    print(f"{name} ({ROWS} rows, one request-sized session per operation)")
+
+    async def create():
+        for i in range(ROWS):
+            async with sessions() as session:
+                product = Product(name=f"Product {i}", price=i * 1.5, in_stock=i % 2 == 0)
+                session.add(product)
+                await session.commit()
+                await session.refresh(product)
+                ids.append(product.id)
+
+    async def read_list():
+        for _ in range(20):
+            async with sessions() as session:
+                (await session.exec(select(Product).order_by(Product.id))).all()
+
+    async def load_and_save():
+        for product_id in ids:
+            async with sessions() as session:
+                product = await session.get(Product, product_id)
+                product.price += 1
+                await session.commit()
+
+    async def update_returning():
+        for product_id in ids:
+            async with sessions() as session:
+                statement = (
+                    update(Product).where(Product.id == product_id)
+                    .values(name="Updated", price=1.0, in_stock=True)
+                    .returning(Product).execution_options(synchronize_session=False)
+                )
+                (await session.exec(statement)).scalar_one()
+                await session.commit()
+
+    async def delete_returning():
+        for product_id in ids:
+            async with sessions() as session:
+                (await session.exec(delete(Product).where(Product.id == product_id).returning(Product.id))).scalar_one()
+                await session.commit()
+
+    await timed("create (add/commit/refresh)", ROWS, create)
+    await timed(f"list all {ROWS} rows", 20, read_list)
+    await timed("update: load + save", ROWS, load_and_save)
+    await timed("update: UPDATE ... RETURNING", ROWS, update_returning)
+    await timed("delete: DELETE ... RETURNING", ROWS, delete_returning)
+    await engine.dispose()
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as folder:
+        await bench_database("sqlite", f"sqlite:///{folder}/bench.db")
+    postgres_url = os.getenv("BENCH_POSTGRES_URL")
+    if postgres_url:
+        await bench_database("postgres", postgres_url)
+    else:
+        print("(set BENCH_POSTGRES_URL to include Postgres)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
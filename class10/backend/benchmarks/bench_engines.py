@@ -0,0 +1,124 @@
+"""
+Benchmark: requests/sec for the sync (def + Session) and async
+(async def + AsyncSession) database paths, with many requests in flight.
+
+Runs against a local SQLite file. To include Postgres, start one locally
+(e.g. docker run -e POSTGRES_PASSWORD=pw -p 5432:5432 postgres) and set:
+    BENCH_POSTGRES_URL=postgresql://postgres:pw@localhost:5432/postgres
+
+Run from the backend folder:
+    uv run python benchmarks/bench_engines.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import make_async_engine, make_engine
+from main import Product
+
+REQUESTS = 2_000
+CONCURRENCY = 50
+
+
+def sync_app(url: str) -> tuple[FastAPI, object]:
+    engine = make_engine(url)
+    SQLModel.metadata.create_all(engine)
+    app = FastAPI()
+
+    def get_session():
+        with Session(engine) as session:
+            yield session
+
+    @app.post("/products")
+    def create_product(product: Product, session: Session = Depends(get_session)):
+        product.id = None
+        session.add(product)
+        session.commit()
+        session.refresh(product)
+        return product
+
+    @app.get("/products/count")
+    def count_products(session: Session = Depends(get_session)):
+        return len(session.exec(select(Product.id).limit(100)).all())
+
+    return app, engine
+
+
+def async_app(url: str) -> tuple[FastAPI, object]:
+    engine = make_async_engine(url)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    app = FastAPI()
+
+    async def get_session():
+        async with session_maker() as session:
+            yield session
+
+    @app.post("/products")
+    async def create_product(product: Product, session: AsyncSession = Depends(get_session)):
+        product.id = None
+        session.add(product)
+        await session.commit()
+        await session.refresh(product)
+        return product
+
+    @app.get("/products/count")
+    async def count_products(session: AsyncSession = Depends(get_session)):
+        return len((await session.exec(select(Product.id).limit(100))).all())
+
+    return app, engine
+
+
+async def run(app: FastAPI, method: str, path: str) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def one(i: int):
+            async with semaphore:
+                if method == "POST":
+                    response = await client.post(path, json={"name": f"Product {i}", "price": i * 1.5, "in_stock": i % 2 == 0})
+                else:
+                    response = await client.get(path)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(REQUESTS)))
+        return REQUESTS / (time.perf_counter() - start)
+
+
+async def bench_database(name: str, url: str) -> None:
+    sync, sync_engine = sync_app(url)
+    async_, async_engine = async_app(url)
+    for label, app in (("sync ", sync), ("async", async_)):
+        writes = await run(app, "POST", "/products")
+        reads = await run(app, "GET", "/products/count")
+        print(f"{name:<9} {label} {writes:>12,.0f} {reads:>12,.0f}")
+    sync_engine.dispose()
+    await async_engine.dispose()
+
+
+async def main():
+    print(f"{REQUESTS} requests, {CONCURRENCY} in flight, pool_size={os.getenv('DB_POOL_SIZE', '5')}")
+    print(f"{'database':<9} {'path':<5} {'writes/sec':>12} {'reads/sec':>12}")
+    with tempfile.TemporaryDirectory() as folder:
+        await bench_database("sqlite", f"sqlite:///{folder}/bench.db")
+    postgres_url = os.getenv("BENCH_POSTGRES_URL")
+    if postgres_url:
+        await bench_database("postgres", postgres_url)
+    else:
+        print("(set BENCH_POSTGRES_URL to include Postgres)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
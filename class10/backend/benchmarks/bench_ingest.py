@@ -0,0 +1,77 @@
+"""
+Benchmark: loading 100k products through POST /products/bulk (CSV and
+NDJSON) vs. one POST /products request per product.
+
+The per-row endpoint runs at a steady rate, so it is timed on the first
+PER_ROW_SAMPLE products and projected to the full 100k.
+
+Uses a temporary SQLite database. For Postgres (COPY path) set:
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/postgres
+
+Run from the backend folder:
+    uv run python benchmarks/bench_ingest.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+import main
+from database import make_engine
+
+engine = make_engine()
+
+ROWS = 100_000
+PER_ROW_SAMPLE = 5_000
+
+
+def product(i: int) -> dict:
+    return {"name": f"Product {i}", "price": round(i * 1.5, 2), "in_stock": i % 2 == 0}
+
+
+def per_row(client: TestClient) -> float:
+    start = time.perf_counter()
+    for i in range(PER_ROW_SAMPLE):
+        client.post("/products", json=product(i)).raise_for_status()
+    return PER_ROW_SAMPLE / (time.perf_counter() - start)
+
+
+def bulk(client: TestClient, format: str) -> tuple[float, int]:
+    if format == "csv":
+        lines = ["name,price,in_stock"] + [f"{p['name']},{p['price']},{p['in_stock']}" for p in map(product, range(ROWS))]
+        body, content_type = "\n".join(lines), "text/csv"
+    else:
+        body, content_type = "\n".join(json.dumps(product(i)) for i in range(ROWS)), "application/x-ndjson"
+
+    start = time.perf_counter()
+    response = client.post("/products/bulk", content=body.encode(), headers={"content-type": content_type})
+    response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    result = response.json()
+    assert result["inserted"] == ROWS and len(result["ids"]) == ROWS, result["errors"]
+    return ROWS / elapsed, result["rows_per_sec"]
+
+
+def main_benchmark():
+    SQLModel.metadata.drop_all(engine)
+    with TestClient(main.app) as client:
+        print(f"{engine.dialect.name}: {ROWS:,} products")
+        print(f"{'route':<36} {'rows/sec':>10} {'server rows/sec':>16} {'100k takes':>11}")
+
+        rate = per_row(client)
+        print(f"{'POST /products (one per request)':<36} {rate:>10,.0f} {'':>16} {ROWS / rate:>10.1f}s")
+        for format in ("csv", "ndjson"):
+            rate, server_rate = bulk(client, format)
+            print(f"{'POST /products/bulk (' + format + ')':<36} {rate:>10,.0f} {server_rate:>16,} {ROWS / rate:>10.1f}s")
+
+
+if __name__ == "__main__":
+    main_benchmark()
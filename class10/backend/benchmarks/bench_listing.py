@@ -0,0 +1,97 @@
+"""
+Benchmark: GET /products latency (p50 / p99) on a 1M-row table.
+
+Compares keyset pages with the OFFSET pagination they replace, filtered
+and sorted listings, and cache misses vs. hits.
+
+Uses a temporary SQLite database. For Postgres set:
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/postgres
+
+Run from the backend folder:
+    uv run python benchmarks/bench_listing.py
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import main
+from database import get_async_session, make_engine
+from main import Product, encode_cursor, product_cache
+
+engine = make_engine()
+
+ROWS = 1_000_000
+REQUESTS = 300
+DEEP = 900_000  # "page 9000" of 100
+
+
+# The old way, for comparison only: skip DEEP rows, then take 100
+@main.app.get("/bench/offset")
+async def offset_page(offset: int, session: AsyncSession = Depends(get_async_session)):
+    rows = (await session.exec(select(*main.LIST_COLUMNS).order_by(Product.id).offset(offset).limit(100))).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def load_rows() -> None:
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    batch = 50_000
+    with engine.begin() as conn:
+        for start in range(0, ROWS, batch):
+            conn.execute(insert(Product.__table__), [
+                {"name": f"Product {i:07d}", "price": (i * 7919 % 100_000) / 100, "in_stock": i % 3 != 0}
+                for i in range(start, start + batch)
+            ])
+
+
+def latency(client: TestClient, url: str, params: dict) -> tuple[float, float]:
+    timings = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        client.get(url, params=params).raise_for_status()
+        timings.append((time.perf_counter() - start) * 1000)
+    quantiles = statistics.quantiles(timings, n=100)
+    return quantiles[49], quantiles[98]
+
+
+def main_benchmark():
+    start = time.perf_counter()
+    load_rows()
+    print(f"{engine.dialect.name}: loaded {ROWS:,} rows in {time.perf_counter() - start:.1f}s, {REQUESTS} requests per case")
+
+    cases = [
+        ("first page (limit=100)", "/products", {"limit": 100}),
+        ("keyset page at row 900k", "/products", {"limit": 100, "cursor": encode_cursor(DEEP, DEEP)}),
+        ("OFFSET page at row 900k", "/bench/offset", {"offset": DEEP}),
+        ("in_stock + price range, sort=price", "/products",
+         {"limit": 100, "in_stock": "true", "min_price": 100, "max_price": 200, "sort": "price"}),
+        ("sort=-price, deep cursor", "/products", {"limit": 100, "sort": "-price", "cursor": encode_cursor(250.0, DEEP)}),
+    ]
+    print(f"{'case':<36} {'cache':<6} {'p50 ms':>8} {'p99 ms':>8}")
+    with TestClient(main.app) as client:
+        for name, url, params in cases:
+            product_cache.ttl = 0  # every request is a miss
+            p50, p99 = latency(client, url, params)
+            print(f"{name:<36} {'miss':<6} {p50:>8.2f} {p99:>8.2f}")
+            if url == "/products":
+                product_cache.ttl = 60
+                p50, p99 = latency(client, url, params)
+                print(f"{'':<36} {'hit':<6} {p50:>8.2f} {p99:>8.2f}")
+    print()
+    print(product_cache.render_metrics("product_cache"))
+
+
+if __name__ == "__main__":
+    main_benchmark()
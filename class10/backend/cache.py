@@ -0,0 +1,80 @@
+"""
+A small read-through cache with a time limit (TTL).
+
+"Read-through" means: look in the cache first; on a miss, ask the
+database, keep the answer for `ttl` seconds and return it. The next
+identical request is answered from memory without touching the database.
+
+When a product is created, changed or deleted every cached answer may be
+out of date, so writes call invalidate() and the cache starts empty. A
+query that was already running when the write happened must not put its
+(old) answer back afterwards — that is what `generation` is for: an
+answer is only stored if no write happened while it was being computed.
+
+The cache lives in one process. With several server workers each has
+its own, and a write only clears the cache of the worker that handled
+it — the others catch up within `ttl` seconds.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    def __init__(self, ttl: float = 5.0, max_size: int = 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        """The cached value, or None (a miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]  # expired
+            self.misses += 1
+            return None
+
+    def put(self, key, value, generation: int) -> None:
+        """Store a value computed when `generation` was current."""
+        with self._lock:
+            if generation != self.generation:
+                return  # a write happened meanwhile, the value may be stale
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)  # least recently used
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def render_metrics(self, name: str) -> str:
+        """Prometheus text format, for a /metrics endpoint."""
+        return (
+            f"# HELP {name}_requests_total Cache lookups by result.\n"
+            f"# TYPE {name}_requests_total counter\n"
+            f'{name}_requests_total{{result="hit"}} {self.hits}\n'
+            f'{name}_requests_total{{result="miss"}} {self.misses}\n'
+            f"# HELP {name}_invalidations_total Times a write cleared the cache.\n"
+            f"# TYPE {name}_invalidations_total counter\n"
+            f"{name}_invalidations_total {self.invalidations}\n"
+            f"# HELP {name}_entries Answers currently cached.\n"
+            f"# TYPE {name}_entries gauge\n"
+            f"{name}_entries {len(self)}\n"
+        )
@@ -0,0 +1,93 @@
+"""
+Database engine, connection pool settings and the session dependency.
+
+Opening a connection to Postgres (especially a cloud one like Neon) takes
+a network round trip plus a TLS handshake. A connection POOL keeps a few
+connections open and lends them out to requests, like a library lending
+books instead of printing a new one for every reader.
+
+The app uses `async_engine` + get_async_session() from `async def`
+routes: while one request waits for the database, the event loop serves
+others. make_engine() builds a sync engine with the same settings, for
+scripts, tests and benchmarks that need one.
+
+Pool settings (environment variables):
+  DB_POOL_SIZE      connections kept open              (default 5)
+  DB_MAX_OVERFLOW   extra connections under load       (default 10)
+  DB_POOL_TIMEOUT   seconds to wait for a free one     (default 30)
+  DB_POOL_RECYCLE   reopen connections older than this (default 1800 s)
+  DB_POOL_PRE_PING  test a connection before using it  (default true)
+
+pre-ping and recycle matter for Neon: it closes idle connections, and
+without them the first request after a quiet period fails.
+"""
+
+import os
+from typing import AsyncGenerator
+
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./products.db")
+
+# The async driver for each database
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def pool_settings() -> dict:
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+    }
+
+
+def to_async_url(url: str) -> tuple[str, dict]:
+    """
+    "postgresql://..." -> "postgresql+asyncpg://...", "sqlite:///x.db" -> "sqlite+aiosqlite:///x.db".
+    Returns (url, connect_args). asyncpg doesn't understand libpq's
+    ?sslmode=require, so that option is moved into connect_args.
+    """
+    parsed = make_url(url)
+    dialect = parsed.get_backend_name()
+    if dialect not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {dialect!r} databases")
+
+    connect_args = {}
+    query = dict(parsed.query)
+    if dialect == "postgresql":
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)  # libpq only
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = sslmode
+    async_url = parsed.set(drivername=ASYNC_DRIVERS[dialect], query=query)
+    return async_url.render_as_string(hide_password=False), connect_args
+
+
+def make_engine(url: str = DATABASE_URL, **overrides):
+    return create_engine(url, **{**pool_settings(), **overrides})
+
+
+def make_async_engine(url: str = DATABASE_URL, **overrides):
+    async_url, connect_args = to_async_url(url)
+    return create_async_engine(async_url, connect_args=connect_args, **{**pool_settings(), **overrides})
+
+
+async_engine = make_async_engine()
+
+# expire_on_commit=False: returned objects stay readable after commit
+# (an async session can't lazily reload them later)
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """Async session for one request, returned to the pool afterwards."""
+    async with async_session_maker() as session:
+        yield session
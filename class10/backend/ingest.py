@@ -0,0 +1,139 @@
+"""
+Bulk ingestion: read many rows from a streamed CSV or NDJSON upload and
+insert them in chunks.
+
+Inserting rows one request at a time means one transaction and two
+round trips (INSERT, then SELECT the new id) per row. Here rows are
+grouped into chunks and each chunk is ONE transaction:
+  - Postgres (asyncpg): ids are reserved from the table's sequence in a
+    single query, then the rows go in with COPY, Postgres's fast path
+    for loading data.
+  - anything else (SQLite): one multi-row INSERT ... RETURNING id
+    (SQLAlchemy's executemany), ids come back in the same order.
+
+The upload is parsed line by line while it arrives, so a 100k-row file
+never has to be held in memory in one piece. A CSV value in quotes may
+span several lines; one csv.reader reads the whole upload, so the row
+after it still lines up with the header.
+"""
+
+import codecs
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator
+
+from sqlalchemy import Table, insert, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+CHUNK_SIZE = 1_000
+
+
+async def read_lines(byte_chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a streamed body into text lines (without the newline)."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in byte_chunks:
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+class _LineFeed:
+    """The lines a csv.reader reads from. read_rows adds each one as it arrives."""
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def read_rows(byte_chunks: AsyncIterator[bytes], format: str) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    Yield (line number, row, error) for every non-empty line. format is
+    "csv" (first line is the header) or "ndjson" (one JSON object per line).
+    A CSV row that spans several lines is reported with its first line.
+    """
+    header = None
+    line_number = 0
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    in_quotes = False  # the current CSV value goes on past this line
+    row_start = 0
+    async for line in read_lines(byte_chunks):
+        line_number += 1
+        if not line.strip() and not in_quotes:
+            continue
+        if format == "ndjson":
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"invalid JSON: {e}"
+                continue
+            if isinstance(row, dict):
+                yield line_number, row, None
+            else:
+                yield line_number, None, "expected a JSON object"
+            continue
+
+        if not in_quotes:
+            row_start = line_number
+        feed.lines.append(line + "\n")  # the reader keeps newlines inside quotes
+        if line.count('"') % 2:
+            in_quotes = not in_quotes
+        if in_quotes:
+            continue  # hand the reader the whole row at once
+
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            yield row_start, None, f"invalid CSV: {e}"
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield row_start, None, f"expected {len(header)} columns, got {len(values)}"
+        else:
+            yield row_start, dict(zip(header, values)), None
+
+    if in_quotes:
+        yield row_start, None, "quoted value is never closed"
+
+
+async def insert_rows(session: AsyncSession, table: Table, rows: list[dict]) -> list[int]:
+    """Insert rows (dicts of column values) and return their new ids, in order."""
+    if not rows:
+        return []
+    connection = await session.connection()
+    if connection.dialect.driver == "asyncpg":
+        return await _copy_rows(session, table, rows)
+    statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    result = await session.exec(statement, params=rows)
+    return list(result.scalars())
+
+
+async def _copy_rows(session: AsyncSession, table: Table, rows: list[dict]) -> list[int]:
+    # COPY can't return the generated ids, so take them from the sequence first
+    result = await session.exec(
+        text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+        params={"table": table.name, "count": len(rows)},
+    )
+    ids = list(result.scalars())
+    columns = ["id", *rows[0]]
+    records = [(new_id, *(row[column] for column in columns[1:])) for new_id, row in zip(ids, rows)]
+
+    # Same connection (and transaction) as the session, unwrapped to asyncpg
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(table.name, records=records, columns=columns)
+    return ids
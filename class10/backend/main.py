@@ -1,37 +1,65 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi import Depends
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Field, SQLModel, create_engine, Session
-from typing import Optional, Generator
+from sqlalchemy import Index, tuple_
+from sqlmodel import Field, SQLModel, delete, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Optional
+import base64
+import json
 import os
-from dotenv import load_dotenv
+import time
 
-load_dotenv()
+# Engines, pool settings and session dependencies live in database.py
+from database import async_engine, get_async_session
+from ingest import CHUNK_SIZE, insert_rows, read_rows
+from cache import TTLCache
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
+def create_missing_indexes(conn):
+    """create_all() skips tables that already exist, so add new indexes to them here."""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
 
-def create_db_and_tables():
+async def create_db_and_tables():
     """Create the database and tables."""
-    SQLModel.metadata.create_all(engine)
-
-def get_session() -> Generator[Session, None, None]:
-    """Get database session"""
-    with Session(engine) as session:
-        yield session
+    async with async_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
 
 app = FastAPI()
 
 @app.on_event("startup")
-def on_startup():
-    create_db_and_tables()
+async def on_startup():
+    await create_db_and_tables()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Close the pooled connections cleanly
+    await async_engine.dispose()
 
 # SQL MODEL CLASS
 
 
 class Product(SQLModel, table=True):
+    # Listing sorted by price reads these indexes in order, no sort step:
+    # (price, id) for all products, (in_stock, price, id) for "in stock only"
+    __table_args__ = (
+        Index("ix_product_price_id", "price", "id"),
+        Index("ix_product_in_stock_price_id", "in_stock", "price", "id"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
+    # Indexed: lookups by name and "in stock only" lists don't scan the whole table
+    name: str = Field(index=True)
+    price: float
+    in_stock: bool = Field(index=True)
+
+
+class ProductIn(SQLModel):
+    """A product as sent by a client: create, update and bulk upload bodies (table models skip validation, this one doesn't)."""
     name: str
     price: float
     in_stock: bool
@@ -45,22 +73,100 @@ class Blog(SQLModel, table=True):
     rating: Optional[int] = None
 
 
-products_db = [
-    {"id": 1, "name": "Laptop", "price": 999.99, "in_stock": True},
-    {"id": 2, "name": "Smartphone", "price": 499.99, "in_stock": False},
-]
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# ---------- Listing: keyset pagination + filters + cache ----------
+# GET /products?in_stock=true&min_price=10&sort=-price&limit=50
+# The response has an X-Next-Cursor header while there are more pages;
+# pass it back as ?cursor=... for the next one.
+#
+# Keyset pagination: instead of "skip the first 10,000 rows" (OFFSET, which
+# still reads those rows) we ask for "rows after the last one you saw":
+#   WHERE (price, id) > (last_price, last_id) ORDER BY price, id LIMIT 50
+# The database jumps straight there using the index, so page 1000 is as
+# fast as page 1. The cursor is that (sort value, id) pair, base64-encoded.
+#
+# Answers are cached for PRODUCT_CACHE_TTL seconds (see cache.py) and
+# every create/update/delete clears the cache. Hits and misses: GET /metrics
+SORTS = {
+    "id": Product.id, "-id": Product.id,
+    "price": Product.price, "-price": Product.price,
+    "name": Product.name, "-name": Product.name,
+}
+LIST_COLUMNS = (Product.id, Product.name, Product.price, Product.in_stock)
+product_cache = TTLCache(ttl=float(os.getenv("PRODUCT_CACHE_TTL", "5")), max_size=1024)
+
+def encode_cursor(sort_value, product_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, product_id]).encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        sort_value, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return sort_value, int(product_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+async def list_products(session: AsyncSession, sort: str, cursor: Optional[str], limit: int,
+                        in_stock: Optional[bool], min_price: Optional[float], max_price: Optional[float]) -> tuple[bytes, Optional[str]]:
+    column, descending = SORTS[sort], sort.startswith("-")
+    statement = select(*LIST_COLUMNS)
+    if in_stock is not None:
+        statement = statement.where(Product.in_stock == in_stock)
+    if min_price is not None:
+        statement = statement.where(Product.price >= min_price)
+    if max_price is not None:
+        statement = statement.where(Product.price <= max_price)
+    if cursor is not None:
+        sort_value, last_id = decode_cursor(cursor)
+        if column is Product.id:
+            statement = statement.where(Product.id < last_id if descending else Product.id > last_id)
+        else:
+            key = tuple_(column, Product.id)
+            statement = statement.where(key < (sort_value, last_id) if descending else key > (sort_value, last_id))
+    order = [column.desc(), Product.id.desc()] if descending else [column, Product.id]
+    if column is Product.id:
+        order = order[:1]
+    # One extra row tells us whether there is a next page
+    rows = (await session.exec(statement.order_by(*order).limit(limit + 1))).all()
+
+    products = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = products[-1]
+        next_cursor = encode_cursor(last[column.key], last["id"])
+    return json.dumps(products).encode(), next_cursor
+
 @app.get("/products")
-async def read_root():
-    return products_db
+async def read_root(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    sort: str = Query("id", pattern="^-?(id|price|name)$", description="id, price or name; prefix - for descending"),
+    in_stock: Optional[bool] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    key = (limit, cursor, sort, in_stock, min_price, max_price)
+    cached = product_cache.get(key)
+    if cached is None:
+        generation = product_cache.generation
+        cached = await list_products(session, sort, cursor, limit, in_stock, min_price, max_price)
+        product_cache.put(key, cached, generation)
+
+    body, next_cursor = cached
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(product_cache.render_metrics("product_cache"), media_type="text/plain; version=0.0.4")
 
 
 """
@@ -76,13 +182,15 @@ so data disappears when the server restarts.
 #     return {"message": "Products created successfully (in-memory)."}
 
 @app.post("/products")
-def create_product(product: Product, session: Session = Depends(get_session)):
-    # Beginner-friendly: insert into DB using SQLModel session
-    # Ensure id is None so DB can auto-generate if configured
-    product.id = None
+async def create_product(product_in: ProductIn, session: AsyncSession = Depends(get_async_session)):
+    # Beginner-friendly: insert into DB using an async SQLModel session
+    # (borrowed from the pool by get_async_session, returned after the request)
+    # ProductIn has no id, so the DB always generates it
+    product = Product.model_validate(product_in)
     session.add(product)
-    session.commit()  # write changes
-    session.refresh(product)  # get auto-generated fields like id
+    await session.commit()  # write changes
+    product_cache.invalidate()  # cached product lists are out of date now
+    await session.refresh(product)  # get auto-generated fields like id
     return {"message": "Product created successfully.", "product": product}
 
     
@@ -90,23 +198,96 @@ def create_product(product: Product, session: Session = Depends(get_session)):
     return {"message": "Products created successfully."}
 
 
+# ---------- Bulk ingestion ----------
+# POST /products/bulk with a CSV file (Content-Type: text/csv, header line
+# "name,price,in_stock") or NDJSON (application/x-ndjson, one JSON product
+# per line). Rows are validated and inserted CHUNK_SIZE at a time, one
+# transaction per chunk (see ingest.py). Invalid rows are skipped and
+# reported with their line number; the valid ones are still inserted.
+product_rows = TypeAdapter(list[ProductIn])
+MAX_REPORTED_ERRORS = 100
+
+def validate_chunk(chunk: list[tuple[int, dict]], errors: list) -> list[dict]:
+    try:
+        # Fast path: the whole chunk in one call
+        return [product.model_dump() for product in product_rows.validate_python([row for _, row in chunk])]
+    except ValidationError:
+        pass
+    rows = []
+    for line_number, row in chunk:
+        try:
+            rows.append(ProductIn.model_validate(row).model_dump())
+        except ValidationError as e:
+            first = e.errors()[0]
+            field = ".".join(str(part) for part in first["loc"])
+            errors.append({"line": line_number, "error": f"{field}: {first['msg']}"})
+    return rows
+
+@app.post("/products/bulk")
+async def ingest_products(request: Request, session: AsyncSession = Depends(get_async_session)):
+    content_type = request.headers.get("content-type", "")
+    format = "csv" if content_type.startswith("text/csv") else "ndjson"
+    start = time.perf_counter()
+    ids, errors, chunk = [], [], []
+
+    async def flush():
+        new_ids = await insert_rows(session, Product.__table__, validate_chunk(chunk, errors))
+        await session.commit()
+        if new_ids:
+            product_cache.invalidate()
+        ids.extend(new_ids)
+        chunk.clear()
+
+    async for line_number, row, error in read_rows(request.stream(), format):
+        if error is not None:
+            errors.append({"line": line_number, "error": error})
+            continue
+        chunk.append((line_number, row))
+        if len(chunk) == CHUNK_SIZE:
+            await flush()
+    await flush()
+
+    seconds = time.perf_counter() - start
+    return {
+        "inserted": len(ids),
+        "failed": len(errors),
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(len(ids) / seconds) if seconds else None,
+        "ids": ids,
+        "errors": sorted(errors, key=lambda error: error["line"])[:MAX_REPORTED_ERRORS],
+    }
+
+# Update and delete are ONE statement each: the database finds the row by
+# primary key, changes it and sends it back (RETURNING) in a single round
+# trip — no "load the row, modify it in Python, save it again".
+
 @app.delete("/products/{product_id}")
-async def delete_product(product_id: int):
-    global products_db
-    new_products = []
-    for product in products_db:
-        if product["id"] != product_id:
-            new_products.append(product)
-    products_db = new_products
+async def delete_product(product_id: int, session: AsyncSession = Depends(get_async_session)):
+    statement = delete(Product).where(Product.id == product_id).returning(Product.id)
+    result = await session.exec(statement)
+    deleted_id = result.scalar_one_or_none()
+    await session.commit()
+    if deleted_id is None:
+        raise HTTPException(status_code=404, detail="Product not found.")
+    product_cache.invalidate()
     return {"message": "Product deleted successfully."}
 
 @app.put("/products/{product_id}")
-async def update_product(product_id: int, updated_product: Product):
-    for index, product in enumerate(products_db):
-        if product["id"] == product_id:
-            products_db[index] = updated_product.dict()
-            return {"message": f"{updated_product.name} updated successfully."}
-    return {"message": "Product not found."}
+async def update_product(product_id: int, updated_product: ProductIn, session: AsyncSession = Depends(get_async_session)):
+    statement = (
+        update(Product)
+        .where(Product.id == product_id)
+        .values(name=updated_product.name, price=updated_product.price, in_stock=updated_product.in_stock)
+        .returning(Product)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.exec(statement)
+    product = result.scalar_one_or_none()
+    await session.commit()
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found.")
+    product_cache.invalidate()
+    return {"message": f"{product.name} updated successfully.", "product": product}
 
 if __name__ == "__main__":
     main()
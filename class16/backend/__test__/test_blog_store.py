@@ -0,0 +1,150 @@
+import sys
+import os
+import threading
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from blog_store import BlogStore, BulkError
+from search_index import BlogSearchIndex
+
+
+def make_store(count):
+    store = BlogStore()
+    for i in range(1, count + 1):
+        store.create(f"Blog {i}", f"About {i}")
+    return store
+
+
+def ids(blogs):
+    return [blog["id"] for blog in blogs]
+
+
+def all_pages(store, limit):
+    pages, cursor = [], None
+    while True:
+        blogs, cursor = store.page(after_id=cursor, limit=limit)
+        pages.append(ids(blogs))
+        if cursor is None:
+            return pages
+
+
+# ---- Paging ----
+
+def test_pages_cover_every_blog_once():
+    store = make_store(10)
+    assert all_pages(store, 4) == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10]]
+
+
+def test_last_full_page_has_no_cursor():
+    store = make_store(8)
+    assert store.page(after_id=4, limit=4) == (store.all()[4:], None)
+
+
+def test_no_limit_returns_the_rest():
+    blogs, cursor = make_store(5).page(after_id=2)
+    assert ids(blogs) == [3, 4, 5] and cursor is None
+
+
+def test_cursor_of_a_deleted_blog_still_works():
+    store = make_store(6)
+    store.delete(3)
+    assert ids(store.page(after_id=3, limit=2)[0]) == [4, 5]
+
+
+def test_pages_skip_deleted_blogs():
+    store = make_store(10)
+    for blog_id in (2, 3, 7, 10):
+        store.delete(blog_id)
+    assert all_pages(store, 3) == [[1, 4, 5], [6, 8, 9]]
+    assert ids(store.all()) == [1, 4, 5, 6, 8, 9]
+
+
+def test_empty_store():
+    assert BlogStore().page(limit=10) == ([], None)
+
+
+# ---- Ids that don't arrive in order ----
+
+def test_out_of_order_ids_are_listed_by_id():
+    # What a log replay or a bulk import can do: ids arrive out of order
+    store = BlogStore()
+    for blog_id in (5, 2, 9, 1):
+        store._put(blog_id, f"Blog {blog_id}", "")
+    store._remove(2)
+    store._put(3, "Blog 3", "")
+    assert ids(store.all()) == [1, 3, 5, 9]
+    assert all_pages(store, 2) == [[1, 3], [5, 9]]
+    assert store.create("New", "")["id"] == 10
+
+
+def test_delete_everything_then_create():
+    store = make_store(3)
+    for blog_id in (2, 1, 3):
+        store.delete(blog_id)
+    assert store.all() == [] and store.page() == ([], None)
+    assert store.create("Again", "")["id"] == 4
+
+
+# ---- Bulk ----
+
+def test_atomic_apply_fails_without_changes():
+    store = make_store(2)
+    with pytest.raises(BulkError) as error:
+        store.apply([("create", None, "A", ""), ("delete", 99, None, None)], atomic=True)
+    assert error.value.failed == [1]
+    assert ids(store.all()) == [1, 2]
+
+
+def test_apply_keeps_order_with_creates_and_deletes():
+    store = make_store(3)
+    store.apply([("delete", 2, None, None), ("create", None, "D", ""), ("update", 1, "A2", "")])
+    assert ids(store.all()) == [1, 3, 4]
+    assert store.get(1)["title"] == "A2"
+
+
+# ---- on_change ----
+
+def test_on_change_sees_every_change_in_order():
+    changes = []
+    store = BlogStore(on_change=lambda operation, blog: changes.append((operation, blog["id"], blog["title"])))
+    store.create("A", "")
+    store.update(1, "A2", "")
+    store.apply([("create", None, "B", ""), ("delete", 1, None, None)])
+    store.delete(2)
+    assert changes == [("put", 1, "A"), ("put", 1, "A2"), ("put", 2, "B"), ("delete", 1, "A2"), ("delete", 2, "B")]
+
+
+def test_failed_changes_are_not_reported():
+    changes = []
+    store = BlogStore(on_change=lambda operation, blog: changes.append(operation))
+    assert store.update(1, "A", "") is None and store.delete(1) is None
+    with pytest.raises(BulkError):
+        store.apply([("create", None, "A", ""), ("delete", 99, None, None)], atomic=True)
+    assert changes == []
+
+
+def test_index_follows_concurrent_updates():
+    index = BlogSearchIndex()
+
+    def on_change(operation, blog):
+        if operation == "delete":
+            index.remove(blog["id"])
+        else:
+            index.add(blog)
+
+    store = BlogStore(on_change=on_change)
+    store.create("start", "")
+
+    def writer(worker):
+        for i in range(300):
+            store.update(1, f"w{worker}x{i}", "")
+
+    threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    final = store.get(1)["title"]
+    assert [blog_id for blog_id, _ in index.search(final, prefix=False)] == [1]
+    assert len(index) == 1
@@ -0,0 +1,125 @@
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+os.environ.setdefault("BLOG_DURABILITY", "none")
+
+from fastapi.testclient import TestClient
+import main
+
+
+client = TestClient(main.app)
+existing = []  # two blogs made by setup_function
+
+
+def setup_module():
+    client.__enter__()  # runs the app's lifespan: opens the store in DATA_DIR
+
+
+def teardown_module():
+    client.__exit__(None, None, None)  # closes it, so the next test module can open it
+
+
+def setup_function():
+    for blog in main.blog_store.all():
+        client.delete(f"/api/blogs/{blog['id']}")
+    existing[:] = [client.post("/api/blogs", json={"title": f"Blog {i}", "description": ""}).json() for i in range(2)]
+
+
+def titles():
+    return [blog["title"] for blog in main.blog_store.all()]
+
+
+# ---- Atomic (default) ----
+
+def test_atomic_batch_applies_everything():
+    first, second = existing
+    response = client.post("/api/blogs/bulk", json=[
+        {"title": "New", "description": ""},
+        {"op": "update", "id": first["id"], "title": "Changed", "description": ""},
+        {"op": "delete", "id": second["id"]},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert body["applied"] == 3 and body["failed"] == 0
+    assert [result["status"] for result in body["results"]] == [201, 200, 200]
+    assert [result["id"] for result in body["results"]] == [second["id"] + 1, first["id"], second["id"]]
+    assert titles() == ["Changed", "New"]
+
+
+def test_atomic_batch_with_missing_blog_changes_nothing():
+    response = client.post("/api/blogs/bulk", json=[
+        {"title": "New", "description": ""},
+        {"op": "delete", "id": 10**9},
+    ])
+    assert response.status_code == 404
+    assert response.json()["detail"]["errors"] == [{"index": 1, "status": 404, "error": "Blog not found"}]
+    assert titles() == ["Blog 0", "Blog 1"]
+
+
+def test_atomic_batch_with_invalid_item_changes_nothing():
+    response = client.post("/api/blogs/bulk", json=[
+        {"title": "New", "description": ""},
+        {"op": "rename", "id": existing[0]["id"]},
+        {"title": 5, "description": ""},
+    ])
+    assert response.status_code == 422
+    errors = response.json()["detail"]["errors"]
+    assert [(error["index"], error["status"]) for error in errors] == [(1, 422), (2, 422)]
+    assert titles() == ["Blog 0", "Blog 1"]
+
+
+# ---- Non-atomic ----
+
+def test_non_atomic_batch_reports_each_item():
+    first, _ = existing
+    response = client.post("/api/blogs/bulk", params={"atomic": "false"}, json=[
+        {"title": "New", "description": ""},
+        {"op": "delete", "id": 10**9},
+        {"op": "update", "id": first["id"]},
+        {"op": "update", "id": first["id"], "title": "Changed", "description": ""},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert body["applied"] == 2 and body["failed"] == 2
+    results = body["results"]
+    assert results[0]["status"] == 201
+    assert results[1] == {"status": 404, "id": 10**9, "error": "Blog not found"}
+    assert results[2]["status"] == 422 and "title" in results[2]["error"]
+    assert results[3] == {"status": 200, "id": first["id"]}
+    assert titles() == ["Changed", "Blog 1", "New"]
+
+
+# ---- Body formats ----
+
+def test_ndjson_body():
+    lines = [{"title": f"Line {i}", "description": ""} for i in range(3)]
+    response = client.post(
+        "/api/blogs/bulk",
+        content="\n".join(json.dumps(line) for line in lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.json()["applied"] == 3
+    assert titles()[-3:] == ["Line 0", "Line 1", "Line 2"]
+
+
+def test_bad_body_is_400():
+    for content, content_type in [
+        ("{not json", "application/json"),
+        ('{"title": "an object, not an array"}', "application/json"),
+        ('{"title": "A", "description": ""}\n{broken', "application/x-ndjson"),
+    ]:
+        response = client.post("/api/blogs/bulk", content=content, headers={"Content-Type": content_type})
+        assert response.status_code == 400, content
+        assert response.json()["detail"].startswith("Invalid bulk body")
+    assert titles() == ["Blog 0", "Blog 1"]
+
+
+def test_too_many_items_is_413(monkeypatch):
+    monkeypatch.setattr(main, "MAX_BULK_ITEMS", 2)
+    response = client.post("/api/blogs/bulk", json=[{"title": "A", "description": ""}] * 3)
+    assert response.status_code == 413
+    assert titles() == ["Blog 0", "Blog 1"]
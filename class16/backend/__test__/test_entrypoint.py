@@ -0,0 +1,69 @@
+import sys
+import os
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+import httpx
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(data_dir: str, port: int) -> subprocess.Popen:
+    """`python main.py`, exactly as a developer runs it (uvicorn with reload=True)."""
+    env = {**os.environ, "DATA_DIR": data_dir, "PORT": str(port), "BLOG_DURABILITY": "always"}
+    return subprocess.Popen(
+        [sys.executable, "main.py"], cwd=BACKEND, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+
+
+def wait_until_up(server: subprocess.Popen, url: str) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            break
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise AssertionError(f"server did not start:\n{stop_server(server)}")
+
+
+def stop_server(server: subprocess.Popen) -> str:
+    if server.poll() is None:
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    return server.stdout.read()
+
+
+def test_python_main_py_serves_and_keeps_blogs():
+    with tempfile.TemporaryDirectory() as data_dir:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+
+        server = start_server(data_dir, port)
+        wait_until_up(server, url)
+        blog = httpx.post(f"{url}/api/blogs", json={"title": "Hello", "description": "World"}).json()
+        output = stop_server(server)
+        assert "StoreLockedError" not in output
+
+        # Started again on the same folder: the lock was released, the blog is back
+        server = start_server(data_dir, port)
+        wait_until_up(server, url)
+        assert httpx.get(f"{url}/api/blogs/{blog['id']}").json() == blog
+        assert [b["id"] for b in httpx.get(f"{url}/api/blogs/search", params={"q": "hello"}).json()] == [blog["id"]]
+        output = stop_server(server)
+        assert "StoreLockedError" not in output
@@ -0,0 +1,96 @@
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+os.environ.setdefault("BLOG_DURABILITY", "none")
+
+from fastapi.testclient import TestClient
+import main
+
+
+client = TestClient(main.app)
+created = []  # the blogs setup_function made, in id order
+
+
+def setup_module():
+    client.__enter__()  # runs the app's lifespan: opens the store in DATA_DIR
+
+
+def teardown_module():
+    client.__exit__(None, None, None)  # closes it, so the next test module can open it
+
+
+def setup_function():
+    """Start every test with blogs 1..5 (ids keep growing across tests)."""
+    for blog in main.blog_store.all():
+        client.delete(f"/api/blogs/{blog['id']}")
+    created[:] = [client.post("/api/blogs", json={"title": f"Blog {i}", "description": f"About {i}"}).json() for i in range(5)]
+
+
+def ndjson_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+# ---- JSON pages ----
+
+def test_list_returns_every_blog_in_id_order():
+    response = client.get("/api/blogs")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == created
+    assert "x-next-cursor" not in response.headers
+
+
+def test_pages_follow_the_cursor():
+    first = client.get("/api/blogs", params={"limit": 2})
+    assert first.json() == created[:2]
+    second = client.get("/api/blogs", params={"limit": 2, "cursor": first.headers["x-next-cursor"]})
+    assert second.json() == created[2:4]
+
+
+def test_fields_projection():
+    response = client.get("/api/blogs", params={"fields": "id,title"})
+    assert response.json()[0] == {"id": created[0]["id"], "title": "Blog 0"}
+
+
+def test_unknown_field_is_rejected():
+    assert client.get("/api/blogs", params={"fields": "id,password"}).status_code == 400
+
+
+# ---- NDJSON stream ----
+
+def test_ndjson_streams_one_blog_per_line():
+    response = client.get("/api/blogs", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    assert ndjson_lines(response) == created
+
+
+def test_ndjson_with_cursor_limit_and_fields():
+    response = client.get(
+        "/api/blogs", params={"format": "ndjson", "cursor": created[0]["id"], "limit": 3, "fields": "title"}
+    )
+    assert ndjson_lines(response) == [{"title": "Blog 1"}, {"title": "Blog 2"}, {"title": "Blog 3"}]
+
+
+def test_ndjson_spans_several_store_batches(monkeypatch):
+    monkeypatch.setattr(main, "STREAM_BATCH_SIZE", 2)
+    response = client.get("/api/blogs", params={"format": "ndjson"})
+    assert ndjson_lines(response) == created
+
+
+def test_ndjson_of_an_empty_list():
+    response = client.get("/api/blogs", params={"format": "ndjson", "cursor": created[-1]["id"]})
+    assert response.status_code == 200 and response.text == ""
+
+
+# ---- /docs describes what is really sent ----
+
+def test_openapi_documents_both_formats():
+    spec = client.get("/openapi.json").json()["paths"]["/api/blogs"]["get"]["responses"]["200"]
+    assert spec["content"]["application/json"]["schema"]["items"] == {"$ref": "#/components/schemas/Blog"}
+    assert "application/x-ndjson" in spec["content"]
+    assert "X-Next-Cursor" in spec["headers"]
@@ -0,0 +1,61 @@
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+os.environ.setdefault("BLOG_DURABILITY", "none")
+
+from fastapi.testclient import TestClient
+import main
+
+
+client = TestClient(main.app)
+
+
+def setup_module():
+    client.__enter__()  # runs the app's lifespan: opens the store in DATA_DIR
+
+
+def teardown_module():
+    client.__exit__(None, None, None)  # closes it, so the next test module can open it
+
+
+def setup_function():
+    for blog in main.blog_store.all():
+        client.delete(f"/api/blogs/{blog['id']}")
+
+
+def search(q):
+    return [blog["id"] for blog in client.get("/api/blogs/search", params={"q": q}).json()]
+
+
+# ---- The index follows every write ----
+
+def test_created_blog_is_found():
+    blog = client.post("/api/blogs", json={"title": "Penguins", "description": "cold birds"}).json()
+    assert search("penguins") == [blog["id"]]
+
+
+def test_updated_blog_is_found_by_new_text_only():
+    blog = client.post("/api/blogs", json={"title": "Penguins", "description": ""}).json()
+    client.put(f"/api/blogs/{blog['id']}", json={"title": "Otters", "description": ""})
+    assert search("penguins") == []
+    assert search("otters") == [blog["id"]]
+
+
+def test_deleted_blog_is_not_found():
+    blog = client.post("/api/blogs", json={"title": "Penguins", "description": ""}).json()
+    client.delete(f"/api/blogs/{blog['id']}")
+    assert search("penguins") == []
+
+
+def test_bulk_changes_reach_the_index():
+    first = client.post("/api/blogs", json={"title": "Penguins", "description": ""}).json()
+    response = client.post("/api/blogs/bulk", json=[
+        {"title": "Otters", "description": ""},
+        {"op": "delete", "id": first["id"]},
+    ])
+    otter_id = response.json()["results"][0]["id"]
+    assert search("penguins") == []
+    assert search("otters") == [otter_id]
+    assert len(main.search_index) == len(main.blog_store)
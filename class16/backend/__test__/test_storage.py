@@ -0,0 +1,140 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from storage import DurableBlogStore, StoreLockedError, read_segment, write_snapshot
+
+
+def open_store(folder, **kwargs):
+    return DurableBlogStore.open(folder, durability="none", snapshot_every=10**9, **kwargs)
+
+
+def segments(folder):
+    return sorted(path.name for path in folder.glob("wal-*.log"))
+
+
+@pytest.fixture
+def folder():
+    with tempfile.TemporaryDirectory() as name:
+        yield Path(name)
+
+
+def fill(folder, count):
+    store = open_store(folder)
+    for i in range(1, count + 1):
+        store.create(f"Blog {i}", f"About {i}")
+    store.close(snapshot=False)
+
+
+# ---- Recovery from the log ----
+
+def test_reopen_replays_the_log(folder):
+    store = open_store(folder)
+    store.create("A", "a")
+    store.create("B", "b")
+    store.update(1, "A2", "a2")
+    store.delete(2)
+    store.close(snapshot=False)
+
+    store = open_store(folder)
+    assert store.all() == [{"id": 1, "title": "A2", "description": "a2"}]
+    assert store.version == 4
+    assert store.create("C", "")["id"] == 3
+    store.close(snapshot=False)
+
+
+def test_torn_tail_is_cut_off(folder):
+    fill(folder, 3)
+    segment = folder / "wal-000001.log"
+    size = segment.stat().st_size
+    with open(segment, "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x00\x00")  # a record header the server never finished
+
+    store = open_store(folder)
+    assert len(store) == 3
+    assert segment.stat().st_size == size
+    store.create("After", "")
+    store.close(snapshot=False)
+
+    store = open_store(folder)
+    assert [blog["title"] for blog in store.all()] == ["Blog 1", "Blog 2", "Blog 3", "After"]
+    store.close(snapshot=False)
+
+
+def test_record_with_bad_checksum_ends_the_segment(folder):
+    fill(folder, 2)
+    segment = folder / "wal-000001.log"
+    data = bytearray(segment.read_bytes())
+    data[-1] ^= 0xFF  # damage the last record's payload
+    segment.write_bytes(bytes(data))
+
+    assert [record[1] for record in read_segment(segment)] == [1]
+    assert segment.stat().st_size < len(data)  # the damaged record was cut off
+
+
+# ---- Snapshots ----
+
+def test_replay_after_snapshot(folder):
+    store = open_store(folder)
+    for title in ("A", "B", "C"):
+        store.create(title, "")
+    store.snapshot()
+    store.update(1, "A2", "")
+    store.delete(2)
+    store.create("D", "")
+    store.close(snapshot=False)
+
+    store = open_store(folder)
+    assert [(blog["id"], blog["title"]) for blog in store.all()] == [(1, "A2"), (3, "C"), (4, "D")]
+    assert store.version == 6
+    assert store.create("E", "")["id"] == 5
+    store.close(snapshot=False)
+
+
+def test_snapshot_removes_the_segments_it_covers(folder):
+    store = open_store(folder)
+    store.create("A", "")
+    store.snapshot()
+    store.create("B", "")
+    store.snapshot()
+    assert segments(folder) == ["wal-000003.log"]
+    store.close(snapshot=False)
+
+    store = open_store(folder)
+    assert [blog["title"] for blog in store.all()] == ["A", "B"]
+    store.close(snapshot=False)
+
+
+def test_recovery_removes_segments_left_by_a_crash(folder):
+    # The server died after writing the snapshot but before deleting segment 1
+    fill(folder, 2)
+    write_snapshot(folder, [{"id": 1, "title": "Blog 1", "description": "About 1"}], 2, 1, 2)
+
+    store = open_store(folder)
+    assert segments(folder) == ["wal-000002.log"]
+    assert [blog["id"] for blog in store.all()] == [1]
+    store.close(snapshot=False)
+
+
+# ---- One process per folder ----
+
+def test_second_open_fails_while_the_folder_is_in_use(folder):
+    store = open_store(folder)
+    with pytest.raises(StoreLockedError):
+        open_store(folder)
+    store.close()
+
+    store = open_store(folder)
+    store.close()
+
+
+def test_failed_recovery_releases_the_lock(folder):
+    (folder / "snapshot.bin").write_bytes(b"not a snapshot")
+    with pytest.raises(ValueError):
+        open_store(folder)
+    (folder / "snapshot.bin").unlink()
+    store = open_store(folder)
+    store.close()
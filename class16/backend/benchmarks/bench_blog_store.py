@@ -0,0 +1,79 @@
+"""
+Benchmark: list scan vs BlogStore at 1M blogs.
+
+Run from the backend folder:
+    uv run python benchmarks/bench_blog_store.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from blog_store import BlogStore
+
+BLOGS = 1_000_000
+OPERATIONS = 200
+
+random.seed(3)
+
+
+def list_get(blogs_db, blog_id):
+    for blog in blogs_db:
+        if blog["id"] == blog_id:
+            return blog
+    return None
+
+
+def list_update(blogs_db, blog_id, title, description):
+    for i, blog in enumerate(blogs_db):
+        if blog["id"] == blog_id:
+            blogs_db[i] = {"id": blog_id, "title": title, "description": description}
+            return blogs_db[i]
+    return None
+
+
+def list_delete(blogs_db, blog_id):
+    for i, blog in enumerate(blogs_db):
+        if blog["id"] == blog_id:
+            return blogs_db.pop(i)
+    return None
+
+
+def timed(label, fn, ids):
+    start = time.perf_counter()
+    for blog_id in ids:
+        fn(blog_id)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<8} {elapsed / len(ids) * 1e6:>12.2f} us/op")
+
+
+def main():
+    ids = random.sample(range(1, BLOGS + 1), OPERATIONS)
+
+    start = time.perf_counter()
+    blogs_db = [{"id": i, "title": f"Blog {i}", "description": "text"} for i in range(1, BLOGS + 1)]
+    print(f"List: {BLOGS:,} blogs built in {time.perf_counter() - start:.2f} s")
+    timed("get", lambda i: list_get(blogs_db, i), ids)
+    timed("update", lambda i: list_update(blogs_db, i, "New", "text"), ids)
+    timed("delete", lambda i: list_delete(blogs_db, i), ids)
+    del blogs_db
+
+    store = BlogStore()
+    start = time.perf_counter()
+    for i in range(1, BLOGS + 1):
+        store.create(f"Blog {i}", "text")
+    print(f"BlogStore: {BLOGS:,} blogs built in {time.perf_counter() - start:.2f} s")
+    timed("get", store.get, ids)
+    timed("update", lambda i: store.update(i, "New", "text"), ids)
+    timed("delete", store.delete, ids)
+
+    ordered = [blog["id"] for blog in store.all()]
+    assert ordered == sorted(ordered), "insertion order must be preserved"
+    print(f"  order    preserved ({len(store):,} blogs left)")
+
+
+if __name__ == "__main__":
+    main()
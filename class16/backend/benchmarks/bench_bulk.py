@@ -0,0 +1,70 @@
+"""
+Benchmark: creating blogs one request at a time vs. through /api/blogs/bulk.
+
+Every mode uses a fresh data folder with the default "group" durability,
+so each single-item request also waits for its own fsync.
+
+Run from the backend folder:
+    uv run python benchmarks/bench_bulk.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["DATA_DIR"] = tempfile.mkdtemp()
+
+from fastapi.testclient import TestClient
+
+import main
+
+SINGLE_ITEMS = 2_000
+BULK_ITEMS = 20_000
+BATCH_SIZE = 1_000
+
+
+def blog(i: int) -> dict:
+    return {"title": f"Imported post {i}", "description": "Some description text for the blog post. " * 3}
+
+
+def single(client: TestClient) -> float:
+    start = time.perf_counter()
+    for i in range(SINGLE_ITEMS):
+        client.post("/api/blogs", json=blog(i)).raise_for_status()
+    return SINGLE_ITEMS / (time.perf_counter() - start)
+
+
+def bulk(client: TestClient, ndjson: bool, atomic: bool) -> float:
+    start = time.perf_counter()
+    for offset in range(0, BULK_ITEMS, BATCH_SIZE):
+        items = [blog(i) for i in range(offset, offset + BATCH_SIZE)]
+        url = f"/api/blogs/bulk?atomic={str(atomic).lower()}"
+        if ndjson:
+            body = "".join(json.dumps(item) + "\n" for item in items)
+            response = client.post(url, content=body, headers={"content-type": "application/x-ndjson"})
+        else:
+            response = client.post(url, json=items)
+        response.raise_for_status()
+    return BULK_ITEMS / (time.perf_counter() - start)
+
+
+def main_benchmark():
+    with TestClient(main.app) as client:
+        results = [
+            ("POST /api/blogs (one per request)", single(client)),
+            (f"bulk JSON array, atomic, {BATCH_SIZE}/request", bulk(client, ndjson=False, atomic=True)),
+            (f"bulk JSON array, per-item, {BATCH_SIZE}/request", bulk(client, ndjson=False, atomic=False)),
+            (f"bulk NDJSON, atomic, {BATCH_SIZE}/request", bulk(client, ndjson=True, atomic=True)),
+        ]
+
+    baseline = results[0][1]
+    print(f"{'route':<42} {'items/sec':>10} {'speedup':>8}")
+    for name, rate in results:
+        print(f"{name:<42} {rate:>10,.0f} {rate / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main_benchmark()
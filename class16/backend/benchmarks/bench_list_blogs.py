@@ -0,0 +1,101 @@
+"""
+Benchmark: GET /api/blogs before and after (time + peak memory).
+
+"before" is the original handler: return every blog through
+response_model=List[Blog] validation.
+
+Run from the backend folder:
+    uv run python benchmarks/bench_list_blogs.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# Keep benchmark blogs out of the real data folder
+os.environ["DATA_DIR"] = tempfile.mkdtemp()
+os.environ["BLOG_DURABILITY"] = "none"
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main
+from main import Blog
+
+BLOGS = 100_000
+
+
+def fetch(client: TestClient, url: str, stream: bool) -> int:
+    if not stream:
+        return len(client.get(url).content)
+    size = 0
+    with client.stream("GET", url) as response:
+        for chunk in response.iter_bytes():
+            size += len(chunk)
+    return size
+
+
+def measure(client: TestClient, url: str, stream: bool = False) -> tuple[float, float, int]:
+    # Time and memory are measured in separate runs: tracemalloc slows code down
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        size = fetch(client, url, stream)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fetch(client, url, stream)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak / 1024 / 1024, size
+
+
+def main_benchmark():
+    with TestClient(main.app) as after:  # the lifespan opens main.blog_store
+        run_cases(after)
+
+
+def run_cases(after: TestClient):
+    for i in range(BLOGS):
+        main.blog_store.create(f"Blog post number {i}", "Some description text for the blog post. " * 3)
+
+    before_app = FastAPI()
+
+    @before_app.get("/api/blogs", response_model=List[Blog])
+    def get_all_blogs_before():
+        return main.blog_store.all()
+
+    before = TestClient(before_app)
+
+    cases = [
+        ("before: response_model", before, "/api/blogs", False),
+        ("after: full list", after, "/api/blogs", False),
+        ("after: fields=id,title", after, "/api/blogs?fields=id,title", False),
+        ("after: ndjson stream", after, "/api/blogs?format=ndjson", True),
+        ("after: one page (100)", after, "/api/blogs?limit=100&cursor=50000", False),
+    ]
+
+    print(f"{BLOGS:,} blogs")
+    print(f"{'case':<26} {'time (ms)':>10} {'peak MB':>9} {'bytes':>12}")
+    for label, client, url, stream in cases:
+        elapsed, peak_mb, size = measure(client, url, stream)
+        print(f"{label:<26} {elapsed * 1000:>10.1f} {peak_mb:>9.1f} {size:>12,}")
+
+    # TestClient collects the whole streamed body, so the ndjson row above
+    # includes the client's copy. This is the server side on its own
+    # (its time is inflated by tracemalloc — only the peak matters here):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = sum(len(chunk) for chunk in main.stream_ndjson(None, None, None))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{'ndjson generator only':<26} {elapsed * 1000:>10.1f} {peak / 1024 / 1024:>9.1f} {size:>12,}")
+
+
+if __name__ == "__main__":
+    main_benchmark()
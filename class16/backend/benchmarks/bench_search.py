@@ -0,0 +1,84 @@
+"""
+Benchmark: search query latency at 100k blogs, plus save/load of the index.
+
+Run from the backend folder:
+    uv run python benchmarks/bench_search.py
+"""
+
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from search_index import BlogSearchIndex
+
+BLOGS = 100_000
+QUERIES = 300
+
+random.seed(11)
+
+# A Zipf-like vocabulary: a few very common words, many rare ones
+VOCABULARY = [f"word{i}" for i in range(20_000)] + [
+    "python", "fastapi", "docker", "kubernetes", "nextjs", "react", "tutorial", "beginner", "guide", "async",
+]
+CUMULATIVE_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+
+def random_text(words: int) -> str:
+    return " ".join(random.choices(VOCABULARY, cum_weights=CUMULATIVE_WEIGHTS, k=words))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    blogs = [{"id": i, "title": random_text(6), "description": random_text(60)} for i in range(1, BLOGS + 1)]
+
+    start = time.perf_counter()
+    index = BlogSearchIndex.build(blogs)
+    print(f"Indexed {BLOGS:,} blogs in {time.perf_counter() - start:.2f} s")
+
+    query_sets = {
+        "one rare word": [random.choice(VOCABULARY[5_000:]) for _ in range(QUERIES)],
+        "one common word": [random.choice(VOCABULARY[:20]) for _ in range(QUERIES)],
+        "two words": [f"{random.choice(VOCABULARY[:2_000])} {random.choice(VOCABULARY[:2_000])}" for _ in range(QUERIES)],
+        "prefix (word12)": ["word12"] * QUERIES,
+    }
+    print(f"{'query type':<18} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, queries in query_sets.items():
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, limit=10)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{label:<18} {statistics.median(timings):>8.3f} {percentile(timings, 0.99):>8.3f}")
+
+    updated = [{**blog, "title": random_text(6)} for blog in blogs[:1_000]]
+    start = time.perf_counter()
+    for blog in updated:
+        index.add(blog)
+    print(f"Incremental update: {(time.perf_counter() - start) / 1_000 * 1e6:.1f} us/blog")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "search_index.bin")
+        start = time.perf_counter()
+        index.save(path)
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = BlogSearchIndex.load(path)
+        load_time = time.perf_counter() - start
+        print(f"Save: {save_time:.2f} s, file {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        print(f"Load: {load_time:.2f} s (vs rebuild above)")
+        assert len(loaded) == len(index)
+        assert [i for i, _ in loaded.search("python tutorial")] == [i for i, _ in index.search("python tutorial")]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: writes/sec per durability mode, and time to recover 1M blogs.
+
+Run from the backend folder:
+    uv run python benchmarks/bench_storage.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from storage import DURABILITY_MODES, DurableBlogStore
+
+WRITES = {"none": 50_000, "group": 5_000, "always": 2_000}
+THREADS = 8
+RECOVERY_BLOGS = 1_000_000
+DESCRIPTION = "A short description of the blog post for benchmarking. " * 2
+
+
+def writes_per_second(mode: str, threads: int) -> float:
+    folder = Path(tempfile.mkdtemp())
+    store = DurableBlogStore.open(folder, durability=mode, snapshot_every=10**9)
+    per_thread = WRITES[mode] // threads
+
+    def writer():
+        for i in range(per_thread):
+            store.create(f"Blog {i}", DESCRIPTION)
+
+    workers = [threading.Thread(target=writer) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    store.close(snapshot=False)
+    shutil.rmtree(folder)
+    return per_thread * threads / elapsed
+
+
+def recovery_times() -> None:
+    folder = Path(tempfile.mkdtemp())
+    try:
+        store = DurableBlogStore.open(folder, durability="none", snapshot_every=10**9)
+        for i in range(RECOVERY_BLOGS):
+            store.create(f"Blog {i}", DESCRIPTION)
+        store.close(snapshot=False)
+        wal_size = sum(path.stat().st_size for path in folder.glob("wal-*.log"))
+
+        start = time.perf_counter()
+        store = DurableBlogStore.open(folder, durability="none")
+        print(f"Recover {len(store):,} blogs from the log only:   {time.perf_counter() - start:.2f} s "
+              f"({wal_size / 1024 / 1024:.0f} MB log)")
+
+        store.close(snapshot=True)
+        snapshot_size = (folder / "snapshot.bin").stat().st_size
+        start = time.perf_counter()
+        store = DurableBlogStore.open(folder, durability="none")
+        print(f"Recover {len(store):,} blogs from the snapshot:   {time.perf_counter() - start:.2f} s "
+              f"({snapshot_size / 1024 / 1024:.0f} MB snapshot)")
+        store.close(snapshot=False)
+    finally:
+        shutil.rmtree(folder)
+
+
+def main():
+    print(f"{'durability':<10} {'1 thread':>12} {f'{THREADS} threads':>12}   (writes/sec)")
+    for mode in DURABILITY_MODES:
+        single = writes_per_second(mode, 1)
+        many = writes_per_second(mode, THREADS)
+        print(f"{mode:<10} {single:>12,.0f} {many:>12,.0f}")
+    print()
+    recovery_times()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+In-memory blog storage with O(1) lookups.
+
+A plain list has to be scanned from the start to find a blog by id, and
+list.pop(i) shifts every item after i. A dict keyed by id finds, replaces
+and removes a blog in one step.
+
+A lock makes id generation and every write safe when FastAPI runs the sync
+route handlers on several threads at once.
+
+Listing and paging go by id, oldest first, so the ids are also kept in a
+sorted list. A new id is usually the largest and is simply appended; any
+other id (a log replay, a bulk import) is put in its place with a binary
+search, and a deleted id is found and removed the same way. A cursor is
+found with a binary search instead of walking the dict from the start.
+
+Every write also bumps `version`, and goes through _log()/_committed() —
+they do nothing here, but a durable store (see storage.py) uses them to
+write each change to disk.
+
+Anything that must change together with the blogs — the search index,
+say — can pass on_change(operation, blog). It is called for every change
+("put" or "delete") while the lock is still held, so it sees the changes
+in exactly the order the store made them.
+
+apply() runs a whole batch of writes under one lock and logs them as one
+batch, so an import of thousands of blogs takes the lock and waits for
+the disk once instead of once per blog.
+
+The store, and the id counter with it, lives in one process: run the
+app as a single worker (see storage.py).
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+
+
+class BulkError(Exception):
+    """An all-or-nothing batch was rejected. `failed` lists the item positions."""
+
+    def __init__(self, failed: list[int]):
+        super().__init__(f"{len(failed)} item(s) failed, nothing was applied")
+        self.failed = failed
+
+
+class BlogStore:
+    def __init__(self, on_change=None):
+        self._blogs: dict[int, dict] = {}
+        self._order: list[int] = []  # ids of the stored blogs, ascending
+        self._next_id = 1
+        self._on_change = on_change  # called with (operation, blog) under the lock
+        self.version = 0             # number of writes so far
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._blogs)
+
+    def all(self) -> list[dict]:
+        """All blogs, by id (oldest first)."""
+        blogs = self._blogs
+        return [blogs[blog_id] for blog_id in self._order]
+
+    def get(self, blog_id: int) -> dict | None:
+        return self._blogs.get(blog_id)
+
+    def page(self, after_id: int | None = None, limit: int | None = None) -> tuple[list[dict], int | None]:
+        """
+        Blogs with an id greater than after_id, at most limit of them.
+        Returns (blogs, next_cursor) — next_cursor is None on the last page.
+        """
+        with self._lock:
+            order = self._order
+            start = 0 if after_id is None else bisect_right(order, after_id)
+            end = len(order) if limit is None else min(start + limit, len(order))
+            blogs = [self._blogs[blog_id] for blog_id in order[start:end]]
+        return blogs, (blogs[-1]["id"] if blogs and end < len(order) else None)
+
+    def create(self, title: str, description: str) -> dict:
+        with self._lock:
+            blog = self._put(self._next_id, title, description)
+            ticket = self._log("put", blog)
+            self._notify([("put", blog)])
+        self._committed(ticket)
+        return blog
+
+    def update(self, blog_id: int, title: str, description: str) -> dict | None:
+        """Replace a blog's fields. Keeps its position in the list."""
+        with self._lock:
+            if blog_id not in self._blogs:
+                return None
+            blog = self._put(blog_id, title, description)
+            ticket = self._log("put", blog)
+            self._notify([("put", blog)])
+        self._committed(ticket)
+        return blog
+
+    def delete(self, blog_id: int) -> dict | None:
+        with self._lock:
+            blog = self._remove(blog_id)
+            if blog is None:
+                return None
+            ticket = self._log("delete", blog)
+            self._notify([("delete", blog)])
+        self._committed(ticket)
+        return blog
+
+    def apply(self, operations: list[tuple], atomic: bool = False) -> list[dict | None]:
+        """
+        Run many writes at once. Each operation is one of:
+            ("create", None, title, description)
+            ("update", blog_id, title, description)
+            ("delete", blog_id, None, None)
+        Returns one blog per operation (None when the id wasn't found).
+        With atomic=True nothing is applied unless every operation would
+        succeed — otherwise BulkError is raised.
+        """
+        results: list[dict | None] = []
+        changes: list[tuple[str, dict]] = []
+        with self._lock:
+            if atomic:
+                failed = self._missing(operations)
+                if failed:
+                    raise BulkError(failed)
+            for operation, blog_id, title, description in operations:
+                if operation == "create":
+                    blog = self._put(self._next_id, title, description)
+                elif operation == "update":
+                    blog = self._put(blog_id, title, description) if blog_id in self._blogs else None
+                else:
+                    blog = self._remove(blog_id)
+                results.append(blog)
+                if blog is not None:
+                    changes.append(("delete" if operation == "delete" else "put", blog))
+            ticket = self._log_many(changes) if changes else None
+            self._notify(changes)
+        if changes:
+            self._committed(ticket)
+        return results
+
+    # ---------- Internals (call with the lock held) ----------
+
+    def _missing(self, operations: list[tuple]) -> list[int]:
+        """Positions of updates/deletes whose blog won't exist when they run."""
+        exists: dict[int, bool] = {}  # changes made by earlier operations in the batch
+        next_id = self._next_id
+        failed = []
+        for position, (operation, blog_id, _, _) in enumerate(operations):
+            if operation == "create":
+                exists[next_id] = True
+                next_id += 1
+            elif not exists.get(blog_id, blog_id in self._blogs):
+                failed.append(position)
+            elif operation == "delete":
+                exists[blog_id] = False
+        return failed
+
+    def _put(self, blog_id: int, title: str, description: str) -> dict:
+        blog = {"id": blog_id, "title": title, "description": description}
+        if blog_id not in self._blogs:
+            order = self._order
+            if not order or blog_id > order[-1]:
+                order.append(blog_id)  # the usual case: a brand new, largest id
+            else:
+                order.insert(bisect_left(order, blog_id), blog_id)
+        self._blogs[blog_id] = blog
+        self._next_id = max(self._next_id, blog_id + 1)
+        self.version += 1
+        return blog
+
+    def _remove(self, blog_id: int) -> dict | None:
+        blog = self._blogs.pop(blog_id, None)
+        if blog is None:
+            return None
+        del self._order[bisect_left(self._order, blog_id)]
+        self.version += 1
+        return blog
+
+    def _log(self, operation: str, blog: dict):
+        """Record a change. Returns a ticket for _committed(). No-op in memory."""
+        return None
+
+    def _log_many(self, changes: list[tuple[str, dict]]):
+        """Record several changes. Returns the ticket of the last one."""
+        ticket = None
+        for operation, blog in changes:
+            ticket = self._log(operation, blog)
+        return ticket
+
+    def _notify(self, changes: list[tuple[str, dict]]) -> None:
+        if self._on_change is not None:
+            for operation, blog in changes:
+                self._on_change(operation, blog)
+
+    def _committed(self, ticket) -> None:
+        """Wait (outside the lock) until a logged change is safe. No-op in memory."""
+        return None
@@ -1,10 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+import json
+import os
+from pathlib import Path
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
-
-app = FastAPI()
+from blog_store import BulkError
+from search_index import BlogSearchIndex
+from storage import DurableBlogStore
 
 # Pydantic models for request/response
 class BlogCreate(BaseModel):
@@ -14,9 +21,56 @@ class BlogCreate(BaseModel):
 class Blog(BlogCreate):
     id: int
 
-# In-memory storage
-blogs_db: List[dict] = []
-next_id = 1
+DATA_DIR = Path(os.getenv("DATA_DIR", Path(__file__).parent / "data"))
+
+# Full-text search index, saved to disk on shutdown
+SEARCH_INDEX_FILE = DATA_DIR / "search_index.bin"
+search_index = BlogSearchIndex()
+
+def index_blog_change(operation: str, blog: dict):
+    # Called by the store inside its lock, so the index sees the changes
+    # in the same order as the store — two writes to one blog can't leave
+    # the older text searchable
+    if operation == "delete":
+        search_index.remove(blog["id"])
+    else:
+        search_index.add(blog)
+
+# Blog storage: in memory (indexed by id, thread-safe), and every change
+# is written to a log in DATA_DIR/blogs so blogs survive a restart.
+# BLOG_DURABILITY = none | group (default) | always — see storage.py
+# The blogs, ids and search index all live in this one process, so run a
+# single worker: a second process on the same DATA_DIR fails to start.
+# The store is opened when the server starts, not on import — with
+# reload=True the reloader process imports this file too, and must not
+# take the data folder's lock away from the server it starts.
+blog_store: Optional[DurableBlogStore] = None
+
+def load_search_index():
+    global search_index
+    if SEARCH_INDEX_FILE.exists():
+        try:
+            search_index = BlogSearchIndex.load(str(SEARCH_INDEX_FILE))
+        except (OSError, ValueError) as e:
+            print(f"Could not load search index ({e}), rebuilding")
+    # The saved index must describe exactly the blogs we recovered
+    if search_index.store_version != blog_store.version or len(search_index) != len(blog_store):
+        search_index = BlogSearchIndex.build(blog_store.all())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global blog_store
+    blog_store = DurableBlogStore.open(
+        DATA_DIR / "blogs",
+        durability=os.getenv("BLOG_DURABILITY", "group"),
+        on_change=index_blog_change,
+    )
+    load_search_index()
+    yield
+    blog_store.close()
+    search_index.save(str(SEARCH_INDEX_FILE), store_version=blog_store.version)
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
       CORSMiddleware,
@@ -24,55 +78,218 @@ app.add_middleware(
       allow_credentials=True,
       allow_methods=["*"],
       allow_headers=["*"],
+      expose_headers=["X-Next-Cursor"],
 )
 
 # Create a blog
 @app.post("/api/blogs", response_model=Blog)
 def create_blog(blog: BlogCreate):
-    global next_id
-    new_blog = {
-        "id": next_id,
-        "title": blog.title,
-        "description": blog.description
-    }
-    blogs_db.append(new_blog)
-    next_id += 1
-    return new_blog
+    return blog_store.create(blog.title, blog.description)
+
+BLOG_FIELDS = ("id", "title", "description")
+STREAM_BATCH_SIZE = 1000
+json_encoder = json.JSONEncoder(separators=(",", ":"))  # compact, built once
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if fields is None:
+        return None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in BLOG_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"fields must be chosen from {', '.join(BLOG_FIELDS)}")
+    return selected
+
+def project(blogs: List[dict], fields: Optional[List[str]]) -> List[dict]:
+    if fields is None:
+        return blogs
+    return [{field: blog[field] for field in fields} for blog in blogs]
+
+def stream_ndjson(cursor: Optional[int], limit: Optional[int], fields: Optional[List[str]]):
+    # One JSON object per line, sent in batches — the full list is never built
+    remaining = limit
+    while remaining is None or remaining > 0:
+        batch_size = STREAM_BATCH_SIZE if remaining is None else min(remaining, STREAM_BATCH_SIZE)
+        blogs, cursor = blog_store.page(after_id=cursor, limit=batch_size)
+        if blogs:
+            yield "".join(json_encoder.encode(blog) + "\n" for blog in project(blogs, fields))
+        if remaining is not None:
+            remaining -= len(blogs)
+        if cursor is None:
+            break
 
 # Get all blogs
-@app.get("/api/blogs", response_model=List[Blog])
-def get_all_blogs():
-    return blogs_db
+# Stored blogs were already validated by BlogCreate when they were saved,
+# so they are serialized directly and returned as a Response — there is no
+# response_model to validate them again. `responses` describes the real
+# output (JSON array or NDJSON lines) for the /docs page.
+BLOG_LIST_RESPONSES = {
+    200: {
+        "model": List[Blog],
+        "description": "Blogs ordered by id. With `fields`, each blog has only those keys.",
+        "content": {
+            "application/x-ndjson": {
+                "schema": {"type": "string", "description": "One blog JSON object per line (format=ndjson)"},
+            },
+        },
+        "headers": {
+            "X-Next-Cursor": {
+                "description": "Pass as `cursor` to get the next page; absent on the last page",
+                "schema": {"type": "integer"},
+            },
+        },
+    },
+}
+
+@app.get("/api/blogs", response_class=JSONResponse, responses=BLOG_LIST_RESPONSES)
+def get_all_blogs(
+    cursor: Optional[int] = Query(None, description="Return blogs after this id (from X-Next-Cursor)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,title"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json or ndjson (streamed)"),
+):
+    selected_fields = parse_fields(fields)
+
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_ndjson(cursor, limit, selected_fields), media_type="application/x-ndjson"
+        )
+
+    blogs, next_cursor = blog_store.page(after_id=cursor, limit=limit)
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+    return Response(
+        content=json_encoder.encode(project(blogs, selected_fields)),
+        media_type="application/json",
+        headers=headers,
+    )
+
+# ---------- Bulk writes ----------
+# One request carries many creates/updates/deletes, as a JSON array or as
+# NDJSON (one JSON object per line, Content-Type: application/x-ndjson):
+#   {"title": "...", "description": "..."}              create ("op" optional)
+#   {"op": "update", "id": 3, "title": "...", "description": "..."}
+#   {"op": "delete", "id": 4}
+# The whole batch runs under one store lock and waits for the disk once.
+# atomic=true (default): all items are applied, or none of them.
+# atomic=false: each item succeeds or fails on its own.
+MAX_BULK_ITEMS = 10_000
+BULK_OPERATIONS = ("create", "update", "delete")
+
+def parse_bulk_item(item) -> tuple:
+    """Turn one request item into a store operation. Raises ValueError if invalid."""
+    if not isinstance(item, dict):
+        raise ValueError("item must be an object")
+    operation = item.get("op", "create")
+    if operation not in BULK_OPERATIONS:
+        raise ValueError(f"op must be one of {', '.join(BULK_OPERATIONS)}")
+    blog_id = item.get("id")
+    if operation != "create" and (not isinstance(blog_id, int) or isinstance(blog_id, bool)):
+        raise ValueError("id must be an integer")
+    if operation == "delete":
+        return operation, blog_id, None, None
+    title, description = item.get("title"), item.get("description")
+    if not isinstance(title, str) or not isinstance(description, str):
+        raise ValueError("title and description must be strings")
+    return operation, blog_id, title, description
+
+async def read_bulk_items(request: Request) -> list:
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        # Parse line by line as the body arrives
+        items, pending = [], b""
+        async for chunk in request.stream():
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            items.extend(json.loads(line) for line in lines if line.strip())
+            if len(items) > MAX_BULK_ITEMS:
+                break
+        if pending.strip():
+            items.append(json.loads(pending))
+        return items
+    items = json.loads(await request.body())
+    if not isinstance(items, list):
+        raise ValueError("body must be a JSON array")
+    return items
+
+STATUS_BY_OPERATION = {"create": 201, "update": 200, "delete": 200}
+
+@app.post("/api/blogs/bulk")
+async def bulk_blogs(request: Request, atomic: bool = Query(True, description="All items or none")):
+    try:
+        items = await read_bulk_items(request)
+    except ValueError as e:  # also json.JSONDecodeError
+        raise HTTPException(status_code=400, detail=f"Invalid bulk body: {e}")
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+
+    # Results are compact: {"status": ..., "id": ...} or {"status": ..., "error": ...}
+    results: list = [None] * len(items)
+    operations, positions = [], []
+    for position, item in enumerate(items):
+        try:
+            operations.append(parse_bulk_item(item))
+            positions.append(position)
+        except ValueError as e:
+            results[position] = {"status": 422, "error": str(e)}
+
+    errors = [{"index": i, **result} for i, result in enumerate(results) if result is not None]
+    if atomic and errors:
+        raise HTTPException(status_code=422, detail={"message": "No changes applied", "errors": errors})
+
+    try:
+        # The store may wait for an fsync — keep that off the event loop
+        blogs = await run_in_threadpool(blog_store.apply, operations, atomic)
+    except BulkError as e:
+        errors = [{"index": positions[i], "status": 404, "error": "Blog not found"} for i in e.failed]
+        raise HTTPException(status_code=404, detail={"message": "No changes applied", "errors": errors})
+
+    for position, (operation, blog_id, _, _), blog in zip(positions, operations, blogs):
+        if blog is None:
+            results[position] = {"status": 404, "id": blog_id, "error": "Blog not found"}
+        else:
+            results[position] = {"status": STATUS_BY_OPERATION[operation], "id": blog["id"]}
+
+    applied = sum(1 for result in results if "error" not in result)
+    return Response(
+        content=json_encoder.encode({"applied": applied, "failed": len(results) - applied, "results": results}),
+        media_type="application/json",
+    )
+
+# Search blogs by title and description (ranked, last word matches as a prefix)
+# Declared before /api/blogs/{blog_id} so "search" isn't read as a blog id
+@app.get("/api/blogs/search")
+def search_blogs(
+    q: str = Query(..., min_length=1, description="Search words, e.g. 'fastapi tut'"),
+    limit: int = Query(10, ge=1, le=100),
+):
+    results = []
+    for blog_id, score in search_index.search(q, limit=limit):
+        blog = blog_store.get(blog_id)
+        if blog is not None:
+            results.append({**blog, "score": round(score, 4)})
+    return results
 
 # Get a single blog by ID
 @app.get("/api/blogs/{blog_id}", response_model=Blog)
 def get_blog(blog_id: int):
-    for blog in blogs_db:
-        if blog["id"] == blog_id:
-            return blog
-    raise HTTPException(status_code=404, detail="Blog not found")
+    blog = blog_store.get(blog_id)
+    if blog is None:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    return blog
 
 # Update a blog
 @app.put("/api/blogs/{blog_id}", response_model=Blog)
 def update_blog(blog_id: int, blog: BlogCreate):
-    for i, existing_blog in enumerate(blogs_db):
-        if existing_blog["id"] == blog_id:
-            blogs_db[i] = {
-                "id": blog_id,
-                "title": blog.title,
-                "description": blog.description
-            }
-            return blogs_db[i]
-    raise HTTPException(status_code=404, detail="Blog not found")
+    updated_blog = blog_store.update(blog_id, blog.title, blog.description)
+    if updated_blog is None:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    return updated_blog
 
 # Delete a blog
 @app.delete("/api/blogs/{blog_id}")
 def delete_blog(blog_id: int):
-    for i, blog in enumerate(blogs_db):
-        if blog["id"] == blog_id:
-            deleted_blog = blogs_db.pop(i)
-            return {"message": "Blog deleted successfully", "blog": deleted_blog}
-    raise HTTPException(status_code=404, detail="Blog not found")
+    deleted_blog = blog_store.delete(blog_id)
+    if deleted_blog is None:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    return {"message": "Blog deleted successfully", "blog": deleted_blog}
 
 # Health check endpoint
 @app.get("/health")
@@ -80,4 +297,4 @@ def health_check():
     return {"status": "healty api"}
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("main:app", host="0.0.0.0", port=int(os.getenv("PORT", "8000")), reload=True)
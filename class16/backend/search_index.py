@@ -0,0 +1,288 @@
+"""
+Full-text search over blog titles and descriptions.
+
+An inverted index is like the index at the back of a book: for every word
+it lists the blogs that contain it (and how often). A search only looks at
+the blogs listed under the query words instead of reading every blog.
+
+Results are ranked with BM25, the classic search-engine formula: a word
+counts more when it is rare across all blogs, and a match in a short blog
+counts more than the same match in a long one. Title words count double.
+
+The last word of a query also matches as a prefix ("pyth" finds "python"),
+so the search box works while the user is still typing.
+
+The index has two parts:
+  - a "base" loaded from disk: compact arrays of ids, read in one go,
+    so a restart doesn't have to re-tokenize every blog;
+  - a "live" part (plain dicts) for blogs created or changed since then.
+Deleting or changing a base blog just marks its old entry as deleted.
+save() merges both parts into a new file.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+TITLE_WEIGHT = 2
+MAX_PREFIX_TERMS = 50
+
+FILE_MAGIC = b"BSIX"
+FILE_VERSION = 2
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def term_frequencies(blog: dict) -> dict[str, int]:
+    frequencies: dict[str, int] = {}
+    for term in tokenize(blog["title"]):
+        frequencies[term] = frequencies.get(term, 0) + TITLE_WEIGHT
+    for term in tokenize(blog["description"]):
+        frequencies[term] = frequencies.get(term, 0) + 1
+    return frequencies
+
+
+def _uint_array(values=()) -> array:
+    return array("I", values)
+
+
+class BlogSearchIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        # Base part (from disk): term -> (blog ids, frequencies) as arrays
+        self._base_postings: dict[str, tuple[array, array]] = {}
+        self._base_lengths: dict[int, int] = {}
+        self._base_deleted: set[int] = set()
+
+        # Live part: term -> {blog_id: frequency}
+        self._live_postings: dict[str, dict[int, int]] = {}
+        self._live_terms: dict[int, dict[str, int]] = {}  # blog_id -> {term: frequency}
+        self._live_lengths: dict[int, int] = {}
+
+        self._doc_count = 0
+        self._total_length = 0
+        self._terms: list[str] = []  # sorted vocabulary, for prefix search
+        self._terms_dirty = False
+        self._lock = threading.Lock()
+        self.store_version = None  # BlogStore.version this index was saved at
+
+    def __len__(self) -> int:
+        return self._doc_count
+
+    # ---------- Updates ----------
+
+    def add(self, blog: dict) -> None:
+        """Index a blog (re-indexes it if the id is already present)."""
+        frequencies = term_frequencies(blog)
+        with self._lock:
+            self._remove(blog["id"])
+            for term, frequency in frequencies.items():
+                postings = self._live_postings.get(term)
+                if postings is None:
+                    postings = self._live_postings[term] = {}
+                    if term not in self._base_postings:
+                        self._terms_dirty = True
+                postings[blog["id"]] = frequency
+            length = sum(frequencies.values())
+            self._live_terms[blog["id"]] = frequencies
+            self._live_lengths[blog["id"]] = length
+            self._doc_count += 1
+            self._total_length += length
+
+    def remove(self, blog_id: int) -> None:
+        with self._lock:
+            self._remove(blog_id)
+
+    def _remove(self, blog_id: int) -> None:
+        frequencies = self._live_terms.pop(blog_id, None)
+        if frequencies is not None:
+            for term in frequencies:
+                postings = self._live_postings[term]
+                del postings[blog_id]
+                if not postings:
+                    del self._live_postings[term]
+            self._total_length -= self._live_lengths.pop(blog_id)
+            self._doc_count -= 1
+        elif blog_id in self._base_lengths and blog_id not in self._base_deleted:
+            self._base_deleted.add(blog_id)
+            self._total_length -= self._base_lengths[blog_id]
+            self._doc_count -= 1
+
+    # ---------- Search ----------
+
+    def _expand_prefix(self, prefix: str) -> list[str]:
+        if self._terms_dirty:
+            self._terms = sorted(self._base_postings.keys() | self._live_postings.keys())
+            self._terms_dirty = False
+        start = bisect_left(self._terms, prefix)
+        matches = []
+        for term in self._terms[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, query: str, limit: int = 10, prefix: bool = True) -> list[tuple[int, float]]:
+        """Best matching (blog_id, score) pairs, highest score first."""
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            if self._doc_count == 0:
+                return []
+            average_length = self._total_length / self._doc_count
+            k1, b = self.k1, self.b
+            deleted = self._base_deleted
+
+            # Each query word becomes a group of terms (one, or many for a prefix)
+            groups = [[word] for word in words[:-1]]
+            groups.append(self._expand_prefix(words[-1]) if prefix else [words[-1]])
+
+            scores: dict[int, float] = {}
+            for terms in groups:
+                best_in_group: dict[int, float] = {}
+                for term in terms:
+                    base = self._base_postings.get(term)
+                    live = self._live_postings.get(term)
+                    # Deleted base entries still count in df until the next save (like Lucene)
+                    df = (len(base[0]) if base else 0) + (len(live) if live else 0)
+                    if df == 0:
+                        continue
+                    idf = math.log(1 + (self._doc_count - df + 0.5) / (df + 0.5))
+                    sources = []
+                    if base:
+                        sources.append((zip(*base), self._base_lengths, deleted))
+                    if live:
+                        sources.append((live.items(), self._live_lengths, ()))
+                    for pairs, lengths, skip in sources:
+                        for blog_id, tf in pairs:
+                            if blog_id in skip:
+                                continue
+                            norm = k1 * (1 - b + b * lengths[blog_id] / average_length)
+                            score = idf * tf * (k1 + 1) / (tf + norm)
+                            if score > best_in_group.get(blog_id, 0.0):
+                                best_in_group[blog_id] = score
+                for blog_id, score in best_in_group.items():
+                    scores[blog_id] = scores.get(blog_id, 0.0) + score
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    # ---------- Saving / loading ----------
+    #
+    # File layout:
+    #   b"BSIX" | header length (4 bytes) | header JSON | zlib(arrays)
+    # The arrays are: blog ids, blog lengths, then every term's posting ids
+    # followed by every term's frequencies, all as unsigned 32-bit ints.
+
+    def _merged(self) -> tuple[dict[str, tuple[array, array]], dict[int, int]]:
+        postings: dict[str, tuple[array, array]] = {}
+        deleted = self._base_deleted
+        for term, (ids, tfs) in self._base_postings.items():
+            if deleted:
+                kept = [(i, tf) for i, tf in zip(ids, tfs) if i not in deleted]
+                ids, tfs = _uint_array(i for i, _ in kept), _uint_array(tf for _, tf in kept)
+            if ids:
+                postings[term] = (_uint_array(ids), _uint_array(tfs))
+        for term, docs in self._live_postings.items():
+            ids, tfs = postings.setdefault(term, (_uint_array(), _uint_array()))
+            ids.extend(docs.keys())
+            tfs.extend(docs.values())
+        lengths = {i: n for i, n in self._base_lengths.items() if i not in deleted}
+        lengths.update(self._live_lengths)
+        return postings, lengths
+
+    def save(self, path: str, store_version: int | None = None) -> None:
+        """Write the index to disk atomically (temp file + rename)."""
+        with self._lock:
+            postings, lengths = self._merged()
+            k1, b = self.k1, self.b
+
+        terms = sorted(postings)
+        header = {
+            "version": FILE_VERSION,
+            "byteorder": sys.byteorder,
+            "k1": k1,
+            "b": b,
+            "store_version": store_version,
+            "docs": len(lengths),
+            "terms": terms,
+            "counts": [len(postings[term][0]) for term in terms],
+        }
+        numbers = _uint_array(lengths.keys())
+        numbers.extend(lengths.values())
+        for term in terms:
+            numbers.extend(postings[term][0])
+        for term in terms:
+            numbers.extend(postings[term][1])
+
+        header_bytes = json.dumps(header, separators=(",", ":")).encode()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(FILE_MAGIC)
+            f.write(len(header_bytes).to_bytes(4, "little"))
+            f.write(header_bytes)
+            f.write(zlib.compress(numbers.tobytes(), 1))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BlogSearchIndex":
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != FILE_MAGIC:
+            raise ValueError("Not a search index file")
+        header_end = 8 + int.from_bytes(data[4:8], "little")
+        header = json.loads(data[8:header_end])
+        if header.get("version") != FILE_VERSION:
+            raise ValueError(f"Unsupported search index version: {header.get('version')}")
+        try:
+            numbers = _uint_array()
+            numbers.frombytes(zlib.decompress(data[header_end:]))
+        except zlib.error as e:
+            raise ValueError(f"Corrupt search index file: {e}") from e
+        if header["byteorder"] != sys.byteorder:
+            numbers.byteswap()
+
+        docs = header["docs"]
+        total_postings = sum(header["counts"])
+        if len(numbers) != 2 * docs + 2 * total_postings:
+            raise ValueError("Corrupt search index file: wrong size")
+
+        index = cls(k1=header["k1"], b=header["b"])
+        index._base_lengths = dict(zip(numbers[:docs], numbers[docs:2 * docs]))
+        ids_start = 2 * docs
+        tfs_start = ids_start + total_postings
+        offset = 0
+        for term, count in zip(header["terms"], header["counts"]):
+            index._base_postings[term] = (
+                numbers[ids_start + offset:ids_start + offset + count],
+                numbers[tfs_start + offset:tfs_start + offset + count],
+            )
+            offset += count
+
+        index.store_version = header.get("store_version")
+        index._doc_count = docs
+        index._total_length = sum(index._base_lengths.values())
+        index._terms = header["terms"]
+        return index
+
+    @classmethod
+    def build(cls, blogs) -> "BlogSearchIndex":
+        index = cls()
+        for blog in blogs:
+            index.add(blog)
+        return index
@@ -0,0 +1,373 @@
+"""
+Durable blog storage: a write-ahead log plus snapshots, all in local files.
+
+Every change (create / update / delete) is first appended to a log file —
+like a shop's receipt roll. After a crash we rebuild the blogs by
+replaying the receipts in order. To keep the roll from growing forever, a
+snapshot of all blogs is written now and then; after that only the
+receipts written since the snapshot have to be replayed.
+
+Writing to a file is fast, but making sure it is really on the disk
+(fsync) is slow. The durability mode decides how careful we are:
+
+  "none"   — hand each write to the OS, never fsync. Survives a crash of
+             this process, but not a power cut.
+  "group"  — (default) the caller waits for an fsync, but a background
+             thread fsyncs many writes at once ("group commit"), so busy
+             servers pay for one fsync per batch instead of per write.
+  "always" — fsync after every single write. Safest and slowest.
+
+Only one process may use a data folder at a time: open() takes a lock on
+a file in it and fails at once if another process already has it. Two
+uvicorn workers on the same folder would otherwise append to the same
+segment and overwrite and delete each other's snapshots and segments.
+
+Files in the data folder:
+  wal-000001.log, wal-000002.log ...  log segments
+  snapshot.bin                        the latest snapshot
+  LOCK                                held by the process using the folder
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from zlib import crc32
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from blog_store import BlogStore
+
+DURABILITY_MODES = ("none", "group", "always")
+
+RECORD_HEADER = struct.Struct("<II")  # payload length, crc32 of payload
+SNAPSHOT_MAGIC = b"BSNP"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FILE = "snapshot.bin"
+LOCK_FILE = "LOCK"
+
+
+class StoreLockedError(RuntimeError):
+    """The data folder is already in use by another process."""
+
+
+def _segment_name(generation: int) -> str:
+    return f"wal-{generation:06d}.log"
+
+
+def _segment_generation(path: Path) -> int:
+    return int(path.stem.split("-")[1])
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Make a rename/create inside the folder durable (no-op on Windows)."""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _lock_directory(directory: Path):
+    """Take the folder's LOCK file without waiting. Returns the open file; closing it releases the lock."""
+    lock_file = open(directory / LOCK_FILE, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        raise StoreLockedError(
+            f"{directory} is already used by another process — run a single worker per data folder"
+        ) from None
+    return lock_file
+
+
+class WriteAheadLog:
+    def __init__(self, directory: Path, generation: int, durability: str = "group"):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}, not {durability!r}")
+        self.directory = directory
+        self.durability = durability
+        self.generation = generation
+        self._file = open(directory / _segment_name(generation), "ab")
+
+        self._written = 0   # records appended so far
+        self._synced = 0    # records known to be on disk
+        self._closed = False
+        self._cond = threading.Condition()
+        self._sync_lock = threading.Lock()  # keeps rotate() and fsync apart
+
+        self._flusher = None
+        if durability == "group":
+            self._flusher = threading.Thread(target=self._flush_loop, name="wal-group-commit", daemon=True)
+            self._flusher.start()
+
+    def append(self, record: list) -> int:
+        """Append one record. Returns its sequence number for wait_durable()."""
+        return self.append_many([record])
+
+    def append_many(self, records: list[list]) -> int:
+        """Append records in one write (and at most one fsync). Returns the last sequence number."""
+        frames = []
+        for record in records:
+            payload = json.dumps(record, separators=(",", ":")).encode()
+            frames.append(RECORD_HEADER.pack(len(payload), crc32(payload)))
+            frames.append(payload)
+        with self._cond:
+            self._file.write(b"".join(frames))
+            self._written += len(records)
+            sequence = self._written
+            if self.durability == "always":
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._synced = sequence
+            elif self.durability == "none":
+                self._file.flush()
+                self._synced = sequence
+            else:
+                self._cond.notify_all()
+        return sequence
+
+    def wait_durable(self, sequence: int) -> None:
+        """Block until the record with this sequence number is on disk."""
+        if self._synced >= sequence:
+            return
+        with self._cond:
+            while self._synced < sequence and not self._closed:
+                self._cond.wait()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._synced == self._written and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                target = self._written
+                self._file.flush()
+            # fsync outside the condition, so new writes keep coming in and
+            # form the next batch while this one is going to disk
+            with self._sync_lock:
+                os.fsync(self._file.fileno())
+            with self._cond:
+                self._synced = max(self._synced, target)
+                self._cond.notify_all()
+
+    def rotate(self) -> int:
+        """Finish the current segment and start a new one. Returns the new generation."""
+        with self._sync_lock, self._cond:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._synced = self._written
+            self.generation += 1
+            self._file = open(self.directory / _segment_name(self.generation), "ab")
+            self._cond.notify_all()
+        _fsync_directory(self.directory)
+        return self.generation
+
+    def remove_segments_before(self, generation: int) -> None:
+        for path in self.directory.glob("wal-*.log"):
+            if _segment_generation(path) < generation:
+                path.unlink()
+
+    def close(self) -> None:
+        with self._sync_lock, self._cond:
+            if self._closed:
+                return
+            self._file.flush()
+            if self.durability != "none":
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._synced = self._written
+            self._closed = True
+            self._cond.notify_all()
+        if self._flusher:
+            self._flusher.join()
+
+
+def read_segment(path: Path):
+    """
+    Yield the records of one log segment. A half-written record at the end
+    (the server died mid-write) is cut off so the file can be appended to.
+    """
+    size = path.stat().st_size
+    if size == 0:
+        return
+    with open(path, "r+b") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            while offset + RECORD_HEADER.size <= size:
+                length, checksum = RECORD_HEADER.unpack_from(data, offset)
+                start = offset + RECORD_HEADER.size
+                payload = data[start:start + length]
+                if len(payload) < length or crc32(payload) != checksum:
+                    break
+                yield json.loads(payload)
+                offset = start + length
+        if offset < size:
+            print(f"Truncating torn write at the end of {path.name} ({size - offset} bytes)")
+            f.truncate(offset)
+
+
+def write_snapshot(directory: Path, blogs: list[dict], next_id: int, version: int, generation: int) -> None:
+    """Write all blogs to snapshot.bin atomically (temp file + rename)."""
+    header = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "wal_generation": generation,  # replay segments from this one on
+        "next_id": next_id,
+        "store_version": version,
+        "count": len(blogs),
+    }).encode()
+    body = json.dumps(
+        [[blog["id"], blog["title"], blog["description"]] for blog in blogs],
+        separators=(",", ":"),
+    ).encode()
+
+    temp_path = directory / (SNAPSHOT_FILE + ".tmp")
+    with open(temp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, directory / SNAPSHOT_FILE)
+    _fsync_directory(directory)
+
+
+def read_snapshot(path: Path) -> tuple[dict, list]:
+    """Returns (header, [[id, title, description], ...])."""
+    with open(path, "rb") as f:
+        if f.read(4) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a blog snapshot")
+        header = json.loads(f.read(int.from_bytes(f.read(4), "little")))
+        if header["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {header['version']}")
+        # json needs the body in one piece anyway, so it is read in one go
+        rows = json.loads(f.read())
+    return header, rows
+
+
+class DurableBlogStore(BlogStore):
+    """
+    A BlogStore that survives restarts.
+
+        store = DurableBlogStore.open("data", durability="group")
+    """
+
+    def __init__(self, directory: Path, durability: str, snapshot_every: int, on_change=None):
+        super().__init__(on_change)
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self._wal: WriteAheadLog | None = None
+        self._lock_file = None
+        self._writes_since_snapshot = 0
+        self._snapshot_running = threading.Lock()
+        self._durability = durability
+
+    @classmethod
+    def open(
+        cls,
+        directory,
+        durability: str = "group",
+        snapshot_every: int = 100_000,
+        on_change=None,
+    ) -> "DurableBlogStore":
+        """
+        Recover the blogs from `directory`. on_change is not called for the
+        recovered ones. Raises StoreLockedError if another process has the folder.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        lock_file = _lock_directory(directory)
+        try:
+            store = cls(directory, durability, snapshot_every, on_change)
+            generation = store._recover()
+            store._wal = WriteAheadLog(directory, generation, durability)
+        except BaseException:
+            lock_file.close()
+            raise
+        store._lock_file = lock_file
+        return store
+
+    def _recover(self) -> int:
+        """Load the snapshot, replay the log after it. Returns the segment to append to."""
+        generation = 1
+        snapshot_path = self.directory / SNAPSHOT_FILE
+        if snapshot_path.exists():
+            header, rows = read_snapshot(snapshot_path)
+            for blog_id, title, description in rows:
+                self._blogs[blog_id] = {"id": blog_id, "title": title, "description": description}
+            self._order = sorted(self._blogs)
+            self._next_id = header["next_id"]
+            self.version = header["store_version"]
+            generation = header["wal_generation"]
+
+        segments = sorted(self.directory.glob("wal-*.log"), key=_segment_generation)
+        for path in segments:
+            segment = _segment_generation(path)
+            if segment < generation:
+                path.unlink()  # already covered by the snapshot
+                continue
+            for operation, blog_id, *fields in read_segment(path):
+                if operation == "put":
+                    self._put(blog_id, *fields)
+                else:
+                    self._remove(blog_id)
+                self._writes_since_snapshot += 1
+            generation = segment
+        return generation
+
+    # ---------- BlogStore hooks ----------
+
+    @staticmethod
+    def _record(operation: str, blog: dict) -> list:
+        if operation == "put":
+            return ["put", blog["id"], blog["title"], blog["description"]]
+        return ["delete", blog["id"]]
+
+    def _log(self, operation: str, blog: dict) -> int:
+        self._writes_since_snapshot += 1
+        return self._wal.append(self._record(operation, blog))
+
+    def _log_many(self, changes: list[tuple[str, dict]]) -> int:
+        self._writes_since_snapshot += len(changes)
+        return self._wal.append_many([self._record(operation, blog) for operation, blog in changes])
+
+    def _committed(self, ticket: int) -> None:
+        self._wal.wait_durable(ticket)
+        if self._writes_since_snapshot >= self.snapshot_every and not self._snapshot_running.locked():
+            threading.Thread(target=self.snapshot, daemon=True).start()
+
+    # ---------- Snapshots ----------
+
+    def snapshot(self) -> None:
+        """Write every blog to snapshot.bin, then drop the log segments it covers."""
+        with self._snapshot_running:
+            with self._lock:
+                generation = self._wal.rotate()
+                blogs = self.all()
+                next_id, version = self._next_id, self.version
+                self._writes_since_snapshot = 0
+            # The slow part runs without the lock — writes go to the new segment
+            write_snapshot(self.directory, blogs, next_id, version, generation)
+            self._wal.remove_segments_before(generation)
+
+    def close(self, snapshot: bool = True) -> None:
+        if snapshot and self._writes_since_snapshot:
+            self.snapshot()
+        self._wal.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
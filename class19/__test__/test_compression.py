@@ -0,0 +1,142 @@
+import sys
+import os
+import asyncio
+import zlib
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.testclient import TestClient
+from compression import CompressionMiddleware
+from middleware_main import app as demo_app
+
+demo_client = TestClient(demo_app)
+
+
+def streaming_app(chunks, content_type=b"text/event-stream"):
+    """An ASGI app that sends its body in several pieces, like an SSE endpoint."""
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+
+    return app
+
+
+def json_app(body):
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+def run(app, accept_encoding=None, path="/events"):
+    """Send one GET through the middleware. Returns the messages the client got."""
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    scope = {"type": "http", "method": "GET", "path": path, "headers": headers}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(CompressionMiddleware(app, minimum_size=500)(scope, receive, send))
+    return messages
+
+
+def headers_of(messages):
+    return {name.decode().lower(): value.decode() for name, value in messages[0]["headers"]}
+
+
+# ---- Streaming ----
+
+def test_each_streamed_chunk_can_be_read_as_it_arrives():
+    events = [b"data: one\n\n", b"data: two\n\n", b"data: three\n\n"]
+    messages = run(streaming_app(events), accept_encoding="gzip")
+    assert headers_of(messages)["content-encoding"] == "gzip"
+
+    # Decompress message by message: every event is readable the moment it's sent
+    decompressor = zlib.decompressobj(31)
+    for message, event in zip(messages[1:], events):
+        assert decompressor.decompress(message["body"]) == event
+    assert decompressor.eof
+
+
+def test_each_brotli_chunk_can_be_read_as_it_arrives():
+    brotli = pytest.importorskip("brotli")
+    events = [b"data: one\n\n", b"data: two\n\n"]
+    messages = run(streaming_app(events), accept_encoding="br")
+    assert headers_of(messages)["content-encoding"] == "br"
+
+    decompressor = brotli.Decompressor()
+    for message, event in zip(messages[1:], events):
+        assert decompressor.process(message["body"]) == event
+
+
+def test_small_chunks_are_not_held_back():
+    messages = run(streaming_app([b"a", b"b", b"c"]), accept_encoding="gzip")
+    assert len(messages) == 4  # start + one message per chunk
+
+
+def test_small_body_in_pieces_is_sent_as_is():
+    messages = run(streaming_app([b'{"a": ', b"1}", b""], content_type=b"application/json"), accept_encoding="gzip")
+    assert "content-encoding" not in headers_of(messages)
+    assert b"".join(message["body"] for message in messages[1:]) == b'{"a": 1}'
+
+
+def test_big_body_in_pieces_is_compressed_once_it_passes_minimum_size():
+    chunks = [b"x" * 300, b"y" * 300, b"z" * 300, b""]
+    messages = run(streaming_app(chunks, content_type=b"text/plain"), accept_encoding="gzip")
+    assert headers_of(messages)["content-encoding"] == "gzip"
+    assert zlib.decompress(b"".join(message["body"] for message in messages[1:]), 31) == b"".join(chunks)
+    assert len(messages) == 4  # start, the first 600 bytes, then one message per chunk
+
+
+# ---- Through the real app (behind its @app.middleware layers) ----
+
+def test_small_reply_from_the_app_is_not_compressed():
+    response = demo_client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert len(response.content) < 500
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-length"] == str(len(response.content))
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_big_reply_from_the_app_is_compressed():
+    response = demo_client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["paths"]
+
+
+# ---- Vary ----
+
+def test_vary_on_compressed_response():
+    messages = run(json_app(b'{"x": "' + b"a" * 1000 + b'"}'), accept_encoding="gzip")
+    assert headers_of(messages)["content-encoding"] == "gzip"
+    assert headers_of(messages)["vary"] == "Accept-Encoding"
+
+
+def test_vary_when_client_accepts_no_encoding():
+    messages = run(json_app(b'{"x": "' + b"a" * 1000 + b'"}'))
+    assert "content-encoding" not in headers_of(messages)
+    assert headers_of(messages)["vary"] == "Accept-Encoding"
+
+
+def test_vary_on_small_response():
+    messages = run(json_app(b'{"x": 1}'), accept_encoding="gzip")
+    assert "content-encoding" not in headers_of(messages)
+    assert headers_of(messages)["vary"] == "Accept-Encoding"
+
+
+def test_no_vary_on_content_that_is_never_compressed():
+    messages = run(streaming_app([b"\x89PNG"], content_type=b"image/png"), accept_encoding="gzip")
+    assert "vary" not in headers_of(messages)
@@ -0,0 +1,102 @@
+import sys
+import os
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ip_blocklist import CompiledBlocklist, IPBlocklist
+
+
+# ---- Prefix-set lookup ----
+
+def test_single_addresses():
+    blocklist = CompiledBlocklist(["192.168.1.100", "2001:db8::1"])
+    assert "192.168.1.100" in blocklist
+    assert "192.168.1.101" not in blocklist
+    assert "2001:db8::1" in blocklist
+    assert "2001:db8::2" not in blocklist
+
+
+def test_cidr_ranges():
+    blocklist = CompiledBlocklist(["10.0.0.0/8", "198.51.100.0/24", "2001:db8::/32"])
+    assert "10.255.0.1" in blocklist
+    assert "11.0.0.1" not in blocklist
+    assert "198.51.100.7" in blocklist
+    assert "198.51.101.7" not in blocklist
+    assert "2001:db8:ffff::1" in blocklist
+    assert "2001:db9::1" not in blocklist
+
+
+def test_host_bits_in_a_range_are_ignored():
+    assert "10.1.2.3" in CompiledBlocklist(["10.1.2.99/24"])
+
+
+def test_ipv4_mapped_ipv6_client_matches_ipv4_entries():
+    blocklist = CompiledBlocklist(["203.0.113.7", "10.0.0.0/8"])
+    assert "::ffff:203.0.113.7" in blocklist
+    assert "::ffff:10.9.8.7" in blocklist
+    assert "::ffff:203.0.113.8" not in blocklist
+
+
+def test_ipv4_mapped_entry_blocks_the_ipv4_client():
+    assert "203.0.113.7" in CompiledBlocklist(["::ffff:203.0.113.7"])
+
+
+def test_ipv4_mapped_range_blocks_ipv4_clients():
+    blocklist = CompiledBlocklist(["::ffff:10.0.0.0/104"])
+    assert "10.1.2.3" in blocklist
+    assert "::ffff:10.1.2.3" in blocklist
+    assert "11.1.2.3" not in blocklist
+
+
+def test_ipv6_range_around_the_mapped_block_covers_ipv4_clients():
+    blocklist = CompiledBlocklist(["::/64"])
+    assert "::1" in blocklist
+    assert "::ffff:10.1.2.3" in blocklist
+    assert "2001:db8::1" not in blocklist
+
+
+def test_invalid_client_ip_is_not_blocked():
+    assert "not-an-ip" not in CompiledBlocklist(["10.0.0.0/8"])
+
+
+def test_invalid_entry_is_rejected():
+    with pytest.raises(ValueError):
+        CompiledBlocklist(["300.1.1.1"])
+
+
+# ---- Hot reload ----
+
+def test_reload_picks_up_file_changes(tmp_path):
+    path = tmp_path / "blocked_ips.txt"
+    path.write_text("# comment\n203.0.113.7\n")
+    blocklist = IPBlocklist(["192.168.1.100"], path=str(path))
+    assert blocklist.is_blocked("203.0.113.7")
+    assert blocklist.is_blocked("192.168.1.100")
+
+    path.write_text("198.51.100.0/24  # a whole range\n")
+    assert blocklist.reload()
+    assert not blocklist.is_blocked("203.0.113.7")
+    assert blocklist.is_blocked("198.51.100.42")
+    assert blocklist.is_blocked("192.168.1.100")  # entries from code stay
+
+
+def test_failed_reload_keeps_the_old_list(tmp_path):
+    path = tmp_path / "blocked_ips.txt"
+    path.write_text("203.0.113.7\n")
+    blocklist = IPBlocklist(path=str(path))
+
+    path.write_text("198.51.100.0/24\nthis is not an ip\n")
+    assert not blocklist.reload()
+    assert blocklist.is_blocked("203.0.113.7")
+    assert not blocklist.is_blocked("198.51.100.1")
+    assert blocklist.size == 1
+
+
+def test_missing_file_keeps_the_old_list(tmp_path):
+    path = tmp_path / "blocked_ips.txt"
+    path.write_text("203.0.113.7\n")
+    blocklist = IPBlocklist(path=str(path))
+
+    path.unlink()
+    assert not blocklist.reload()
+    assert blocklist.is_blocked("203.0.113.7")
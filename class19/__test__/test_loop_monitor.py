@@ -0,0 +1,65 @@
+import sys
+import os
+import time
+from contextlib import asynccontextmanager
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from loop_monitor import LoopLagMonitor, TrackRequests
+
+
+def make_app(monitor):
+    @asynccontextmanager
+    async def lifespan(app):
+        await monitor.start()
+        yield
+        await monitor.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(TrackRequests)
+
+    @app.get("/block/{seconds}")
+    async def block(seconds: float):
+        time.sleep(seconds)  # the mistake the monitor is there to catch
+        return {"slept": seconds}
+
+    @app.get("/fine")
+    async def fine():
+        return {"ok": True}
+
+    return app
+
+
+def test_blocking_route_is_reported_with_its_route():
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.1)
+    with TestClient(make_app(monitor)) as client:
+        client.get("/block/0.5")
+
+    report = monitor.blocked_reports[-1]
+    assert report["request"] == "GET /block/0.5"
+    assert report["route"] == "/block/{seconds}"
+    assert "time.sleep(seconds)" in report["stack"]
+    assert monitor.max_lag >= 0.3
+
+
+def test_no_report_without_blocking():
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.2)
+    with TestClient(make_app(monitor)) as client:
+        for _ in range(5):
+            client.get("/fine")
+            time.sleep(0.02)  # the test's thread, not the loop: let the sampler run
+    assert list(monitor.blocked_reports) == []
+    assert monitor.histogram.snapshot()["count"] > 0
+
+
+def test_debug_endpoint_needs_login():
+    from middleware_main import app
+
+    with TestClient(app) as client:
+        assert client.get("/debug/event-loop").status_code == 401
+        token = client.post("/token", data={"username": "ali", "password": "ali123"}).json()["access_token"]
+        response = client.get("/debug/event-loop", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert "blocked_reports" in response.json()
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.testclient import TestClient
+from middleware_main import app, requests_total, request_duration
+
+
+client = TestClient(app)
+
+
+def login():
+    token = client.post("/token", data={"username": "ali", "password": "ali123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+# ---- Status codes as the client sees them ----
+
+def test_etag_304_is_counted_as_304():
+    headers = login()
+    before_200 = requests_total.value("GET", "/dashboard", 200)
+    before_304 = requests_total.value("GET", "/dashboard", 304)
+
+    first = client.get("/dashboard", headers=headers)
+    again = client.get("/dashboard", headers={**headers, "If-None-Match": first.headers["ETag"]})
+
+    assert again.status_code == 304
+    assert requests_total.value("GET", "/dashboard", 200) == before_200 + 1
+    assert requests_total.value("GET", "/dashboard", 304) == before_304 + 1
+
+
+def test_rejected_login_is_counted_as_401():
+    before = requests_total.value("GET", "<unmatched>", 401)
+    assert client.get("/protected").status_code == 401
+    assert requests_total.value("GET", "<unmatched>", 401) == before + 1
+
+
+def test_latency_is_recorded_per_route():
+    before = request_duration.snapshot("GET", "/fast")["count"]
+    client.get("/fast", headers=login())
+    assert request_duration.snapshot("GET", "/fast")["count"] == before + 1
+
+
+def test_metrics_endpoint_shows_the_totals():
+    client.get("/")
+    body = client.get("/metrics", headers=login()).text
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in body
+
+
+def test_metrics_endpoint_needs_login():
+    assert client.get("/metrics").status_code == 401
+
+
+# ---- Rate limiting app (main.py) ----
+
+def test_crashed_handler_is_counted_as_500():
+    import main
+
+    @main.app.get("/test-crash")
+    async def crash():
+        raise RuntimeError("boom")
+
+    before = main.requests_total.value("GET", "/test-crash", 500)
+    response = TestClient(main.app, raise_server_exceptions=False).get("/test-crash")
+    assert response.status_code == 500
+    assert main.requests_total.value("GET", "/test-crash", 500) == before + 1
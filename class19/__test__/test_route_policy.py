@@ -0,0 +1,92 @@
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from route_policy import AUTH_REQUIRED, PUBLIC, RoutePolicy, TokenCache
+
+
+def make_policy():
+    return RoutePolicy.compile({
+        "/": PUBLIC,
+        "/docs": PUBLIC,
+        "/static/*": PUBLIC,
+        "/static/private/*": AUTH_REQUIRED,
+        "/posts/{id}": PUBLIC,
+        "/posts/drafts": AUTH_REQUIRED,
+    })
+
+
+# ---- Exact paths ----
+
+def test_exact_public_paths():
+    policy = make_policy()
+    assert policy.match("/") == PUBLIC
+    assert policy.match("/docs") == PUBLIC
+
+
+def test_unknown_path_needs_login():
+    assert make_policy().match("/protected") == AUTH_REQUIRED
+
+
+def test_slashes_do_not_make_a_path_public():
+    policy = make_policy()
+    assert policy.match("/docs/") == AUTH_REQUIRED
+    assert policy.match("//docs") == AUTH_REQUIRED
+    assert policy.match("/docs//") == AUTH_REQUIRED
+    assert policy.match("//") == AUTH_REQUIRED
+
+
+# ---- Folders ----
+
+def test_folder_rule_covers_everything_below():
+    policy = make_policy()
+    assert policy.match("/static") == PUBLIC
+    assert policy.match("/static/") == PUBLIC
+    assert policy.match("/static/css/site.css") == PUBLIC
+
+
+def test_deepest_folder_rule_wins():
+    policy = make_policy()
+    assert policy.match("/static/private/key.pem") == AUTH_REQUIRED
+    assert policy.match("/static/public/logo.png") == PUBLIC
+
+
+# ---- Params ----
+
+def test_param_matches_one_segment():
+    policy = make_policy()
+    assert policy.match("/posts/42") == PUBLIC
+    assert policy.match("/posts/42/edit") == AUTH_REQUIRED
+
+
+def test_exact_segment_wins_over_param():
+    assert make_policy().match("/posts/drafts") == AUTH_REQUIRED
+
+
+def test_param_does_not_match_an_empty_segment():
+    assert make_policy().match("/posts/") == AUTH_REQUIRED
+
+
+def test_no_backtracking_into_the_param_branch():
+    policy = RoutePolicy.compile({"/users/me": AUTH_REQUIRED, "/users/{id}/avatar": PUBLIC})
+    assert policy.match("/users/42/avatar") == PUBLIC
+    # "me" matched exactly, so the {id} branch is not tried afterwards
+    assert policy.match("/users/me/avatar") == AUTH_REQUIRED
+
+
+# ---- Token cache ----
+
+def test_token_cache_forgets_expired_tokens():
+    cache = TokenCache()
+    cache.put("fresh", {"sub": "ali", "exp": time.time() + 60})
+    cache.put("old", {"sub": "ali", "exp": time.time() - 1})
+    assert cache.get("fresh")["sub"] == "ali"
+    assert cache.get("old") is None
+
+
+def test_token_cache_is_bounded():
+    cache = TokenCache(max_size=2)
+    for token in ("a", "b", "c"):
+        cache.put(token, {"exp": time.time() + 60})
+    assert len(cache) == 2 and cache.get("a") is None
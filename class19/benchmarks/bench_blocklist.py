@@ -0,0 +1,85 @@
+# ============================================
+# Benchmark: list "in" vs compiled IP blocklist
+# ============================================
+# Run from the class19 folder:
+#   uv run python benchmarks/bench_blocklist.py
+# ============================================
+
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ip_blocklist import CompiledBlocklist, IPBlocklist
+
+ENTRIES = 100_000
+LOOKUPS = 2_000
+
+random.seed(42)
+
+
+def random_ipv4() -> str:
+    return ".".join(str(random.randint(0, 255)) for _ in range(4))
+
+
+def random_ipv6() -> str:
+    return ":".join(f"{random.randint(0, 0xFFFF):x}" for _ in range(8))
+
+
+def make_entries(count: int) -> list[str]:
+    entries = []
+    for i in range(count):
+        kind = i % 10
+        if kind < 6:
+            entries.append(random_ipv4())
+        elif kind < 8:
+            entries.append(f"{random_ipv4()}/{random.choice([16, 20, 24, 28])}")
+        elif kind < 9:
+            entries.append(random_ipv6())
+        else:
+            entries.append(f"{random_ipv6()}/{random.choice([32, 48, 64])}")
+    return entries
+
+
+def main():
+    entries = make_entries(ENTRIES)
+    probes = [random_ipv4() for _ in range(LOOKUPS // 2)] + [random_ipv6() for _ in range(LOOKUPS // 2)]
+    exact_only = [e for e in entries if "/" not in e]
+
+    start = time.perf_counter()
+    compiled = CompiledBlocklist(entries)
+    compile_time = time.perf_counter() - start
+
+    list_time = timeit.timeit(lambda: [p in exact_only for p in probes], number=1)
+    compiled_time = timeit.timeit(lambda: [p in compiled for p in probes], number=5) / 5
+
+    print(f"Entries:                 {compiled.size:,}")
+    print(f"Compile time:            {compile_time * 1000:.1f} ms")
+    print(f"List 'in' (exact only):  {list_time / LOOKUPS * 1e6:.2f} us/lookup")
+    print(f"Compiled (CIDR + IPv6):  {compiled_time / LOOKUPS * 1e6:.2f} us/lookup")
+
+    # Hot reload: time to rebuild from a changed file (runs on a background
+    # thread in the server, so requests keep using the old table meanwhile)
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("\n".join(entries))
+        path = f.name
+    try:
+        blocklist = IPBlocklist(path=path)
+        with open(path, "a") as f:
+            f.write("\n203.0.113.0/24\n")
+
+        start = time.perf_counter()
+        blocklist.reload()
+        reload_time = time.perf_counter() - start
+        print(f"Hot reload from file:    {reload_time * 1000:.1f} ms")
+        print(f"New range picked up:     {blocklist.is_blocked('203.0.113.9')}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
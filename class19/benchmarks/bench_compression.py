@@ -0,0 +1,94 @@
+# ============================================
+# Benchmark: bytes on the wire + CPU per response
+# ============================================
+# Run from the class19 folder:
+#   uv run python benchmarks/bench_compression.py
+# ============================================
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from compression import CompressionMiddleware, brotli, weak_etag
+
+RUNS = 200
+
+
+def make_payload(items: int) -> bytes:
+    rows = [
+        {"id": i, "name": f"user{i}", "email": f"user{i}@example.com", "active": i % 3 != 0, "score": i * 7 % 101}
+        for i in range(items)
+    ]
+    return json.dumps({"data": rows}).encode()
+
+
+def json_app(body: bytes):
+    """A minimal ASGI app that always returns the same JSON body."""
+
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+async def call(app, headers: dict[str, str]) -> tuple[int, int]:
+    """Run one request through the app. Returns (status, bytes sent)."""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/dashboard",
+        "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+    }
+    sent = {"status": 0, "bytes": 0}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+        else:
+            sent["bytes"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return sent["status"], sent["bytes"]
+
+
+async def measure(app, headers: dict[str, str]) -> tuple[int, int, float]:
+    status, size = await call(app, headers)
+    start = time.process_time()
+    for _ in range(RUNS):
+        await call(app, headers)
+    cpu_us = (time.process_time() - start) / RUNS * 1e6
+    return status, size, cpu_us
+
+
+async def main():
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    print(f"{'payload':>10} {'encoding':>9} {'status':>6} {'wire bytes':>11} {'ratio':>6} {'CPU us':>9}")
+
+    for items in (5, 100, 1_000, 10_000):
+        body = make_payload(items)
+        app = CompressionMiddleware(json_app(body), minimum_size=500, etag_paths=["/dashboard"])
+
+        for encoding in encodings:
+            status, size, cpu_us = await measure(app, {"accept-encoding": encoding})
+            print(f"{len(body):>10,} {encoding:>9} {status:>6} {size:>11,} {size / len(body):>6.2f} {cpu_us:>9.1f}")
+
+        # Second visit with the ETag from the first one
+        status, size, cpu_us = await measure(app, {"if-none-match": weak_etag(body)})
+        print(f"{len(body):>10,} {'etag-hit':>9} {status:>6} {size:>11,} {size / len(body):>6.2f} {cpu_us:>9.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+# ============================================
+# Benchmark: cost of recording one request
+# ============================================
+# Run from the class19 folder:
+#   uv run python benchmarks/bench_metrics.py
+# ============================================
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from metrics import MetricsRegistry, http_metrics
+
+REQUESTS = 200_000
+BUDGET_US = 3.0  # "a few microseconds" per request
+
+random.seed(1)
+
+ROUTES = [f"/api/v1/resource{i}/{{id}}" for i in range(50)]
+METHODS = ["GET", "POST", "PUT", "DELETE"]
+STATUSES = [200, 200, 200, 201, 404, 429, 500]
+
+
+def main():
+    registry = MetricsRegistry()
+    requests_total, request_duration = http_metrics(registry)
+
+    samples = [
+        (random.choice(METHODS), random.choice(ROUTES), random.choice(STATUSES), random.expovariate(50))
+        for _ in range(REQUESTS)
+    ]
+
+    def record_all():
+        for method, route, status, seconds in samples:
+            requests_total.inc(method, route, status)
+            request_duration.observe(seconds, method, route)
+
+    elapsed = min(timeit.repeat(record_all, number=1, repeat=5))
+    per_request_us = elapsed / REQUESTS * 1e6
+
+    render_time = timeit.timeit(registry.render, number=10) / 10
+    series = len(registry.render().splitlines())
+
+    print(f"Recorded requests:     {REQUESTS:,} x 5 runs")
+    print(f"Cost per request:      {per_request_us:.3f} us (budget {BUDGET_US} us)")
+    print(f"Render /metrics:       {render_time * 1000:.2f} ms for {series:,} lines")
+    print("PASS" if per_request_us < BUDGET_US else "FAIL — over budget")
+
+
+if __name__ == "__main__":
+    main()
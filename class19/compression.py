@@ -0,0 +1,268 @@
+# ============================================
+# Compression + ETag Middleware (The Zip File)
+# ============================================
+# Two ways to send fewer bytes:
+#
+# 1. COMPRESSION — like zipping a folder before
+#    emailing it. If the browser says
+#    "Accept-Encoding: br, gzip" we squeeze the
+#    response with brotli (or gzip). Tiny
+#    responses are sent as-is: zipping a 50 byte
+#    file isn't worth the CPU.
+#
+# 2. ETAG — a fingerprint of the response. The
+#    browser sends it back next time in
+#    "If-None-Match". Same fingerprint? We reply
+#    "304 Not Modified" with NO body — "you
+#    already have it, use your copy".
+#
+# This is a "pure ASGI" middleware (a class with
+# __call__) instead of @app.middleware("http"),
+# because it needs to see the body bytes as
+# they stream out — and compress them chunk by
+# chunk without holding a big file in memory.
+#
+# A body that comes in pieces is held back
+# until it reaches minimum_size — behind
+# @app.middleware layers EVERY body comes in
+# pieces, so a small reply must still be sent
+# as-is. Only then is it compressed as a
+# stream. Server-sent events (text/event-stream)
+# aren't held back: each chunk is flushed out
+# of the compressor right away, so a live
+# stream still arrives as it happens.
+# ============================================
+
+import hashlib
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli  # optional: uv add brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Pick "br", "gzip" or None from an Accept-Encoding header."""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            offered[name] = quality
+
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for name in candidates:
+        quality = offered.get(name, offered.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compressible(headers, status) -> bool:
+    """Could a response like this one be compressed (for a client that accepts it)?"""
+    if status < 200 or status in (204, 304) or "content-encoding" in headers:
+        return False
+    return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+
+def _is_event_stream(headers) -> bool:
+    # The client waits for every event as it happens: never hold one back
+    return headers.get("content-type", "").startswith("text/event-stream")
+
+
+def weak_etag(body: bytes) -> str:
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison: W/"abc" and "abc" count as the same."""
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+class _Compressor:
+    """Same interface for gzip and brotli: compress(chunk), flush() after a streamed chunk, then finish()."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._engine = brotli.Compressor(quality=brotli_quality)
+            self.compress = self._engine.process
+            self.flush = self._engine.flush
+            self.finish = self._engine.finish
+        else:
+            # wbits=31 => gzip header + trailer
+            self._engine = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self.compress = self._engine.compress
+            self.flush = lambda: self._engine.flush(zlib.Z_SYNC_FLUSH)  # out now, stream stays open
+            self.finish = self._engine.flush
+
+
+class CompressionMiddleware:
+    """
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=500,                      # don't compress smaller bodies
+        etag_paths=["/dashboard", "/headers"], # GET routes that get an ETag
+    )
+    """
+
+    def __init__(self, app, minimum_size: int = 500, etag_paths=(), gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.etag_paths = frozenset(etag_paths)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        use_etag = scope["method"] == "GET" and scope["path"] in self.etag_paths
+
+        if encoding is None and not use_etag:
+            await self.app(scope, receive, _vary_only(send))
+            return
+
+        responder = _Responder(self, send, encoding, use_etag, request_headers.get("if-none-match"))
+        await self.app(scope, receive, responder.send)
+
+
+def _vary_only(send):
+    """Pass the response through untouched, except for the Vary header."""
+
+    async def send_with_vary(message):
+        if message["type"] == "http.response.start":
+            _add_vary(message)
+        await send(message)
+
+    return send_with_vary
+
+
+def _add_vary(start_message) -> None:
+    # Whether the body gets zipped depends on Accept-Encoding, so a cache
+    # must keep one copy per encoding — even of the replies we didn't zip
+    headers = MutableHeaders(scope=start_message)
+    if compressible(headers, start_message["status"]):
+        headers.add_vary_header("Accept-Encoding")
+
+
+class _Responder:
+    """Sits between the app and the client for ONE response."""
+
+    def __init__(self, middleware, send, encoding, use_etag, if_none_match):
+        self.middleware = middleware
+        self.client_send = send
+        self.encoding = encoding
+        self.use_etag = use_etag
+        self.if_none_match = if_none_match
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+        self.buffer = []
+        self.buffered = 0  # bytes in self.buffer
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Hold the headers until we've seen the first chunk of the body
+            _add_vary(message)
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.client_send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            # Streaming: compress chunk by chunk, and push each one out now
+            chunk = self.compressor.compress(body)
+            chunk += self.compressor.flush() if more_body else self.compressor.finish()
+            await self.client_send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+
+        if more_body:
+            # More is coming. ETag routes need the whole body to fingerprint
+            # it; anything else is held until we know it's big enough to zip
+            self.buffer.append(body)
+            self.buffered += len(body)
+            headers = self._headers()
+            if not self.use_etag and (self.buffered >= self.middleware.minimum_size or _is_event_stream(headers)):
+                first_chunk = b"".join(self.buffer)
+                self.buffer = []
+                await self._start_stream(headers, self.start_message["status"], first_chunk)
+            return
+
+        if self.buffer:
+            body = b"".join(self.buffer) + body
+            self.buffer = []
+        await self._send_whole(self._headers(), self.start_message["status"], body)
+
+    def _headers(self) -> MutableHeaders:
+        return MutableHeaders(scope=self.start_message)
+
+    async def _send_whole(self, headers, status, body):
+        """The whole body arrived in one piece — the common case for JSON."""
+        if self.use_etag and status == 200:
+            etag = weak_etag(body)
+            headers["ETag"] = etag
+            if self.if_none_match and etag_matches(self.if_none_match, etag):
+                await self._send_not_modified(headers)
+                return
+
+        if self._should_compress(headers, status) and len(body) >= self.middleware.minimum_size:
+            compressor = self._new_compressor()
+            body = compressor.compress(body) + compressor.finish()
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(body))
+
+        await self.client_send(self.start_message)
+        await self.client_send({"type": "http.response.body", "body": body})
+
+    async def _start_stream(self, headers, status, first_chunk):
+        """A streamed body of unknown size — compress as it goes."""
+        if not self._should_compress(headers, status):
+            self.passthrough = True
+            await self.client_send(self.start_message)
+            await self.client_send({"type": "http.response.body", "body": first_chunk, "more_body": True})
+            return
+
+        self.compressor = self._new_compressor()
+        headers["Content-Encoding"] = self.encoding
+        del headers["Content-Length"]
+        await self.client_send(self.start_message)
+        chunk = self.compressor.compress(first_chunk) + self.compressor.flush()
+        await self.client_send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+    async def _send_not_modified(self, headers):
+        # 304 must not carry a body (or headers describing one)
+        for name in ("Content-Length", "Content-Type", "Content-Encoding"):
+            if name in headers:
+                del headers[name]
+        self.start_message["status"] = 304
+        await self.client_send(self.start_message)
+        await self.client_send({"type": "http.response.body", "body": b""})
+
+    def _should_compress(self, headers, status) -> bool:
+        return self.encoding is not None and compressible(headers, status)
+
+    def _new_compressor(self) -> _Compressor:
+        return _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
@@ -0,0 +1,179 @@
+# ============================================
+# IP Blocklist — Fast CIDR-aware Lookups
+# ============================================
+# A plain Python list checked with "in" looks at
+# EVERY entry on EVERY request. With 100k entries
+# that's 100k string comparisons per request.
+#
+# Here we "compile" the blocklist into a prefix
+# table instead: one set of network numbers per
+# prefix length (/8, /16, /24, /32 ...).
+#
+# To check an IP we mask it down to each prefix
+# length that exists in the list and do ONE set
+# lookup per length. So the cost depends on the
+# number of prefix lengths (at most 33 for IPv4,
+# 129 for IPv6) — NOT on the number of entries.
+#
+# Think of it like a phone book sorted by area
+# code: you don't read every number, you jump
+# straight to the right page.
+# ============================================
+
+import ipaddress
+import os
+import socket
+import threading
+import time
+
+MAX_BITS = {4: 32, 6: 128}
+IPV4_MAPPED = ipaddress.ip_network("::ffff:0:0/96")
+
+
+def ip_to_int(ip: str) -> tuple[int, int] | None:
+    """Turn "1.2.3.4" / "2001:db8::1" into (version, number). None if invalid.
+
+    IPv4-mapped IPv6 addresses ("::ffff:1.2.3.4") come back as IPv4.
+    """
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except OSError:
+        pass
+    try:
+        address = ipaddress.IPv6Address(socket.inet_pton(socket.AF_INET6, ip))
+    except OSError:
+        return None
+    # "::ffff:1.2.3.4" is an IPv4 client on a dual-stack socket — check it
+    # against the IPv4 entries, or it would slip past every IPv4 range
+    if address.ipv4_mapped is not None:
+        return 4, int(address.ipv4_mapped)
+    return 6, int(address)
+
+
+class CompiledBlocklist:
+    """An immutable, ready-to-query blocklist (IPv4 + IPv6)."""
+
+    def __init__(self, entries):
+        self.size = 0
+        # One table per IP version: {prefix_length: set(network_numbers)}
+        tables = {4: {}, 6: {}}
+
+        for entry in entries:
+            if "/" in entry:
+                network = ipaddress.ip_network(entry, strict=False)
+                if network.version == 6 and network.prefixlen < 96 and network.supernet_of(IPV4_MAPPED):
+                    # Also covers every mapped client, and those are looked up as IPv4
+                    tables[4].setdefault(0, set()).add(0)
+                elif network.version == 6 and network.subnet_of(IPV4_MAPPED):
+                    # "::ffff:10.0.0.0/104" is 10.0.0.0/8, same as for single addresses
+                    network = ipaddress.ip_network((int(network.network_address) & 0xFFFFFFFF, network.prefixlen - 96))
+                version, prefix = network.version, network.prefixlen
+                number = int(network.network_address)
+            else:
+                parsed = ip_to_int(entry)
+                if parsed is None:
+                    raise ValueError(f"{entry!r} is not a valid IP address")
+                version, number = parsed
+                prefix = MAX_BITS[version]
+            tables[version].setdefault(prefix, set()).add(number)
+            self.size += 1
+
+        # Pre-compute (mask, set) pairs — longest prefix first
+        self._lookup = {}
+        for version, table in tables.items():
+            max_bits = MAX_BITS[version]
+            all_ones = (1 << max_bits) - 1
+            self._lookup[version] = [
+                (all_ones ^ ((1 << (max_bits - length)) - 1), networks_set)
+                for length, networks_set in sorted(table.items(), reverse=True)
+            ]
+
+    def __contains__(self, ip: str) -> bool:
+        parsed = ip_to_int(ip)
+        if parsed is None:
+            return False
+
+        version, number = parsed
+        for mask, networks_set in self._lookup[version]:
+            if number & mask in networks_set:
+                return True
+        return False
+
+
+def parse_blocklist_lines(lines):
+    """Yield entries from blocklist text — one IP/CIDR per line, # for comments."""
+    for line in lines:
+        entry = line.split("#", 1)[0].strip()
+        if entry:
+            yield entry
+
+
+class IPBlocklist:
+    """
+    A blocklist that hot-reloads itself from a file.
+
+    When the file changes, the new table is built on a background thread
+    and then swapped in with a single attribute assignment. Requests never
+    wait for the rebuild, and always see either the old list or the new
+    list — never a half-built one. No restart needed after editing the file.
+    """
+
+    def __init__(self, entries=(), path: str | None = None, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._static_entries = list(entries)
+        self._compiled = CompiledBlocklist(self._static_entries)
+        self._last_mtime = None
+        self._next_check = 0.0
+        self._reloading = threading.Lock()
+        if path:
+            self.reload()
+
+    @property
+    def size(self) -> int:
+        return self._compiled.size
+
+    def is_blocked(self, ip: str) -> bool:
+        self.reload_if_changed()
+        return ip in self._compiled
+
+    def reload_if_changed(self) -> bool:
+        """Start a background reload if the file's modification time changed."""
+        if not self.path:
+            return False
+
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._last_mtime or self._reloading.locked():
+            return False
+
+        threading.Thread(target=self.reload, daemon=True).start()
+        return True
+
+    def reload(self) -> bool:
+        """Read the file, build a new table and swap it in. Returns True on success."""
+        with self._reloading:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                with open(self.path) as f:
+                    file_entries = list(parse_blocklist_lines(f))
+                compiled = CompiledBlocklist(self._static_entries + file_entries)
+            except FileNotFoundError:
+                return False
+            except ValueError as e:
+                # A bad line in the file — keep serving the old list
+                print(f"[BLOCKLIST] Reload failed, keeping old list: {e}")
+                self._last_mtime = mtime
+                return False
+
+            self._compiled = compiled  # atomic swap
+            self._last_mtime = mtime
+            print(f"[BLOCKLIST] Loaded {compiled.size} entries from {self.path}")
+            return True
@@ -0,0 +1,168 @@
+# ============================================
+# Event Loop Lag Monitor — Who is blocking?
+# ============================================
+# FastAPI runs every "async def" route on ONE
+# event loop. If one of them calls something
+# blocking (time.sleep, requests.get, a slow
+# loop...) EVERY other request has to wait.
+#
+# Think of a single cashier at a shop: if one
+# customer starts chatting for 2 minutes, the
+# whole queue stands still.
+#
+# This monitor does two things:
+#   1. A tiny background task wakes up every
+#      100ms and measures how LATE it woke up.
+#      That lateness = "loop lag" (histogram).
+#   2. A watchdog THREAD (outside the loop)
+#      notices when the task hasn't woken up
+#      for too long and prints the stack of
+#      whatever code is hogging the loop, and
+#      which request/route it was serving.
+#
+# The fix for a blocking route is usually to
+# make it a plain "def" — FastAPI then runs it
+# in a worker thread and the loop stays free.
+# ============================================
+
+import asyncio
+import contextvars
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from metrics import Histogram
+
+# Histogram bucket upper bounds in seconds (like Prometheus "le" buckets)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# The ASGI scope of the request a task is serving (set by TrackRequests).
+# Tasks copy their context when created, so it follows the request into
+# the tasks it starts.
+_current_request = contextvars.ContextVar("current_request", default=None)
+
+
+class TrackRequests:
+    """
+    ASGI middleware that lets the watchdog name the request that blocked
+    the loop.
+
+        app.add_middleware(TrackRequests)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_request.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_request.reset(token)
+
+
+def describe_request(scope) -> dict | None:
+    """The request ("GET /users/42") and its route template ("/users/{id}", once routing has picked one)."""
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return {
+        "request": f"{scope['method']} {scope['path']}",
+        "route": route.path if route is not None else "<unmatched>",
+    }
+
+
+class LoopLagMonitor:
+    """
+    Samples event loop latency and reports code that blocks the loop.
+
+    interval  — how often the background task wakes up (seconds)
+    threshold — how long the loop may be stuck before we print a report
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, max_reports: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = Histogram(
+            "event_loop_lag_seconds", "How late the event loop woke up.", buckets=LAG_BUCKETS
+        )
+        self.max_lag = 0.0
+        self.blocked_reports = deque(maxlen=max_reports)
+
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_beat = time.monotonic()
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._sample_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _sample_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.histogram.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            self._last_beat = time.monotonic()
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._last_beat
+            stuck_for = time.monotonic() - beat - self.interval
+            if stuck_for < self.threshold or beat == reported_beat:
+                continue
+
+            # Report each stall only once, with the stack of the loop thread
+            # and the request its running task is serving
+            reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=10)) if frame else "<no stack>"
+            request = self._running_request()
+            self.blocked_reports.append({
+                "blocked_for_seconds": round(stuck_for, 3),
+                "at": time.strftime("%H:%M:%S"),
+                **(request or {"request": None, "route": None}),
+                "stack": stack,
+            })
+            where = f" in {request['request']} (route {request['route']})" if request else ""
+            print(f"[LOOP] Event loop blocked for over {stuck_for * 1000:.0f} ms{where}! Blocking code:\n{stack}")
+
+    def _running_request(self) -> dict | None:
+        """The request of the task that is running on the loop right now, if any."""
+        task = asyncio.current_task(self._loop)
+        if task is None:
+            return None
+        return describe_request(task.get_context().get(_current_request))
+
+    def snapshot(self) -> dict:
+        return {
+            "lag_seconds": {**self.histogram.snapshot(), "max": round(self.max_lag, 6)},
+            "threshold_seconds": self.threshold,
+            "blocked_reports": list(self.blocked_reports),
+        }
+
@@ -7,11 +7,13 @@
 # ============================================
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
+from metrics import CONTENT_TYPE, MetricsMiddleware, MetricsRegistry, http_metrics, route_label
+
 
 # --- STEP 1: Create the rate limiter ---
 # get_remote_address = identifies each user by their IP address
@@ -29,9 +31,23 @@ app = FastAPI(
 app.state.limiter = limiter
 
 
+# --- STEP 2.5: Keep score (served at GET /metrics) ---
+metrics = MetricsRegistry()
+requests_total, request_duration = http_metrics(metrics)
+rate_limited_total = metrics.counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter.", ("route",)
+)
+
+
+# Counts every request, with the status the client got — also the ones
+# whose handler crashed (500), which an @app.middleware function never sees
+app.add_middleware(MetricsMiddleware, requests_total=requests_total, request_duration=request_duration)
+
+
 # --- STEP 3: Handle what happens when someone exceeds the limit ---
 @app.exception_handler(RateLimitExceeded)
 async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    rate_limited_total.inc(route_label(request))
     return JSONResponse(
         status_code=429,
         content={
@@ -89,4 +105,11 @@ async def free_route():
 async def claude_code(request: Request):
     return {
         "message": "This route simulates a very high limit, like for an AI model. You can hit it 100 times every 5 hours!",
-    }
\ No newline at end of file
+    }
+
+
+# ROUTE 6: Metrics — the scoreboard for Prometheus/Grafana (never rate limited)
+@app.get("/metrics")
+@limiter.exempt
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
@@ -7,20 +7,57 @@
 # ============================================
 
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
 from fastapi import FastAPI, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import jwt, JWTError
 import rich
 
+from compression import CompressionMiddleware
+from ip_blocklist import IPBlocklist
+from loop_monitor import LoopLagMonitor, TrackRequests
+from metrics import CONTENT_TYPE, MetricsMiddleware, MetricsRegistry, http_metrics
+from route_policy import PUBLIC, RoutePolicy, TokenCache
+
+# ============================================
+# EVENT LOOP MONITOR (The Traffic Camera)
+# ============================================
+# Watches for code that blocks the event loop
+# and prints where it happened — and for which
+# route. See the numbers at /debug/event-loop
+# (login required: stack traces and route names
+# are not for everyone).
+# ============================================
+loop_monitor = LoopLagMonitor(interval=0.1, threshold=0.25)
+
+# The scoreboard — totals are served at GET /metrics (login required)
+metrics = MetricsRegistry()
+requests_total, request_duration = http_metrics(metrics)
+metrics.register(loop_monitor.histogram)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once when the server starts (before "yield") and once when it stops
+    await loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+
+
 app = FastAPI(
     title="Middleware Demo",
     description="A beginner-friendly API to learn middleware",
+    lifespan=lifespan,
 )
 
+# Lets the monitor tell which request was running when the loop got stuck
+app.add_middleware(TrackRequests)
+
 
 # ============================================
 # AUTH CONFIG (Fake Users + JWT Secret)
@@ -38,8 +75,15 @@ FAKE_USERS = {
 }
 
 # Routes that DON'T need login (public routes)
+# Supports exact paths, folders ("/static/*") and params ("/posts/{id}")
 PUBLIC_ROUTES = ["/", "/docs", "/openapi.json", "/token", "/redoc", "/favicon.ico"]
 
+# Compiled once at startup — every other route needs a login
+ROUTE_POLICY = RoutePolicy.compile({route: PUBLIC for route in PUBLIC_ROUTES})
+
+# Tokens we already verified (skips jwt.decode until the token expires)
+token_cache = TokenCache(max_size=10_000)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
@@ -78,12 +122,12 @@ async def logging_middleware(request: Request, call_next):
 @app.middleware("http")
 async def response_time_middleware(request: Request, call_next):
     # Start the stopwatch
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     response = await call_next(request)  # Let the request pass through
 
     # Stop the stopwatch
-    process_time = time.time() - start_time
+    process_time = time.perf_counter() - start_time
     response.headers["X-Process-Time"] = f"{process_time:.4f} seconds"
     print(f"[TIMER] {request.url.path} took {process_time:.4f} seconds")
     return response
@@ -95,14 +139,23 @@ async def response_time_middleware(request: Request, call_next):
 # Blocks requests that contain a specific
 # header. Like a bouncer checking your ID
 # at the club door — no ID, no entry.
+#
+# The bouncer's list can hold single IPs or
+# whole ranges (CIDR like "10.0.0.0/8"), for
+# both IPv4 and IPv6. Extra entries are read
+# from blocked_ips.txt and picked up again
+# whenever that file changes — no restart.
 # ============================================
 BLOCKED_IPS = ["192.168.1.100", "10.0.0.50"]
+BLOCKLIST_FILE = Path(__file__).parent / "blocked_ips.txt"
+
+blocklist = IPBlocklist(BLOCKED_IPS, path=str(BLOCKLIST_FILE))
 
 @app.middleware("http")
 async def block_bad_users_middleware(request: Request, call_next):
     client_ip = request.client.host
 
-    if client_ip in BLOCKED_IPS:
+    if blocklist.is_blocked(client_ip):
         # Block the request — it never reaches the endpoint
         print(f"[BLOCKED] Request from {client_ip} was rejected!")
         return JSONResponse(
@@ -162,7 +215,7 @@ async def custom_header_middleware(request: Request, call_next):
 @app.middleware("http")
 async def auth_middleware(request: Request, call_next):
     # 1. Let public routes pass without any check
-    if request.url.path in PUBLIC_ROUTES:
+    if ROUTE_POLICY.match(request.url.path) == PUBLIC:
         return await call_next(request)
 
     # 2. Get the Authorization header
@@ -182,7 +235,10 @@ async def auth_middleware(request: Request, call_next):
     token = auth_header.split("Bearer ")[1]
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_cache.get(token)
+        if payload is None:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            token_cache.put(token, payload)
         username = payload.get("sub")
         if username is None:
             raise JWTError("No username in token")
@@ -202,6 +258,35 @@ async def auth_middleware(request: Request, call_next):
     return response
 
 
+# ============================================
+# MIDDLEWARE 7: Compression + ETag (The Zip File)
+# ============================================
+# Zips big responses (brotli/gzip) so fewer
+# bytes travel over the network, and gives
+# /dashboard and /headers a fingerprint (ETag)
+# so browsers can ask "has this changed?" and
+# get an empty 304 reply if it hasn't.
+# ============================================
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=500,                       # smaller bodies aren't worth zipping
+    etag_paths=["/dashboard", "/headers"],  # GET routes that get an ETag
+)
+
+
+# ============================================
+# MIDDLEWARE 8: Metrics (The Scoreboard)
+# ============================================
+# Writes every request on the scoreboard (see
+# GET /metrics): route, status and how long
+# it took. Added LAST so it is the outermost
+# layer — the 304s from the ETag check and the
+# 403s from the bouncer are counted with the
+# status the client really got.
+# ============================================
+app.add_middleware(MetricsMiddleware, requests_total=requests_total, request_duration=request_duration)
+
+
 # ============================================
 # ROUTES (API Endpoints)
 # ============================================
@@ -249,9 +334,11 @@ async def home():
 
 
 @app.get("/slow")
-async def slow_route():
+def slow_route():
     # This route is intentionally slow (2 seconds)
-    # so you can see the Response Time middleware in action
+    # so you can see the Response Time middleware in action.
+    # time.sleep blocks, so this is a plain "def": FastAPI runs
+    # it in a worker thread and other requests keep flowing.
     time.sleep(2)
     return {
         "message": "This route took 2 seconds on purpose.",
@@ -295,6 +382,18 @@ async def dashboard():
     }
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    # Prometheus-style totals: requests, latency, event loop lag
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/debug/event-loop")
+async def event_loop_stats():
+    # Loop lag histogram + recent "who blocked the loop" reports
+    return loop_monitor.snapshot()
+
+
 # ============================================
 # HOW TO RUN THIS APP
 # ============================================
@@ -0,0 +1,151 @@
+# ============================================
+# Route Policy — Who needs a login for which URL?
+# ============================================
+# Checking "path in PUBLIC_ROUTES" walks the
+# whole list and only understands exact paths.
+#
+# Here we compile all route rules ONCE at
+# startup into a tree of path segments:
+#
+#   /               -> public
+#   /docs           -> public
+#   /static/*       -> public  (whole folder)
+#   /users/{id}     -> auth    (any id)
+#
+# A lookup walks one tree level per segment of
+# the URL ("/users/42" = 2 steps), one dict
+# lookup per step and no going back, so it
+# costs the same with 5 routes or 5,000 routes.
+#
+# Paths are matched exactly as they arrive:
+# "/docs/" and "//docs" are NOT "/docs", so
+# they can't sneak past the login check.
+#
+# We also keep a small cache of tokens we have
+# already verified, so jwt.decode doesn't run
+# again for every request with the same token.
+# ============================================
+
+import time
+from collections import OrderedDict
+
+PUBLIC = "public"
+AUTH_REQUIRED = "auth"
+
+
+class _Node:
+    __slots__ = ("children", "param_child", "policy", "prefix_policy")
+
+    def __init__(self):
+        self.children = {}          # exact segment -> _Node
+        self.param_child = None     # "{anything}" -> _Node
+        self.policy = None          # policy when the path ends here
+        self.prefix_policy = None   # policy for everything below ("/*")
+
+
+def _split(path: str) -> list[str]:
+    """Path segments: "/users/42" -> ["users", "42"]. Empty ones are kept: "/docs/" -> ["docs", ""]."""
+    return path.split("/")[1:]
+
+
+class RoutePolicy:
+    """
+    Maps URL paths to an auth requirement.
+
+    Patterns:
+        "/docs"          exact path
+        "/static/*"      the path and everything under it
+        "/users/{id}"    any single segment in place of {id}
+
+    Exact segments win over {params}: when a segment matches an exact
+    child, the walk goes on from there and never comes back to try the
+    {param} instead. If the walk gets stuck, the deepest "/*" rule on
+    the way applies, else the default. {params} never match an empty
+    segment ("/users/" is not "/users/{id}").
+    """
+
+    def __init__(self, default: str = AUTH_REQUIRED):
+        self.default = default
+        self._root = _Node()
+
+    @classmethod
+    def compile(cls, rules: dict[str, str], default: str = AUTH_REQUIRED) -> "RoutePolicy":
+        policy = cls(default=default)
+        for pattern, requirement in rules.items():
+            policy.add(pattern, requirement)
+        return policy
+
+    def add(self, pattern: str, requirement: str) -> None:
+        node = self._root
+        segments = _split(pattern)
+        is_prefix = segments[-1] == "*"
+        if is_prefix:
+            segments = segments[:-1]
+
+        for segment in segments:
+            if segment.startswith("{") and segment.endswith("}"):
+                if node.param_child is None:
+                    node.param_child = _Node()
+                node = node.param_child
+            else:
+                node = node.children.setdefault(segment, _Node())
+
+        if is_prefix:
+            node.prefix_policy = requirement
+        else:
+            node.policy = requirement
+
+    def match(self, path: str) -> str:
+        node = self._root
+        fallback = self.default
+        for segment in _split(path):
+            if node.prefix_policy is not None:
+                fallback = node.prefix_policy  # the deepest "/*" folder so far
+            child = node.children.get(segment)
+            if child is None and segment:
+                child = node.param_child
+            if child is None:
+                return fallback
+            node = child
+
+        if node.policy is not None:
+            return node.policy
+        if node.prefix_policy is not None:
+            return node.prefix_policy
+        return fallback
+
+
+class TokenCache:
+    """
+    Remembers tokens that already passed jwt.decode.
+
+    Bounded (least recently used tokens are dropped first) and never
+    returns a token after its "exp" time, so an expired token still gets
+    rejected even if it's in the cache.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+        self._items: OrderedDict[str, dict] = OrderedDict()
+
+    def get(self, token: str) -> dict | None:
+        payload = self._items.get(token)
+        if payload is None:
+            return None
+        if payload["exp"] <= time.time():
+            del self._items[token]
+            return None
+        self._items.move_to_end(token)
+        return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        # Only cache tokens that can expire — otherwise they'd live forever
+        if "exp" not in payload:
+            return
+        self._items[token] = payload
+        self._items.move_to_end(token)
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,130 @@
+import sys
+import os
+import json
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from book_file import BookFile, FileWatcher, write_jsonl
+from catalog import Catalog
+
+
+def make_books(first_id, count, step=1):
+    return [
+        {
+            "id": first_id + i * step,
+            "title": f"Book {first_id + i * step}",
+            "author": f"Author {i % 3}",
+            "genre": ["Fiction", "History"][i % 2],
+            "published_year": 2000 + i,
+            "available": i % 4 != 0,
+        }
+        for i in range(count)
+    ]
+
+
+def index_meta(path):
+    return json.loads((path.parent / (path.name + ".index") / "meta.json").read_text())
+
+
+def append(path, books):
+    with open(path, "a") as f:
+        for book in books:
+            f.write(json.dumps(book) + "\n")
+
+
+# ---- Same answers as books.json ----
+
+def test_jsonl_catalog_matches_json_catalog(tmp_path):
+    books = make_books(1, 50)
+    path = tmp_path / "books.jsonl"
+    write_jsonl(books, path)
+    from_file = Catalog.load(path)
+    in_memory = Catalog({"total": 50, "books": books})
+
+    assert from_file.books_json() == in_memory.books_json() == json.dumps({"total": 50, "books": books})
+    assert from_file.get(7) == in_memory.get(7)
+    assert from_file.get(999) is None
+    assert from_file.page(genre="history", limit=5) == in_memory.page(genre="history", limit=5)
+    assert from_file.available("Fiction") == in_memory.available("Fiction")
+
+    from_file.set_available(1, True)
+    assert from_file.book_json(1) == json.dumps({**books[0], "available": True})
+    assert json.loads(from_file.books_json())["books"][0]["available"] is True
+
+
+def test_ids_out_of_order(tmp_path):
+    path = tmp_path / "books.jsonl"
+    write_jsonl(make_books(100, 20, step=-3), path)
+    book_file = BookFile(path)
+    assert [book_file.record(book_file.position(book_id))["id"] for book_id in (100, 43)] == [100, 43]
+    assert book_file.position(101) is None
+
+
+# ---- The offset index ----
+
+def test_appended_books_are_indexed_incrementally(tmp_path):
+    path = tmp_path / "books.jsonl"
+    write_jsonl(make_books(1, 10), path)
+    BookFile(path)
+    before = index_meta(path)
+
+    append(path, make_books(11, 5))
+    book_file = BookFile(path)
+    after = index_meta(path)
+
+    assert after["generation"] == before["generation"]
+    assert (after["count"], len(book_file)) == (15, 15)
+    assert book_file.record(book_file.position(13))["title"] == "Book 13"
+
+
+def test_half_written_line_waits(tmp_path):
+    path = tmp_path / "books.jsonl"
+    write_jsonl(make_books(1, 3), path)
+    with open(path, "a") as f:
+        f.write('{"id": 4, "title": "Bo')
+    assert len(BookFile(path)) == 3
+
+    with open(path, "a") as f:
+        f.write('ok 4", "author": "A", "genre": "Fiction", "published_year": 2020, "available": true}\n')
+    book_file = BookFile(path)
+    assert len(book_file) == 4
+    assert book_file.record(3)["title"] == "Book 4"
+
+
+def test_replaced_file_is_indexed_again(tmp_path):
+    path = tmp_path / "books.jsonl"
+    write_jsonl(make_books(1, 10), path)
+    old = BookFile(path)
+    generation = index_meta(path)["generation"]
+
+    write_jsonl(make_books(500, 4), path)
+    new = BookFile(path)
+
+    assert index_meta(path)["generation"] == generation + 1
+    assert not list(old.index_dir.glob(f"*-{generation}.*"))
+    assert len(new) == 4 and new.position(1) is None and new.position(500) == 0
+    assert old.record(0)["id"] == 1  # the old mapping still works
+
+
+# ---- Watching for changes ----
+
+def test_watcher_calls_back_on_change_and_retries_failures(tmp_path):
+    path = tmp_path / "books.jsonl"
+    write_jsonl(make_books(1, 2), path)
+    calls = []
+    outcomes = [RuntimeError("half-written"), None]
+
+    def on_change():
+        calls.append(1)
+        outcome = outcomes.pop(0)
+        if outcome:
+            raise outcome
+
+    watcher = FileWatcher({path: on_change})
+    watcher.check()
+    assert calls == []
+
+    append(path, make_books(3, 1))
+    watcher.check()  # fails
+    watcher.check()  # tried again, works
+    watcher.check()  # nothing new
+    assert len(calls) == 2
@@ -0,0 +1,109 @@
+import sys
+import os
+import json
+import random
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from catalog import Catalog
+
+GENRES = ["Fiction", "History", "Science"]
+AUTHORS = ["Ann Lee", "Bo Chen", "Cy Diaz", "Di Eze"]
+
+
+def make_catalog(count=250):
+    # Ids out of order on purpose: cursors follow the catalog order, not the ids
+    books = [
+        {
+            "id": 1000 - i,
+            "title": f"Book {i}",
+            "author": AUTHORS[i % len(AUTHORS)],
+            "genre": GENRES[i % len(GENRES)],
+            "published_year": 1950 + i % 70,
+            "available": i % 5 != 0,
+        }
+        for i in range(count)
+    ]
+    return Catalog({"total": count, "books": books}), books
+
+
+def all_pages(catalog, limit, **filters):
+    books, cursor = catalog.page(limit=limit, **filters)
+    while cursor is not None:
+        page, cursor = catalog.page(limit=limit, after=cursor, **filters)
+        books += page
+    return books
+
+
+def test_pages_cover_every_book_once():
+    catalog, books = make_catalog()
+    assert all_pages(catalog, 7) == books
+    assert catalog.count() == len(books)
+
+
+def test_last_page_has_no_cursor():
+    catalog, books = make_catalog(40)
+    page, cursor = catalog.page(limit=40)
+    assert len(page) == 40
+    assert cursor is None
+
+
+def test_genre_and_author_filters_ignore_case():
+    catalog, books = make_catalog()
+    expected = [book for book in books if book["genre"] == "History"]
+    assert all_pages(catalog, 9, genre="history") == expected
+    assert catalog.count(genre="HISTORY") == len(expected)
+
+    expected = [book for book in books if book["genre"] == "Science" and book["author"] == "Bo Chen"]
+    assert all_pages(catalog, 4, genre="science", author="bo chen") == expected
+    assert catalog.count(genre="Science", author="Bo Chen") == len(expected)
+
+
+def test_unknown_genre_is_empty():
+    catalog, _ = make_catalog()
+    assert catalog.page(genre="Poetry") == ([], None)
+    assert catalog.count(genre="Poetry") == 0
+
+
+def test_fields_keep_only_what_was_asked_and_the_id():
+    catalog, books = make_catalog()
+    page, _ = catalog.page(limit=3, fields=["title"])
+    assert page == [{"id": book["id"], "title": book["title"]} for book in books[:3]]
+
+
+def test_pages_see_availability_changes():
+    catalog, books = make_catalog()
+    assert books[1]["available"] is True
+    catalog.set_available(books[1]["id"], False)
+    page, _ = catalog.page(after=0, limit=1, fields=["available"])
+    assert page == [{"id": books[1]["id"], "available": False}]
+    assert json.loads(catalog.books_json())["books"][1]["available"] is False
+
+
+def test_available_index_follows_changes():
+    catalog, books = make_catalog()
+    catalog.available("Fiction")  # builds the index, so the changes below update it
+    rng = random.Random(0)
+    for _ in range(500):
+        book = rng.choice(books)
+        book["available"] = rng.random() < 0.5
+        catalog.set_available(book["id"], book["available"])
+    for genre in GENRES:
+        expected = [book for book in books if book["genre"] == genre and book["available"]]
+        assert catalog.available(genre.upper()) == expected
+
+
+def test_genre_version_changes_only_with_its_genre():
+    catalog, books = make_catalog()
+    fiction = [book for book in books if book["genre"] == "Fiction" and book["available"]]
+    fiction_version, history_version = catalog.genre_version("Fiction"), catalog.genre_version("History")
+    catalog.set_available(fiction[0]["id"], False)
+    changed = catalog.genre_version("fiction")
+    catalog.set_available(fiction[0]["id"], False)  # no change, no new version
+    assert fiction_version != changed == catalog.genre_version("FICTION")
+    assert catalog.genre_version("History") == history_version
+
+
+def test_a_new_catalog_never_reuses_versions():
+    old, _ = make_catalog()
+    new, _ = make_catalog()
+    assert old.genre_version("Fiction") != new.genre_version("Fiction")
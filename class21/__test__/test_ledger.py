@@ -0,0 +1,236 @@
+import sys
+import os
+import asyncio
+import json
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# Keep loans in a throwaway folder instead of data/ledger
+os.environ["LEDGER_DIR"] = tempfile.mkdtemp()
+
+import pytest
+from fastmcp import Client
+from ledger import DAY, Ledger, LoanError, limits_from_rules
+import server
+from server import ledger, mcp, rules
+
+CLIENTS = 300
+
+
+def setup_function():
+    """Start every test with every book on the shelf"""
+    for book_id in list(ledger.loans):
+        ledger.give_back(book_id)
+
+
+def run_clients(count, call):
+    """Open `count` MCP sessions at once and run call(client, i) in each. Returns the results."""
+    async def one(i):
+        async with Client(mcp) as client:
+            return await call(client, i)
+
+    async def all_of_them():
+        return await asyncio.gather(*(one(i) for i in range(count)))
+
+    return asyncio.run(all_of_them())
+
+
+async def issue(client, book_id, member):
+    result = await client.call_tool("issue_book", {"book_id": book_id, "member": member})
+    return json.loads(result.content[0].text)
+
+
+async def give_back(client, book_id):
+    result = await client.call_tool("return_book", {"book_id": book_id})
+    return json.loads(result.content[0].text)
+
+
+# ---- Rules ----
+
+def test_limits_come_from_rules_json():
+    assert limits_from_rules(rules) == (3, 14)
+    assert (ledger.max_books, ledger.loan_days) == (3, 14)
+
+
+def test_books_issued_in_books_json_start_on_loan():
+    first_segment = sorted(Path(os.environ["LEDGER_DIR"]).glob("loans-*.log"))[0]
+    first_changes = [json.loads(line) for line in first_segment.read_text().splitlines()[:2]]
+    assert [change[1:4] for change in first_changes] == [["issue", 3, "unknown"], ["issue", 5, "unknown"]]
+
+
+# ---- Many sessions at once, through the MCP server ----
+
+def test_only_one_session_can_issue_a_book():
+    results = run_clients(CLIENTS, lambda client, i: issue(client, 1, f"member-{i}"))
+    assert sum("success" in result for result in results) == 1
+    assert all(result["error"] == "'Atomic Habits' is already issued" for result in results if "error" in result)
+    assert server.catalog.get(1)["available"] is False
+
+
+def test_only_one_session_can_return_a_book():
+    ledger.issue(2, "ali")
+    results = run_clients(CLIENTS, lambda client, i: give_back(client, 2))
+    assert sum("success" in result for result in results) == 1
+    assert server.catalog.get(2)["available"] is True
+
+
+def test_member_limit_holds_under_load():
+    book_ids = [book["id"] for book in json.loads(server.catalog.books_json())["books"]]
+    results = run_clients(CLIENTS, lambda client, i: issue(client, book_ids[i % len(book_ids)], "ali"))
+    assert sum("success" in result for result in results) == 3
+    assert len(ledger.member_loans("ali")) == 3
+
+
+async def issue_anonymously(client, book_id):
+    result = await client.call_tool("issue_book", {"book_id": book_id})
+    return json.loads(result.content[0].text)
+
+
+def test_callers_without_a_member_are_not_one_member():
+    results = run_clients(1, lambda client, i: asyncio.gather(*(issue_anonymously(client, book_id) for book_id in range(1, 6))))[0]
+    assert all("success" in result for result in results)
+    assert len(ledger.loans) == 5 > ledger.max_books
+
+
+def test_overdue_anonymous_loan_does_not_block_other_callers(monkeypatch):
+    run_clients(1, lambda client, i: issue_anonymously(client, 1))
+    monkeypatch.setattr(ledger, "clock", lambda: time.time() + (ledger.loan_days + 1) * DAY)
+    assert "success" in run_clients(1, lambda client, i: issue_anonymously(client, 2))[0]
+
+
+def test_issue_and_return_keep_old_messages():
+    async def flow(client, i):
+        return [
+            await issue(client, 4, "ali"),
+            await issue(client, 4, "sara"),
+            await give_back(client, 4),
+            await give_back(client, 4),
+        ]
+
+    issued, issued_again, returned, returned_again = run_clients(1, flow)[0]
+    assert issued["success"] == "'Deep Work' has been issued"
+    assert "due" in issued
+    assert issued_again == {"error": "'Deep Work' is already issued"}
+    assert returned == {"success": "'Deep Work' has been returned"}
+    assert returned_again == {"error": "'Deep Work' is not issued"}
+
+
+def test_recommendation_follows_issue_and_return():
+    async def flow(client, i):
+        async def prompt():
+            result = await client.get_prompt("book_recommendation", {"genre": "Programming"})
+            return result.messages[0].content.text
+        return [await prompt(), await issue(client, 2, "ali"), await prompt(), await give_back(client, 2), await prompt()]
+
+    before, _, issued, _, returned = run_clients(1, flow)[0]
+    assert "The Pragmatic Programmer" in before
+    assert "The Pragmatic Programmer" not in issued
+    assert "Clean Code" in issued
+    assert returned == before
+
+
+def test_reload_swaps_in_a_new_catalog_with_the_loans():
+    ledger.issue(4, "ali")
+    old = server.catalog
+    server.reload_catalog()
+    assert server.catalog is not old
+    assert server.catalog.get(4)["available"] is False
+    assert server.catalog.get(3)["available"] is True
+    ledger.give_back(4)
+    assert server.catalog.get(4)["available"] is True
+
+
+# ---- The ledger itself, from hundreds of threads ----
+
+def test_threads_never_break_the_rules(tmp_path):
+    store = Ledger(tmp_path, snapshot_every=500)
+    members = [f"member-{i}" for i in range(40)]
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(200):
+            book_id = rng.randint(1, 100)
+            try:
+                if rng.random() < 0.6:
+                    store.issue(book_id, rng.choice(members))
+                else:
+                    store.give_back(book_id)
+            except LoanError:
+                pass
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    for member in members:
+        assert len(store.member_loans(member)) <= 3
+    loans = dict(store.loans)
+    store.close(snapshot=False)
+
+    # A restart gets back exactly the same loans, from snapshot + log
+    assert Ledger(tmp_path).loans == loans
+
+
+# ---- Persistence ----
+
+def test_loans_survive_a_restart(tmp_path):
+    store = Ledger(tmp_path)
+    store.issue(1, "ali")
+    store.issue(2, "sara")
+    store.give_back(1)
+    store.close(snapshot=False)
+
+    reopened = Ledger(tmp_path)
+    assert list(reopened.loans) == [2]
+    assert reopened.loan(2)["member"] == "sara"
+
+
+def test_snapshot_drops_old_log_segments(tmp_path):
+    store = Ledger(tmp_path, snapshot_every=1_000_000)
+    for book_id in range(1, 11):
+        store.issue(book_id, f"member-{book_id}")
+    store.snapshot()
+    store.give_back(5)
+    store.close(snapshot=False)
+
+    assert len(list(tmp_path.glob("loans-*.log"))) == 1
+    assert sorted(Ledger(tmp_path).loans) == [1, 2, 3, 4, 6, 7, 8, 9, 10]
+
+
+def test_torn_last_line_is_cut_off(tmp_path):
+    store = Ledger(tmp_path)
+    store.issue(1, "ali")
+    store.close(snapshot=False)
+    segment = next(tmp_path.glob("loans-*.log"))
+    with open(segment, "a") as f:
+        f.write('[2,"issue",2,"sa')  # the server died mid-write
+
+    reopened = Ledger(tmp_path)
+    assert list(reopened.loans) == [1]
+    reopened.issue(2, "sara")
+    reopened.close(snapshot=False)
+    assert sorted(Ledger(tmp_path).loans) == [1, 2]
+
+
+# ---- Member rules ----
+
+def test_overdue_member_cannot_borrow(tmp_path):
+    now = [1_000_000.0]
+    store = Ledger(tmp_path, clock=lambda: now[0])
+    store.issue(1, "ali")
+    now[0] += 15 * DAY
+    with pytest.raises(LoanError) as error:
+        store.issue(2, "ali")
+    assert error.value.reason == "overdue"
+    store.give_back(1)
+    store.issue(2, "ali")
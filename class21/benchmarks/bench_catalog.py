@@ -0,0 +1,137 @@
+"""
+Benchmark: reading and changing a 1,000,000-book catalog.
+
+"before" is what server.py did: scan the book list for an id and
+json.dumps the whole catalog on every `data://books` read. "catalog" is
+catalog.py: dict lookups, and the full response cached until a book
+changes (then rebuilt from per-book JSON that is already there).
+
+Run from the class21 folder:
+    uv run python benchmarks/bench_catalog.py
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from catalog import Catalog
+
+BOOKS = 1_000_000
+GENRES = 50
+LOOKUPS = 20
+
+
+def make_document(count: int) -> dict:
+    books = [
+        {
+            "id": i,
+            "title": f"Book {i}",
+            "author": f"Author {i % 10_000}",
+            "genre": f"Genre {i % GENRES}",
+            "published_year": 1900 + i % 125,
+            "available": True,
+        }
+        for i in range(1, count + 1)
+    ]
+    return {"total": count, "books": books}
+
+
+# ---------- The old server.py code ----------
+
+def before_all_books(books_data: dict) -> str:
+    return json.dumps(books_data)
+
+
+def before_book_by_id(books_data: dict, id: int) -> str:
+    for book in books_data["books"]:
+        if book["id"] == id:
+            return json.dumps(book)
+    return json.dumps({"error": f"Book with id {id} not found"})
+
+
+def before_set_available(books_data: dict, book_id: int, available: bool) -> None:
+    for book in books_data["books"]:
+        if book["id"] == book_id:
+            book["available"] = available
+            return
+
+
+def before_genre(books_data: dict, genre: str) -> list[dict]:
+    return [book for book in books_data["books"] if book["available"] and book["genre"].lower() == genre.lower()]
+
+
+# ---------- The same operations on a Catalog ----------
+
+def catalog_book_by_id(catalog: Catalog, id: int) -> str:
+    book_json = catalog.book_json(id)
+    return book_json if book_json is not None else json.dumps({"error": f"Book with id {id} not found"})
+
+
+def timed(function, repeat: int = 1) -> float:
+    """Average seconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def row(name: str, before: float, after: float) -> None:
+    print(f"{name:<34} {before * 1000:>11.3f}ms {after * 1000:>11.4f}ms {before / after:>9.0f}x")
+
+
+def main():
+    random.seed(0)
+    ids = [random.randint(1, BOOKS) for _ in range(LOOKUPS)]
+
+    start = time.perf_counter()
+    document = make_document(BOOKS)
+    catalog = Catalog(make_document(BOOKS))
+    print(f"{BOOKS:,} books; building the indexes took {time.perf_counter() - start:.1f} s (with the data)")
+    start = time.perf_counter()
+    catalog.books_json()
+    print(f"first data://books read (serialize every book once): {time.perf_counter() - start:.2f} s\n")
+    assert catalog.books_json() == before_all_books(document)
+
+    print(f"{'operation':<34} {'before':>13} {'catalog':>13} {'speedup':>10}")
+    row("data://books, nothing changed", timed(lambda: before_all_books(document), 3), timed(catalog.books_json, 1000))
+
+    def catalog_read_after_change():
+        catalog.set_available(ids[0], not catalog.get(ids[0])["available"])
+        catalog.books_json()
+
+    def before_read_after_change():
+        before_set_available(document, ids[0], not document["books"][ids[0] - 1]["available"])
+        before_all_books(document)
+
+    row("data://books after one change", timed(before_read_after_change, 3), timed(catalog_read_after_change, 10))
+
+    row(
+        "data://books/{id}",
+        timed(lambda: [before_book_by_id(document, i) for i in ids]) / LOOKUPS,
+        timed(lambda: [catalog_book_by_id(catalog, i) for i in ids], 1000) / LOOKUPS,
+    )
+
+    def before_issue_return():
+        for i in ids:
+            before_set_available(document, i, False)
+            before_set_available(document, i, True)
+
+    def catalog_issue_return():
+        for i in ids:
+            catalog.set_available(i, False)
+            catalog.set_available(i, True)
+
+    row("issue_book + return_book", timed(before_issue_return) / LOOKUPS, timed(catalog_issue_return, 1000) / LOOKUPS)
+    row(
+        "book_recommendation (one genre)",
+        timed(lambda: before_genre(document, "genre 7"), 3),
+        timed(lambda: [book for book in catalog.genre("genre 7") if book["available"]], 10),
+    )
+
+
+if __name__ == "__main__":
+    main()
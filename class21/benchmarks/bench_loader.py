@@ -0,0 +1,139 @@
+"""
+Benchmark: start-up time and memory (RSS) of the catalog at 10 thousand,
+1 million and 10 million books.
+
+  - "books.json":       json.load of the whole file, as server.py does
+                        with data/books.json (skipped at 10M: it needs
+                        more memory than most machines have)
+  - "jsonl, cold":      books.jsonl opened for the first time, so the
+                        offset index is built (every line is parsed once)
+  - "jsonl, warm":      books.jsonl opened again: the index is mapped, no
+                        line is parsed
+  - "jsonl, +1000":     1,000 books appended, then opened again: only the
+                        new lines are indexed (what a hot reload does)
+
+Each measurement runs in a new Python process. "open" is the time to a
+usable catalog, "lookup" one book by id, "genre" the first recommendation
+list (it builds the genre indexes). Memory is measured after the open
+and after the genre query, split in two:
+  - "heap": memory the process owns (RssAnon) and can't give back;
+  - "mapped": pages of memory-mapped files that were read (RssFile).
+    They are the OS's file cache, shared and dropped under pressure; a
+    genre spread over the whole file touches most of its pages.
+
+Run from the class21 folder:
+    uv run python benchmarks/bench_loader.py
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+SIZES = [10_000, 1_000_000, 10_000_000]
+JSON_LIMIT = 1_000_000  # largest books.json to try
+GENRES = 50
+APPEND = 1_000
+
+
+def book_line(i: int) -> str:
+    """The same text json.dumps(book) gives, made faster for millions of books."""
+    available = "true" if i % 3 else "false"
+    return (
+        f'{{"id": {i}, "title": "Book {i}", "author": "Author {i % 10_000}", "genre": "Genre {i % GENRES}",'
+        f' "published_year": {1900 + i % 125}, "available": {available}}}\n'
+    )
+
+
+def write_files(directory: str, count: int) -> tuple[str, str | None]:
+    jsonl_path = os.path.join(directory, "books.jsonl")
+    with open(jsonl_path, "w") as f:
+        for start in range(1, count + 1, 100_000):
+            f.write("".join(book_line(i) for i in range(start, min(start + 100_000, count + 1))))
+    if count > JSON_LIMIT:
+        return jsonl_path, None
+    json_path = os.path.join(directory, "books.json")
+    with open(json_path, "w") as f:
+        f.write(f'{{"total": {count}, "books": [')
+        f.write(", ".join(book_line(i).rstrip("\n") for i in range(1, count + 1)))
+        f.write("]}")
+    return jsonl_path, json_path
+
+
+def rss_mb() -> tuple[float, float]:
+    """(heap, mapped) resident memory in MB, from /proc (Linux)."""
+    sizes = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                sizes[line.split(":")[0]] = int(line.split()[1]) / 1024
+    return sizes.get("RssAnon", 0.0), sizes.get("RssFile", 0.0)
+
+
+def grown(base: tuple[float, float]) -> list[float]:
+    return [now - before for now, before in zip(rss_mb(), base)]
+
+
+def measure(path: str, count: int) -> None:
+    """Runs in a child process: open the catalog, look things up, print the numbers as JSON."""
+    from catalog import Catalog
+
+    base = rss_mb()
+    start = time.perf_counter()
+    catalog = Catalog.load(path)
+    opened = time.perf_counter() - start
+    rss_open = grown(base)
+
+    start = time.perf_counter()
+    assert catalog.get(count // 2)["id"] == count // 2
+    lookup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    catalog.available("Genre 7")
+    genre = time.perf_counter() - start
+    print(json.dumps({"open": opened, "lookup": lookup, "genre": genre, "rss_open": rss_open, "rss_genre": grown(base)}))
+
+
+def run(path: str, count: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, __file__, "--measure", path, str(count)], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def row(count: int, name: str, result: dict) -> None:
+    print(
+        f"{count:>11,} {name:<14} {result['open']:>9.3f}s {result['lookup'] * 1000:>8.3f}ms {result['genre']:>8.3f}s"
+        f" {result['rss_open'][0]:>7,.0f} /{result['rss_open'][1]:>6,.0f}MB"
+        f" {result['rss_genre'][0]:>7,.0f} /{result['rss_genre'][1]:>6,.0f}MB"
+    )
+
+
+def main():
+    print(f"{'':>37} {'':>19} {'heap / mapped':>16} {'heap / mapped':>16}")
+    print(f"{'books':>11} {'how':<14} {'open':>10} {'lookup':>10} {'genre':>9} {'after open':>16} {'after genre':>16}")
+    for count in SIZES:
+        directory = tempfile.mkdtemp()
+        try:
+            jsonl_path, json_path = write_files(directory, count)
+            if json_path:
+                row(count, "books.json", run(json_path, count))
+            row(count, "jsonl, cold", run(jsonl_path, count))
+            row(count, "jsonl, warm", run(jsonl_path, count))
+            with open(jsonl_path, "a") as f:
+                f.write("".join(book_line(i) for i in range(count + 1, count + APPEND + 1)))
+            row(count, f"jsonl, +{APPEND}", run(jsonl_path, count))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        measure(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: the whole catalog (data://books) against one page of it
+(data://books?genre=...&cursor=...&fields=...), at 1,000,000 books.
+
+Reads go through the MCP server with an in-memory client, so "read"
+includes the MCP round trip but not the network: the in-memory transport
+hands the client the server's string as is. Over SSE those bytes would
+have to be sent as well, so the payload size matters more than "read"
+shows. "parse" is the json.loads every client then pays.
+
+"full dump" is served from the catalog's cache (see catalog.py); "full
+dump, uncached" is json.dumps of the whole catalog, as server.py used to
+do on every read.
+
+Run from the class21 folder:
+    uv run python benchmarks/bench_pages.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["LEDGER_DIR"] = tempfile.mkdtemp()
+
+from fastmcp import Client
+
+import server
+from catalog import Catalog
+
+BOOKS = 1_000_000
+GENRES = 50
+AUTHORS = 10_000
+REPEAT = 200
+
+
+def make_document(count: int) -> dict:
+    books = [
+        {
+            "id": i,
+            "title": f"Book {i}",
+            "author": f"Author {i % AUTHORS}",
+            "genre": f"Genre {i % GENRES}",
+            "published_year": 1900 + i % 125,
+            "available": True,
+        }
+        for i in range(1, count + 1)
+    ]
+    return {"total": count, "books": books}
+
+
+async def read(client, uri: str) -> str:
+    return (await client.read_resource(uri))[0].text
+
+
+async def timed(client, uri: str, repeat: int) -> tuple[float, float, int]:
+    """(average seconds per read, seconds to parse the response, bytes in the response)"""
+    text = await read(client, uri)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await read(client, uri)
+    seconds = (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    json.loads(text)
+    return seconds, time.perf_counter() - start, len(text.encode())
+
+
+def row(name: str, seconds: float, parse: float, size: int, full_size: int) -> None:
+    print(
+        f"{name:<36} {seconds * 1000:>10.3f}ms {parse * 1000:>10.3f}ms"
+        f" {size:>14,} B {full_size / size:>10,.0f}x smaller"
+    )
+
+
+async def main():
+    document = make_document(BOOKS)
+    server.catalog = Catalog(document)
+    server.catalog.books_json()  # warm the cache, so "full dump" is the best case
+
+    async with Client(server.mcp) as client:
+        # A cursor from the middle of the catalog, to show deep pages cost the same
+        middle = json.loads(await read(client, "data://books?genre=Genre%207&limit=100&fields=title"))["next_cursor"]
+        for _ in range(BOOKS // GENRES // 100 // 2):
+            page = json.loads(await read(client, f"data://books?genre=Genre%207&limit=100&fields=title&cursor={middle}"))
+            middle = page["next_cursor"]
+
+        full, full_parse, full_size = await timed(client, "data://books", 3)
+        start = time.perf_counter()
+        json.dumps(document)
+        uncached = time.perf_counter() - start
+
+        print(f"{BOOKS:,} books, {GENRES} genres, {AUTHORS:,} authors")
+        print(f"{'':<36} {'read':>12} {'parse':>12} {'payload':>16}")
+        row("full dump", full, full_parse, full_size, full_size)
+        row("full dump, uncached", uncached, full_parse, full_size, full_size)
+        pages = [
+            ("data://books?limit=20", "first page, 20 books"),
+            ("data://books?genre=Genre%207", "genre, 20 books"),
+            (f"data://books?genre=Genre%207&cursor={middle}", "genre, page 100"),
+            ("data://books?author=Author%2042", "author, 20 books"),
+            ("data://books?genre=Genre%2042&author=Author%2042", "genre + author"),
+            ("data://books?genre=Genre%207&fields=title,author", "genre, title + author only"),
+            ("data://books?genre=Genre%207&limit=100&fields=title", "genre, 100 titles"),
+        ]
+        for uri, name in pages:
+            seconds, parse, size = await timed(client, uri, REPEAT)
+            row(name, seconds, parse, size, full_size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
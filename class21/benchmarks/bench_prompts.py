@@ -0,0 +1,103 @@
+"""
+Benchmark: book_recommendation latency on big catalogs with many genres,
+while books are being issued and returned.
+
+Each run asks for a random genre's prompt REQUESTS times and issues or
+returns a random book every CHANGE_EVERY requests. The same run is
+timed four ways:
+  - "scan":          the old server.py code, a pass over every book
+  - "genre index":   the books of the genre, filtered by "available"
+  - "shelf index":   the maintained genre -> available books index
+  - "cached":        book_recommendation as it is now, which reuses a
+                     rendered prompt until its genre's version changes
+
+Run from the class21 folder:
+    uv run python benchmarks/bench_prompts.py
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["LEDGER_DIR"] = tempfile.mkdtemp()
+
+import server
+from catalog import Catalog
+
+RUNS = [(100_000, 50), (1_000_000, 50), (1_000_000, 1_000), (1_000_000, 20_000)]
+REQUESTS = 2_000
+SCAN_REQUESTS = 10  # the old way is too slow to run the whole workload
+CHANGE_EVERY = 10
+
+
+def make_document(count: int, genres: int) -> dict:
+    books = [
+        {
+            "id": i,
+            "title": f"Book {i}",
+            "author": f"Author {i % 10_000}",
+            "genre": f"Genre {i % genres}",
+            "published_year": 1900 + i % 125,
+            "available": i % 3 != 0,
+        }
+        for i in range(1, count + 1)
+    ]
+    return {"total": count, "books": books}
+
+
+def render(genre: str, available_books: list[dict]) -> str:
+    """The text book_recommendation returns, from a list of books."""
+    if not available_books:
+        return f"No available books found in the '{genre}' genre. Suggest some popular {genre} books the library should add."
+    book_list = "\n".join([f"- {b['title']} by {b['author']} ({b['published_year']})" for b in available_books])
+    return f"Here are available books in the '{genre}' genre:\n{book_list}\nRecommend which one the user should read and why."
+
+
+def scan(books: list[dict], genre: str) -> str:
+    return render(genre, [book for book in books if book["available"] and book["genre"].lower() == genre.lower()])
+
+
+def genre_index(genre: str) -> str:
+    return render(genre, [book for book in server.catalog.genre(genre) if book["available"]])
+
+
+def run(prompt, count: int, genres: int, requests: int) -> float:
+    """Average seconds per prompt over the workload."""
+    rng = random.Random(0)
+    server.recommendation_cache.clear()
+    total = 0.0
+    for request in range(requests):
+        if request % CHANGE_EVERY == 0:
+            book_id = rng.randint(1, count)
+            server.catalog.set_available(book_id, not server.catalog.get(book_id)["available"])
+        genre = f"Genre {rng.randrange(genres)}"
+        start = time.perf_counter()
+        prompt(genre)
+        total += time.perf_counter() - start
+    return total / requests
+
+
+def main():
+    print(f"{REQUESTS} prompts per run, a book issued or returned every {CHANGE_EVERY}")
+    print(f"{'books':>10} {'genres':>7} {'scan':>11} {'genre index':>12} {'shelf index':>12} {'cached':>10} {'vs scan':>9}")
+    for count, genres in RUNS:
+        document = make_document(count, genres)
+        server.catalog = Catalog(document)
+        books = document["books"]
+        assert server.book_recommendation("Genre 1") == scan(books, "Genre 1")
+
+        before = run(lambda genre: scan(books, genre), count, genres, SCAN_REQUESTS)
+        by_genre = run(genre_index, count, genres, REQUESTS)
+        shelf = run(server.render_book_recommendation, count, genres, REQUESTS)
+        cached = run(server.book_recommendation, count, genres, REQUESTS)
+        print(
+            f"{count:>10,} {genres:>7,} {before * 1000:>9.2f}ms {by_genre * 1000:>10.3f}ms"
+            f" {shelf * 1000:>10.3f}ms {cached * 1000:>8.3f}ms {before / cached:>8,.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+The catalog as a JSON-lines file, read through a memory map.
+
+books.json has to be read and parsed whole before the server can answer
+anything, and then every book sits in memory as a dict, so start-up time
+and memory grow with the catalog. books.jsonl holds the same books, one
+JSON object per line:
+
+    {"id": 1, "title": "Atomic Habits", "author": "James Clear", ...}
+    {"id": 2, "title": "The Pragmatic Programmer", ...}
+
+BookFile maps the file into memory (the OS reads a page only when it is
+touched) and keeps an index next to it, in books.jsonl.index/:
+  meta.json              how much of the file is indexed, plus a quick
+                         check that the file wasn't rewritten since
+  offsets-N.bin          where each book's line starts (8 bytes a book)
+  ids-N.bin              each book's id
+  genres-N.bin           each book's genre and author, as a number into
+  authors-N.bin            names-N.json
+  available-N.bin        each book's "available" flag in the file
+The columns are memory-mapped as well, so opening a catalog that is
+already indexed costs about the same for ten thousand books or ten
+million. A book's line is only parsed when someone asks for it.
+
+The index grows with the file: when books are appended, the next open
+reads only the new lines and appends them to the columns. If the file
+was replaced or rewritten, it is indexed again from the start as a new
+generation N, and the old generation's files are removed (a BookFile
+still using them keeps its mapping).
+
+Change the file by appending lines, or by writing a new file and
+renaming it over the old one. Truncating it in place while a server has
+it mapped can crash reads of the old catalog.
+
+FileWatcher calls a function when a file changes, so a server can load
+the new catalog and swap it in without a restart.
+
+Convert a books.json:
+    uv run python book_file.py data/books.json data/books.jsonl
+"""
+
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+try:
+    import fcntl  # one process at a time updates an index (not on Windows)
+except ImportError:
+    fcntl = None
+
+INDEX_VERSION = 1
+CHECK_BYTES = 64
+COLUMNS = {"offsets": "Q", "ids": "q", "genres": "I", "authors": "I", "available": "B"}
+
+
+def _map_column(path: Path, typecode: str, count: int):
+    """The first `count` items of a column file, memory-mapped and read-only."""
+    size = count * array(typecode).itemsize
+    if size == 0:
+        return array(typecode)
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+    return memoryview(data).cast(typecode)
+
+
+class BookFile:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index_dir = self.path.with_name(self.path.name + ".index")
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        self._inode = stat.st_ino
+
+        self.index_dir.mkdir(exist_ok=True)
+        with open(self.index_dir / "lock", "w") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            meta = self._update_index()
+
+        generation, count = meta["generation"], meta["count"]
+        self._count = count
+        self._ascending = meta["ascending"]
+        self.offsets, self.ids, self.genre_codes, self.author_codes, self.available = (
+            _map_column(self._column_path(name, generation), typecode, count) for name, typecode in COLUMNS.items()
+        )
+        names = json.loads((self.index_dir / f"names-{generation}.json").read_text())
+        self.genre_names, self.author_names = names["genres"], names["authors"]
+        self.meta = {"total": count}
+        self.fields = list(self.record(0)) if count else []
+        self._positions: dict[int, int] | None = None  # id -> position, only if ids aren't in order
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def position(self, book_id: int) -> int | None:
+        if self._ascending:
+            position = bisect_left(self.ids, book_id)
+            return position if position < self._count and self.ids[position] == book_id else None
+        if self._positions is None:
+            with self._lock:
+                if self._positions is None:
+                    self._positions = {book_id: position for position, book_id in enumerate(self.ids)}
+        return self._positions.get(book_id)
+
+    def text(self, position: int) -> str:
+        """The book's line, as JSON text."""
+        start = self.offsets[position]
+        return self._data[start:self._data.find(b"\n", start)].decode().rstrip("\r")
+
+    def record(self, position: int) -> dict:
+        return json.loads(self.text(position))
+
+    # ---------- The index ----------
+
+    def _column_path(self, name: str, generation: int) -> Path:
+        return self.index_dir / f"{name}-{generation}.bin"
+
+    def _check(self, size: int) -> dict:
+        """What meta.json remembers to tell whether the first `size` bytes are unchanged."""
+        return {
+            "inode": self._inode,
+            "head": self._data[:min(size, CHECK_BYTES)].hex(),
+            "tail": self._data[max(0, size - CHECK_BYTES):size].hex(),
+        }
+
+    def _update_index(self) -> dict:
+        """Bring the index up to date with the file (call with the lock file held). Returns meta."""
+        meta_path = self.index_dir / "meta.json"
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else None
+        usable = (
+            meta is not None
+            and meta["version"] == INDEX_VERSION
+            and meta["size"] <= len(self._data)
+            and self._check(meta["size"]) == meta["check"]
+        )
+        if usable:
+            names = json.loads((self.index_dir / f"names-{meta['generation']}.json").read_text())
+            for name, typecode in COLUMNS.items():
+                # Cut anything written after meta.json was (a crash while indexing)
+                with open(self._column_path(name, meta["generation"]), "r+b") as f:
+                    f.truncate(meta["count"] * array(typecode).itemsize)
+        else:
+            generation = meta["generation"] + 1 if meta else 1
+            meta = {"version": INDEX_VERSION, "generation": generation, "size": 0, "count": 0,
+                    "ascending": True, "last_id": None}
+            names = {"genres": [], "authors": []}
+            for name in COLUMNS:
+                self._column_path(name, generation).write_bytes(b"")
+
+        end = self._data.rfind(b"\n") + 1  # a half-written last line waits for the next open
+        if end > meta["size"] or not usable:
+            self._index_lines(meta, names, end)
+            (self.index_dir / f"names-{meta['generation']}.json").write_text(json.dumps(names))
+            meta["check"] = self._check(meta["size"])
+            temp_path = meta_path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(meta))
+            os.replace(temp_path, meta_path)
+
+        for path in self.index_dir.iterdir():
+            stem = path.stem.rsplit("-", 1)
+            if len(stem) == 2 and stem[1].isdigit() and int(stem[1]) != meta["generation"]:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass  # in use (Windows); removed next time
+        return meta
+
+    def _index_lines(self, meta: dict, names: dict, end: int) -> None:
+        """Index the lines from meta["size"] to `end` and append them to the columns."""
+        columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        genre_codes = {name: code for code, name in enumerate(names["genres"])}
+        author_codes = {name: code for code, name in enumerate(names["authors"])}
+        ascending, last_id = meta["ascending"], meta["last_id"]
+        data = self._data
+        offset = meta["size"]
+        if offset < end:
+            data.seek(offset)
+        while offset < end:
+            line = data.readline()
+            if line.strip():
+                book = json.loads(line)
+                columns["offsets"].append(offset)
+                columns["ids"].append(book["id"])
+                columns["genres"].append(genre_codes.setdefault(book["genre"], len(genre_codes)))
+                columns["authors"].append(author_codes.setdefault(book["author"], len(author_codes)))
+                columns["available"].append(1 if book["available"] else 0)
+                ascending = ascending and (last_id is None or book["id"] > last_id)
+                last_id = book["id"]
+            offset += len(line)
+
+        for name, column in columns.items():
+            with open(self._column_path(name, meta["generation"]), "ab") as f:
+                f.write(column.tobytes())
+        names["genres"], names["authors"] = list(genre_codes), list(author_codes)
+        meta["size"] = end
+        meta["count"] += len(columns["ids"])
+        meta["ascending"], meta["last_id"] = ascending, last_id
+
+
+def write_jsonl(books, path) -> None:
+    """Write books to a JSON-lines file (a new file, renamed over the old one)."""
+    path = Path(path)
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(temp_path, "w") as f:
+        for book in books:
+            f.write(json.dumps(book) + "\n")
+    os.replace(temp_path, path)
+
+
+class FileWatcher:
+    """
+    Calls on_change() for a file, from a background thread, when the file
+    changes (checked every `interval` seconds). If on_change() raises, for
+    instance because the file is half-written, it is tried again on the
+    next check.
+
+        watcher = FileWatcher({"data/books.jsonl": reload_catalog})
+        watcher.start()
+    """
+
+    def __init__(self, callbacks: dict, interval: float = 2.0):
+        self.callbacks = {Path(path): callback for path, callback in callbacks.items()}
+        self.interval = interval
+        self._seen = {path: self._signature(path) for path in self.callbacks}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+
+    @staticmethod
+    def _signature(path: Path):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def check(self) -> None:
+        """Look at every file once and call on_change() for those that changed."""
+        for path, callback in self.callbacks.items():
+            signature = self._signature(path)
+            if signature is None or signature == self._seen[path]:
+                continue
+            try:
+                callback()
+            except Exception as e:
+                print(f"Reloading {path.name} failed, keeping the old one: {e!r}")
+                continue
+            self._seen[path] = signature
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+
+if __name__ == "__main__":
+    source, target = sys.argv[1:3]
+    with open(source) as f:
+        books = json.load(f)["books"]
+    start = time.perf_counter()
+    write_jsonl(books, target)
+    BookFile(target)
+    print(f"Wrote and indexed {len(books):,} books in {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,299 @@
+"""
+The library catalog: books found by id or genre without scanning the list.
+
+server.py used to walk the whole book list to find one book (a million
+comparisons for a million books) and ran json.dumps over the entire
+catalog on every `data://books` read, even when nothing had changed.
+
+The books themselves come from a "book source", which keeps them in
+catalog order ("positions" 0, 1, 2 ...):
+  - DocumentBooks: a books.json document, parsed into memory;
+  - BookFile (see book_file.py): a books.jsonl file, memory-mapped, with
+    ids, genres, authors and flags in compact columns and each book's
+    line parsed only when it is asked for.
+
+    catalog = Catalog.load("data/books.json")    # or data/books.jsonl
+    catalog.get(3)                      # the book (a new dict), or None
+    catalog.set_available(3, False)     # the only way books change
+    catalog.books_json()                # == json.dumps(the whole file)
+
+On top of the source, Catalog keeps:
+  - which books are on the shelf right now (one byte per book); the
+    source's own "available" flags are only the starting point;
+  - genre and author indexes: name (lower case) -> positions of its
+    books, in order. They are built the first time they are needed,
+    from the source's columns, so opening a big catalog stays quick;
+  - an index of the books on the shelf: genre -> positions of its
+    available books, kept in order as books are issued and returned
+    (a binary search and one insert/delete per change), plus a version
+    number per genre that changes on every such change, so anything
+    built from a genre's books (a rendered prompt, say) can tell when it
+    is out of date. Versions come from one counter for the whole
+    process, so a new Catalog never repeats an old one's versions;
+  - the full `data://books` response. Books that haven't changed use the
+    source's JSON text as is; only changed books are serialized again.
+    Reads in between get the cached text.
+
+The whole catalog is too big to hand to a model, so page() returns a
+slice of it: optionally one genre and/or author, `limit` books from a
+cursor, and only some fields. The cursor is the catalog position of the
+last book on the page; the next page starts with a binary search for it
+in the (sorted) position list, so page 1,000 costs the same as page 1.
+
+    books, cursor = catalog.page(genre="fiction", limit=20, fields=["title"])
+    books, cursor = catalog.page(genre="fiction", limit=20, after=cursor)
+"""
+
+import itertools
+import json
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from pathlib import Path
+
+from book_file import BookFile
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+_versions = itertools.count(1)  # genre versions, unique across every Catalog
+
+
+class DocumentBooks:
+    """A book source over a parsed books.json document (see BookFile for the other one)."""
+
+    def __init__(self, document: dict):
+        self._rows = document["books"]
+        # Everything in the file except the books ("total"...), kept for the full response
+        self.meta = {key: value for key, value in document.items() if key != "books"}
+        self.fields = list(self._rows[0]) if self._rows else []
+        self.ids = [book["id"] for book in self._rows]
+        self._positions = {book_id: position for position, book_id in enumerate(self.ids)}
+        genres: dict[str, int] = {}
+        authors: dict[str, int] = {}
+        self.genre_codes = [genres.setdefault(book["genre"], len(genres)) for book in self._rows]
+        self.author_codes = [authors.setdefault(book["author"], len(authors)) for book in self._rows]
+        self.genre_names, self.author_names = list(genres), list(authors)
+        self.available = bytes(1 if book["available"] else 0 for book in self._rows)
+        self._texts: list[str | None] = [None] * len(self._rows)  # json.dumps(book), made when first needed
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def position(self, book_id: int) -> int | None:
+        return self._positions.get(book_id)
+
+    def text(self, position: int) -> str:
+        text = self._texts[position]
+        if text is None:
+            text = self._texts[position] = json.dumps(self._rows[position])
+        return text
+
+    def record(self, position: int) -> dict:
+        return dict(self._rows[position])
+
+
+class Catalog:
+    def __init__(self, books):
+        """`books` is a books.json document (a dict) or a book source such as a BookFile."""
+        self._source = source = DocumentBooks(books) if isinstance(books, dict) else books
+        self.fields = source.fields  # what `fields` can pick from
+        self._shelf = bytearray(source.available)  # position -> 1 if the book is available now
+        self._changed: set[int] = set()  # positions whose flag differs from the source's
+        self._genre_keys = [name.lower() for name in source.genre_names]
+        self._author_keys = [name.lower() for name in source.author_names]
+        self._genres: dict[str, array] | None = None  # genre (lower case) -> positions
+        self._authors: dict[str, array] | None = None  # author (lower case) -> positions
+        self._available: dict[str, array] | None = None  # genre (lower case) -> positions of available books
+        self._genre_versions: dict[str, int] = {}  # genre (lower case) -> version of its last change
+        self._first_version = next(_versions)  # of every genre before its first change
+
+        self._full_json: str | None = None
+        self.version = 0  # number of changes so far
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path) -> "Catalog":
+        """A books.jsonl file is memory-mapped (see book_file.py); anything else is read as books.json."""
+        if Path(path).suffix == ".jsonl":
+            return cls(BookFile(path))
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self._source)
+
+    # ---------- Lookups ----------
+
+    def get(self, book_id: int) -> dict | None:
+        position = self._source.position(book_id)
+        return None if position is None else self._book(position)
+
+    def genre(self, genre: str) -> list[dict]:
+        """All books of a genre (any letter case), in catalog order."""
+        return [self._book(position) for position in self._genre_index().get(genre.lower(), ())]
+
+    def genres(self) -> list[str]:
+        return list(self._genre_index())
+
+    def available(self, genre: str) -> list[dict]:
+        """The available books of a genre (any letter case), in catalog order."""
+        self._genre_index()
+        with self._lock:
+            positions = self._available.get(genre.lower(), array("I"))[:]
+        return [self._book(position) for position in positions]
+
+    def genre_version(self, genre: str) -> int:
+        """Changes each time a book of this genre is issued or returned."""
+        return self._genre_versions.get(genre.lower(), self._first_version)
+
+    def issued(self) -> list[int]:
+        """Ids of the books that are not available."""
+        return [self._source.ids[position] for position in self._off_shelf()]
+
+    def page(
+        self,
+        genre: str | None = None,
+        author: str | None = None,
+        after: int | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        fields: list[str] | None = None,
+    ) -> tuple[list[dict], int | None]:
+        """
+        Books matching genre and author (any letter case, both optional)
+        that come after the cursor, at most `limit` of them, with only
+        `fields` (plus "id") when given. Returns (books, next_cursor);
+        next_cursor is None on the last page.
+        """
+        positions = self._matching(genre, author)
+        if positions is None:
+            start = 0 if after is None else after + 1
+            selected = range(start, min(start + limit, len(self)))
+            more = start + limit < len(self)
+        else:
+            start = 0 if after is None else bisect_right(positions, after)
+            selected = positions[start:start + limit]
+            more = start + limit < len(positions)
+
+        books = [self._book(position) for position in selected]
+        if fields is not None:
+            keep = ["id", *(field for field in fields if field != "id")]
+            books = [{field: book[field] for field in keep} for book in books]
+        return books, (selected[-1] if more and selected else None)
+
+    def count(self, genre: str | None = None, author: str | None = None) -> int:
+        positions = self._matching(genre, author)
+        return len(self) if positions is None else len(positions)
+
+    def _matching(self, genre: str | None, author: str | None):
+        """Sorted catalog positions of the matching books, or None for "every book"."""
+        by_genre = None if genre is None else self._genre_index().get(genre.lower(), array("I"))
+        by_author = None if author is None else self._author_index().get(author.lower(), array("I"))
+        if by_genre is None or by_author is None:
+            return by_author if by_genre is None else by_genre
+        # Both filters: walk the shorter list, check the other field's column for each book
+        if len(by_genre) <= len(by_author):
+            keys, codes, wanted, shorter = self._author_keys, self._source.author_codes, author.lower(), by_genre
+        else:
+            keys, codes, wanted, shorter = self._genre_keys, self._source.genre_codes, genre.lower(), by_author
+        return array("I", (position for position in shorter if keys[codes[position]] == wanted))
+
+    # ---------- Changes ----------
+
+    def set_available(self, book_id: int, available: bool) -> dict | None:
+        """Mark a book available or issued. Returns the book, or None if there is no such id."""
+        position = self._source.position(book_id)
+        if position is None:
+            return None
+        with self._lock:
+            if self._shelf[position] != available:
+                self._shelf[position] = available
+                self._changed ^= {position}  # back to the source's flag, or away from it
+                genre = self._genre_keys[self._source.genre_codes[position]]
+                if self._available is not None:
+                    shelf = self._available.setdefault(genre, array("I"))
+                    if available:
+                        insort(shelf, position)
+                    else:
+                        del shelf[bisect_left(shelf, position)]
+                self._genre_versions[genre] = next(_versions)
+                self._full_json = None
+                self.version += 1
+        return self._book(position)
+
+    def set_issued(self, book_ids) -> None:
+        """Mark exactly these books issued and every other book available."""
+        positions = {self._source.position(book_id) for book_id in book_ids} - {None}
+        for position in self._off_shelf():
+            if position not in positions:
+                self.set_available(self._source.ids[position], True)
+        for position in positions:
+            self.set_available(self._source.ids[position], False)
+
+    # ---------- Serialized responses ----------
+
+    def book_json(self, book_id: int) -> str | None:
+        position = self._source.position(book_id)
+        if position is None:
+            return None
+        if position in self._changed:
+            return json.dumps(self._book(position))
+        return self._source.text(position)
+
+    def books_json(self) -> str:
+        """The whole catalog as JSON, the same text json.dumps(document) gives."""
+        with self._lock:
+            if self._full_json is None:
+                changed, text, book = self._changed, self._source.text, self._book
+                body = ", ".join(
+                    json.dumps(book(position)) if position in changed else text(position)
+                    for position in range(len(self))
+                )
+                # json.dumps(document) with "books" as the last key, put together by hand
+                meta = self._source.meta
+                separator = ", " if meta else ""
+                self._full_json = f'{json.dumps(meta)[:-1]}{separator}"books": [{body}]}}'
+            return self._full_json
+
+    # ---------- Internals ----------
+
+    def _book(self, position: int) -> dict:
+        book = self._source.record(position)
+        book["available"] = bool(self._shelf[position])
+        return book
+
+    def _off_shelf(self) -> list[int]:
+        """Positions of the books that are not available (found by bytearray.find, not a Python loop)."""
+        positions = []
+        position = self._shelf.find(0)
+        while position != -1:
+            positions.append(position)
+            position = self._shelf.find(0, position + 1)
+        return positions
+
+    def _genre_index(self) -> dict[str, array]:
+        """Build the genre and shelf indexes on first use, in one pass over the genre column."""
+        if self._genres is None:
+            with self._lock:
+                if self._genres is None:
+                    genres = {key: array("I") for key in self._genre_keys}
+                    available = {key: array("I") for key in self._genre_keys}
+                    keys, shelf = self._genre_keys, self._shelf
+                    for position, code in enumerate(self._source.genre_codes):
+                        genres[keys[code]].append(position)
+                        if shelf[position]:
+                            available[keys[code]].append(position)
+                    self._available = available
+                    self._genres = genres
+        return self._genres
+
+    def _author_index(self) -> dict[str, array]:
+        if self._authors is None:
+            with self._lock:
+                if self._authors is None:
+                    authors = {key: array("I") for key in self._author_keys}
+                    keys = self._author_keys
+                    for position, code in enumerate(self._source.author_codes):
+                        authors[keys[code]].append(position)
+                    self._authors = authors
+        return self._authors
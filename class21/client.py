@@ -14,6 +14,10 @@ async def main():
         book = await client.read_resource("data://books/1")
         rich.print("Book 1:", book)
 
+        # Read one page of a genre, titles and authors only
+        page = await client.read_resource("data://books?genre=Programming&limit=2&fields=title,author")
+        rich.print("Programming books:", page)
+
         # Read rules
         rules = await client.read_resource("data://rules")
         rich.print("Rules:", rules)
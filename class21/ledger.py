@@ -0,0 +1,250 @@
+"""
+The loan ledger: who has which book, safe under many sessions at once and
+kept on disk across restarts.
+
+issue_book used to check `book["available"]` and then flip it. Two MCP
+sessions could both pass the check and issue the same copy, and a restart
+forgot every loan. Here the check and the change happen together under
+one lock (a few dict operations, so the lock is held for microseconds):
+
+    ledger.issue(3, "ali")   # the loan, or LoanError if the rules say no
+    ledger.give_back(3)      # the finished loan, or LoanError
+
+Member limits come from data/rules.json ("up to 3 books", "within 14
+days"). Each member's loans are kept in their own small dict, so the
+checks look at at most `max_books` loans no matter how big the library is:
+  - a member can't have more than max_books books at a time;
+  - a member with an overdue book can't borrow another until it's back.
+
+On disk (the `directory`, data/ledger by default):
+  loans-000000000001.log ...  every issue/return, one JSON line each,
+                              appended in order. The number is the
+                              sequence of the segment's first record.
+  snapshot.json               all open loans at some sequence number
+Start-up loads the snapshot and replays the lines after it. Every
+`snapshot_every` changes a new snapshot is written (temp file + rename)
+and the segments it covers are deleted, so the log never grows forever.
+Each line is flushed to the OS straight away, which survives a restart
+or a crash of the server; fsync=True also survives a power cut, at the
+cost of a disk sync per change.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_MAX_BOOKS = 3
+DEFAULT_LOAN_DAYS = 14
+DAY = 24 * 60 * 60
+SNAPSHOT_FILE = "snapshot.json"
+
+
+def limits_from_rules(rules: dict) -> tuple[int, int]:
+    """(max books per member, loan days) read from the text of data/rules.json."""
+    max_books, loan_days = DEFAULT_MAX_BOOKS, DEFAULT_LOAN_DAYS
+    for rule in rules["rules"]:
+        if match := re.search(r"up to (\d+) books", rule["rule"]):
+            max_books = int(match[1])
+        if match := re.search(r"within (\d+) days", rule["rule"]):
+            loan_days = int(match[1])
+    return max_books, loan_days
+
+
+class LoanError(Exception):
+    """
+    The rules don't allow this issue or return. `reason` is one of
+    "on_loan", "not_on_loan", "limit" or "overdue".
+    """
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _segment_name(first_sequence: int) -> str:
+    return f"loans-{first_sequence:012d}.log"
+
+
+def _segment_start(path: Path) -> int:
+    return int(path.stem.split("-")[1])
+
+
+class Ledger:
+    def __init__(
+        self,
+        directory,
+        max_books: int = DEFAULT_MAX_BOOKS,
+        loan_days: int = DEFAULT_LOAN_DAYS,
+        snapshot_every: int = 10_000,
+        fsync: bool = False,
+        on_change=None,
+        clock=time.time,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_books = max_books
+        self.loan_days = loan_days
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.on_change = on_change  # on_change(book_id, on_loan), called with the lock held
+        self.clock = clock
+
+        self.loans: dict[int, dict] = {}  # book id -> loan
+        self._members: dict[str, dict[int, float]] = {}  # member -> {book id: due at}
+        self._sequence = 0  # number of the last change written
+        self._since_snapshot = 0
+        self._lock = threading.Lock()
+        self._snapshot_running = threading.Lock()
+
+        self._recover()
+        self._file = open(self.directory / _segment_name(self._sequence + 1), "a")
+
+    # ---------- Lookups ----------
+
+    def loan(self, book_id: int) -> dict | None:
+        return self.loans.get(book_id)
+
+    def member_loans(self, member: str) -> list[dict]:
+        return [self.loans[book_id] for book_id in self._members.get(member, ())]
+
+    def is_new(self) -> bool:
+        """True until the first change is written."""
+        return self._sequence == 0
+
+    def with_loans(self, function):
+        """Run function(loans) while no book can be issued or returned. Returns what it returns."""
+        with self._lock:
+            return function(self.loans)
+
+    # ---------- Changes ----------
+
+    def issue(self, book_id: int, member: str, check_member: bool = True) -> dict:
+        """
+        Lend a book to a member. Returns the loan; raises LoanError if the
+        rules say no. check_member=False skips the member limits (for
+        bringing in loans made before the ledger existed).
+        """
+        with self._lock:
+            if book_id in self.loans:
+                raise LoanError("on_loan", f"Book {book_id} is already issued")
+            held = self._members.get(member, {})
+            if check_member and len(held) >= self.max_books:
+                raise LoanError("limit", f"{member} already has {len(held)} books; the limit is {self.max_books}")
+            now = self.clock()
+            if check_member and held and min(held.values()) < now:
+                raise LoanError("overdue", f"{member} has an overdue book; it must be returned first")
+            loan = {"book_id": book_id, "member": member, "issued_at": now, "due_at": now + self.loan_days * DAY}
+            self._write(["issue", book_id, member, loan["issued_at"], loan["due_at"]])
+            self._lend(loan)
+        self._maybe_snapshot()
+        return loan
+
+    def give_back(self, book_id: int) -> dict:
+        """Return a book. Returns the loan it ends; raises LoanError if it isn't on loan."""
+        with self._lock:
+            if book_id not in self.loans:
+                raise LoanError("not_on_loan", f"Book {book_id} is not issued")
+            self._write(["return", book_id])
+            loan = self._end(book_id)
+        self._maybe_snapshot()
+        return loan
+
+    # ---------- Internals (call with the lock held) ----------
+
+    def _lend(self, loan: dict) -> None:
+        self.loans[loan["book_id"]] = loan
+        self._members.setdefault(loan["member"], {})[loan["book_id"]] = loan["due_at"]
+        if self.on_change:
+            self.on_change(loan["book_id"], True)
+
+    def _end(self, book_id: int) -> dict:
+        loan = self.loans.pop(book_id)
+        held = self._members[loan["member"]]
+        del held[book_id]
+        if not held:
+            del self._members[loan["member"]]
+        if self.on_change:
+            self.on_change(book_id, False)
+        return loan
+
+    def _write(self, record: list) -> None:
+        self._sequence += 1
+        self._since_snapshot += 1
+        self._file.write(json.dumps([self._sequence, *record], separators=(",", ":")) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _apply(self, record: list) -> None:
+        sequence, operation, book_id, *fields = record
+        if operation == "issue":
+            member, issued_at, due_at = fields
+            self._lend({"book_id": book_id, "member": member, "issued_at": issued_at, "due_at": due_at})
+        else:
+            self._end(book_id)
+        self._sequence = sequence
+
+    # ---------- Disk ----------
+
+    def _recover(self) -> None:
+        """Load the snapshot, then replay the log lines written after it."""
+        on_change, self.on_change = self.on_change, None  # only live changes are reported
+        snapshot_path = self.directory / SNAPSHOT_FILE
+        if snapshot_path.exists():
+            snapshot = json.loads(snapshot_path.read_text())
+            for loan in snapshot["loans"]:
+                self._lend(loan)
+            self._sequence = snapshot["sequence"]
+
+        for path in sorted(self.directory.glob("loans-*.log"), key=_segment_start):
+            with open(path, "r+b") as f:
+                offset = 0
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        record = None
+                    if record is None or not line.endswith(b"\n"):
+                        # The server died halfway through this line: cut it off
+                        print(f"Truncating torn write at the end of {path.name}")
+                        f.truncate(offset)
+                        break
+                    offset += len(line)
+                    if record[0] > self._sequence:
+                        self._apply(record)
+                        self._since_snapshot += 1
+        self.on_change = on_change
+
+    def _maybe_snapshot(self) -> None:
+        if self._since_snapshot >= self.snapshot_every and not self._snapshot_running.locked():
+            threading.Thread(target=self.snapshot, daemon=True).start()
+
+    def snapshot(self) -> None:
+        """Write every open loan to snapshot.json, then delete the log segments it covers."""
+        with self._snapshot_running:
+            with self._lock:
+                loans = list(self.loans.values())  # loans are never changed in place, so no deep copy
+                sequence = self._sequence
+                # Later changes go to a new segment, which the snapshot doesn't cover
+                self._file.close()
+                self._file = open(self.directory / _segment_name(sequence + 1), "a")
+                self._since_snapshot = 0
+            # The slow part runs without the lock
+            temp_path = self.directory / (SNAPSHOT_FILE + ".tmp")
+            with open(temp_path, "w") as f:
+                json.dump({"sequence": sequence, "loans": loans}, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.directory / SNAPSHOT_FILE)
+            for path in self.directory.glob("loans-*.log"):
+                if _segment_start(path) <= sequence:
+                    path.unlink()
+
+    def close(self, snapshot: bool = True) -> None:
+        if snapshot and self._since_snapshot:
+            self.snapshot()
+        with self._snapshot_running, self._lock:  # let a snapshot running in the background finish
+            self._file.close()
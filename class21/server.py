@@ -1,28 +1,110 @@
+import asyncio
 import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
 from fastmcp import FastMCP
 
+from book_file import FileWatcher
+from catalog import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Catalog
+from ledger import Ledger, LoanError, limits_from_rules
+
 mcp = FastMCP()
 
-with open("data/books.json") as f:
-    books_data = json.load(f)
+# Paths are relative to this file, so the server starts from any folder.
+# CATALOG_PATH can point at a books.jsonl instead (memory-mapped, see book_file.py).
+DATA_DIR = Path(__file__).parent / "data"
+CATALOG_PATH = Path(os.getenv("CATALOG_PATH", DATA_DIR / "books.json"))
+RULES_PATH = DATA_DIR / "rules.json"
 
-with open("data/rules.json") as r:
+# Books indexed by id and genre, with the JSON responses cached (see catalog.py)
+catalog = Catalog.load(CATALOG_PATH)
+
+with open(RULES_PATH) as r:
     rules = json.load(r)
 
+# Who has which book, kept on disk; the catalog's "available" flags follow it (see ledger.py)
+max_books, loan_days = limits_from_rules(rules)
+ledger = Ledger(
+    os.getenv("LEDGER_DIR", DATA_DIR / "ledger"),
+    max_books=max_books,
+    loan_days=loan_days,
+    fsync=os.getenv("LEDGER_FSYNC") == "1",
+    on_change=lambda book_id, on_loan: catalog.set_available(book_id, not on_loan),
+)
+if ledger.is_new():
+    # First start: books.json already lists some books as issued, but not to whom
+    for book_id in catalog.issued():
+        ledger.issue(book_id, "unknown", check_member=False)
+catalog.set_issued(ledger.loans)
+
+def reload_catalog():
+    """Load the catalog file again and swap it in, with the current loans applied."""
+    new_catalog = Catalog.load(CATALOG_PATH)  # the slow part, while the old one keeps serving
+
+    def swap(loans):
+        global catalog
+        new_catalog.set_issued(loans)
+        catalog = new_catalog  # one assignment: every request sees the old catalog or the new one
+
+    ledger.with_loans(swap)  # no issue/return can slip in between the two lines above
+
+def reload_rules():
+    global rules
+    with open(RULES_PATH) as r:
+        new_rules = json.load(r)
+    ledger.max_books, ledger.loan_days = limits_from_rules(new_rules)
+    rules = new_rules
+
+# Pick up edits to the catalog and rules without a restart (CATALOG_RELOAD_INTERVAL=0 turns it off)
+reload_interval = float(os.getenv("CATALOG_RELOAD_INTERVAL", "2"))
+if reload_interval > 0:
+    FileWatcher({CATALOG_PATH: reload_catalog, RULES_PATH: reload_rules}, interval=reload_interval).start()
+
 ######
 ################## Resources ##################
 ######
 
 @mcp.resource("data://books")
 async def get_all_books():
-    return json.dumps(books_data)
+    return catalog.books_json()
 
 @mcp.resource("data://books/{id}")
 async def get_book_by_id(id: int):
-    for book in books_data["books"]:
-        if book["id"] == id:
-            return json.dumps(book)
-    return json.dumps({"error": f"Book with id {id} not found"})
+    book_json = catalog.book_json(id)
+    if book_json is None:
+        return json.dumps({"error": f"Book with id {id} not found"})
+    return book_json
+
+# One page at a time instead of the whole catalog, e.g.
+#   data://books?genre=Programming&limit=10&fields=title,author
+#   data://books?author=James%20Clear&cursor=<next_cursor of the last page>
+@mcp.resource("data://books{?genre,author,cursor,limit,fields}")
+async def list_books(
+    genre: str | None = None,
+    author: str | None = None,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: str | None = None,
+):
+    """A page of books, filtered by genre and/or author, with only the fields asked for."""
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return json.dumps({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"})
+    if cursor is not None and not cursor.isdigit():
+        return json.dumps({"error": f"Invalid cursor {cursor!r}"})
+    field_list = None
+    if fields:
+        field_list = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in field_list if field not in catalog.fields]
+        if unknown:
+            return json.dumps({"error": f"Unknown field(s) {', '.join(unknown)}; choose from {', '.join(catalog.fields)}"})
+    books, next_cursor = catalog.page(genre, author, int(cursor) if cursor else None, limit, field_list)
+    return json.dumps({
+        "total": catalog.count(genre, author),
+        "books": books,
+        "next_cursor": None if next_cursor is None else str(next_cursor),
+    })
 
 @mcp.resource("data://rules")
 async def get_rules():
@@ -32,33 +114,58 @@ async def get_rules():
 ################## Tools ##################
 ######
 
+# The ledger runs in a worker thread, so a disk write (or fsync) never stalls other sessions
+
 @mcp.tool()
-async def issue_book(book_id: int) -> str:
-    for book in books_data["books"]:
-        if book["id"] == book_id:
-            if not book["available"]:
-                return json.dumps({"error": f"'{book['title']}' is already issued"})
-            book["available"] = False
-            return json.dumps({"success": f"'{book['title']}' has been issued"})
-    return json.dumps({"error": f"Book with id {book_id} not found"})
+async def issue_book(book_id: int, member: str | None = None) -> str:
+    book = catalog.get(book_id)
+    if book is None:
+        return json.dumps({"error": f"Book with id {book_id} not found"})
+    # Callers that don't say who they are can't be told apart, so the
+    # per-member limits only apply when a member is given
+    try:
+        loan = await asyncio.to_thread(ledger.issue, book_id, member or "guest", check_member=member is not None)
+    except LoanError as e:
+        if e.reason == "on_loan":
+            return json.dumps({"error": f"'{book['title']}' is already issued"})
+        return json.dumps({"error": str(e)})
+    due = datetime.fromtimestamp(loan["due_at"], timezone.utc).date().isoformat()
+    return json.dumps({"success": f"'{book['title']}' has been issued", "due": due})
 
 @mcp.tool()
 async def return_book(book_id: int) -> str:
-    for book in books_data["books"]:
-        if book["id"] == book_id:
-            if book["available"]:
-                return json.dumps({"error": f"'{book['title']}' is not issued"})
-            book["available"] = True
-            return json.dumps({"success": f"'{book['title']}' has been returned"})
-    return json.dumps({"error": f"Book with id {book_id} not found"})
+    book = catalog.get(book_id)
+    if book is None:
+        return json.dumps({"error": f"Book with id {book_id} not found"})
+    try:
+        await asyncio.to_thread(ledger.give_back, book_id)
+    except LoanError:
+        return json.dumps({"error": f"'{book['title']}' is not issued"})
+    return json.dumps({"success": f"'{book['title']}' has been returned"})
 
 ######
 ################## Prompts ##################
 ######
 
+# Rendered book_recommendation prompts: genre as asked -> (genre version, text).
+# A text is reused until a book of its genre is issued or returned.
+recommendation_cache: dict[str, tuple[int, str]] = {}
+RECOMMENDATION_CACHE_SIZE = 1024
+
 @mcp.prompt()
 def book_recommendation(genre: str) -> str:
-    available_books = [book for book in books_data["books"] if book["available"] and book["genre"].lower() == genre.lower()]
+    version = catalog.genre_version(genre)  # read first: a change while rendering only makes the entry stale
+    cached = recommendation_cache.get(genre)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    prompt = render_book_recommendation(genre)
+    if genre not in recommendation_cache and len(recommendation_cache) >= RECOMMENDATION_CACHE_SIZE:
+        del recommendation_cache[next(iter(recommendation_cache))]  # drop the oldest
+    recommendation_cache[genre] = (version, prompt)
+    return prompt
+
+def render_book_recommendation(genre: str) -> str:
+    available_books = catalog.available(genre)
     if not available_books:
         return f"No available books found in the '{genre}' genre. Suggest some popular {genre} books the library should add."
     book_list = "\n".join([f"- {b['title']} by {b['author']} ({b['published_year']})" for b in available_books])
@@ -66,10 +173,13 @@ def book_recommendation(genre: str) -> str:
 
 @mcp.prompt()
 def overdue_notice(user_name: str, book_id: int) -> str:
-    for book in books_data["books"]:
-        if book["id"] == book_id:
-            return f"Write a polite overdue notice for {user_name} who has not returned '{book['title']}' by {book['author']}. Remind them of library rules and ask them to return it soon."
+    book = catalog.get(book_id)
+    if book is not None:
+        return f"Write a polite overdue notice for {user_name} who has not returned '{book['title']}' by {book['author']}. Remind them of library rules and ask them to return it soon."
     return f"Write a general overdue notice for {user_name} reminding them to return their overdue library book."
 
 if __name__ == "__main__":
-    mcp.run()
+    try:
+        mcp.run()
+    finally:
+        ledger.close()